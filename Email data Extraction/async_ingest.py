@@ -0,0 +1,185 @@
+# Async multi-account IMAP ingestion - many mailboxes at once, bounded per server
+
+import asyncio
+import email
+import imaplib
+from datetime import datetime
+
+from imap_fetch import DEFAULT_CHUNK_SIZE, chunked, fetch_message_parts, get_uidvalidity, subject_search, uid_search
+from main import FLIGHT_KEYWORDS, EmailFlightExtractor
+from metrics import metrics
+
+
+def _alive(mail):
+    try:
+        return mail.noop()[0] == 'OK'
+    except Exception:
+        return False
+
+
+class ServerPool:
+    """Caps concurrent authenticated connections per IMAP server and reuses logged-in sessions.
+
+    A released connection stays logged in and is handed to the next task
+    for the same account, so one pool passed to several ingest runs logs
+    in once per account instead of once per run.
+    """
+
+    def __init__(self, max_per_server=4, connect=None):
+        self.max_per_server = max_per_server
+        self.connect = connect or imaplib.IMAP4_SSL
+        self._limits = {}
+        self._idle = {}  # (server, user) -> [logged-in IMAP objects]
+
+    def limit(self, server):
+        if server not in self._limits:
+            self._limits[server] = asyncio.Semaphore(self.max_per_server)
+        return self._limits[server]
+
+    async def open(self, account):
+        """Connected + logged-in IMAP object - an idle one if it still answers NOOP (blocking work runs in a thread)"""
+        idle = self._idle.get((account['server'], account['user']), [])
+        while idle:
+            mail = idle.pop()
+            if await asyncio.to_thread(_alive, mail):
+                metrics.inc('flight_imap_sessions_total', result='reused')
+                return mail
+
+        def login():
+            mail = self.connect(account['server'])
+            mail.login(account['user'], account['password'])
+            return mail
+        mail = await asyncio.to_thread(login)
+        metrics.inc('flight_imap_sessions_total', result='login')
+        return mail
+
+    def release(self, account, mail):
+        """Give a healthy connection back for reuse"""
+        self._idle.setdefault((account['server'], account['user']), []).append(mail)
+
+    async def close(self):
+        """Log out every idle connection"""
+        idle, self._idle = self._idle, {}
+        for connections in idle.values():
+            for mail in connections:
+                await asyncio.to_thread(_logout, mail)
+
+
+def _logout(mail):
+    try:
+        mail.logout()
+    except Exception:
+        pass
+
+
+def _fetch_chunk(mail, uids, chunk_size):
+    return list(fetch_message_parts(mail, uids, chunk_size))
+
+
+async def _fetch_account(pool, account, queue, search, chunk_size, sync_state, marks):
+    """Search + fetch every folder of one account, pushing messages onto queue"""
+    server = account['server']
+    async with pool.limit(server):
+        try:
+            mail = await pool.open(account)
+        except Exception as e:
+            print(f"❌ {account['user']}@{server}: connection failed: {e}")
+            return
+
+        healthy = False
+        try:
+            if search is None:
+                search = subject_search(mail, FLIGHT_KEYWORDS)  # OR of the keywords (X-GM-RAW on Gmail)
+            for folder in account.get('folders', ['inbox']):
+                status, data = await asyncio.to_thread(mail.select, folder, True)
+                if status != 'OK':
+                    print(f"❌ {account['user']}: can't select {folder}")
+                    continue
+
+                key = f"{account['user']}@{server}"
+                start_uid, uidvalidity = 1, None
+                if sync_state:
+                    uidvalidity = await asyncio.to_thread(get_uidvalidity, mail, folder)
+                    start_uid = sync_state.start_uid(key, folder, uidvalidity)
+
+                uids = await asyncio.to_thread(uid_search, mail, search, start_uid)
+                print(f"📧 {key}/{folder}: {len(uids)} flight emails")
+
+                # Fetch chunk n+1 while the parser works through chunk n
+                for chunk in chunked(uids, chunk_size):
+                    messages = await asyncio.to_thread(_fetch_chunk, mail, chunk, chunk_size)
+                    for message in messages:
+                        await queue.put((account, folder, message))
+
+                # Saved only once everything queued has been parsed
+                if sync_state and uids:
+                    marks.append((key, folder, uidvalidity, uids[-1]))
+            healthy = True
+        except Exception as e:
+            print(f"❌ {account['user']}@{server}: {e}")
+        finally:
+            if healthy:
+                pool.release(account, mail)
+            else:
+                await asyncio.to_thread(_logout, mail)
+
+
+async def _parse_messages(queue, records):
+    """Turn queued messages into flight records with the existing email parser"""
+    parser = EmailFlightExtractor(None, None)
+    while True:
+        item = await queue.get()
+        try:
+            if item is None:
+                return
+            account, folder, message = item
+            with metrics.time('mime_parse'):
+                subject = parser.decode_subject(email.message_from_bytes(message['header'])["Subject"])
+            details = parser.extract_flight_details(subject or "", message['text'])
+            details['account'] = account['user']
+            details['folder'] = folder
+            details['email_id'] = str(message['uid'])
+            details['processed_date'] = datetime.now().strftime("%Y-%m-%d")
+            records.append(details)
+        except Exception as e:
+            print(f"❌ Parse failed: {e}")
+        finally:
+            queue.task_done()
+
+
+async def ingest_accounts(accounts, max_per_server=4, chunk_size=DEFAULT_CHUNK_SIZE, search=None,
+                          sync_state=None, queue_size=1000, connect=None, pool=None):
+    """Fetch and parse flight emails from many accounts concurrently.
+
+    accounts: [{'user': ..., 'password': ..., 'server': 'imap.gmail.com',
+                'folders': ['inbox', ...]}, ...]
+    search defaults to any of FLIGHT_KEYWORDS in the Subject. Pass a
+    ServerPool to keep sessions open across runs - the caller closes it.
+    """
+    own_pool = pool is None
+    pool = pool or ServerPool(max_per_server, connect)
+    queue = asyncio.Queue(maxsize=queue_size)  # backpressure on the fetchers
+    records = []
+    marks = []
+
+    parser_task = asyncio.create_task(_parse_messages(queue, records))
+    await asyncio.gather(*(
+        _fetch_account(pool, {'server': 'imap.gmail.com', **account}, queue, search, chunk_size,
+                       sync_state, marks)
+        for account in accounts
+    ))
+    await queue.put(None)
+    await parser_task
+    if own_pool:
+        await pool.close()
+
+    for key, folder, uidvalidity, last_uid in marks:
+        sync_state.update(key, folder, uidvalidity, last_uid)
+
+    print(f"🎉 Ingested {len(records)} flight records from {len(accounts)} accounts")
+    return records
+
+
+def run_ingestion(accounts, **kwargs):
+    """Blocking wrapper for scripts and cron jobs"""
+    return asyncio.run(ingest_accounts(accounts, **kwargs))
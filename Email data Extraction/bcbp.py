@@ -0,0 +1,130 @@
+# IATA BCBP boarding pass barcodes - decode the PDF417/Aztec/QR code instead of OCR'ing the page
+
+import calendar
+import os
+from datetime import date, datetime, timedelta
+
+from flight_parser import NOT_FOUND, default_parser
+
+try:
+    import zxingcpp
+except ImportError:  # no decoder - callers fall back to OCR
+    zxingcpp = None
+
+# Mandatory items of the first leg (IATA Resolution 792): (field, start, end)
+BCBP_FIELDS = [
+    ('format_code', 0, 1),
+    ('legs', 1, 2),
+    ('passenger_name', 2, 22),
+    ('eticket', 22, 23),
+    ('pnr', 23, 30),
+    ('from', 30, 33),
+    ('to', 33, 36),
+    ('carrier', 36, 39),
+    ('flight_number', 39, 44),
+    ('julian_date', 44, 47),
+    ('compartment', 47, 48),
+    ('seat', 48, 52),
+    ('sequence', 52, 57),
+    ('status', 57, 58),
+]
+BCBP_MIN_LENGTH = 60
+
+
+def barcode_formats():
+    formats = zxingcpp.BarcodeFormat
+    return formats.PDF417 | formats.Aztec | formats.QRCode | formats.DataMatrix
+
+
+def decode_barcodes(image):
+    """Texts of every 2D barcode zxing-cpp finds in a PIL image"""
+    if zxingcpp is None:
+        return []
+    if image.mode not in ('L', 'RGB'):
+        image = image.convert('L')
+    return [result.text for result in zxingcpp.read_barcodes(image, formats=barcode_formats()) if result.text]
+
+
+def parse_bcbp(data):
+    """Fixed-width first-leg fields of a BCBP string, or None if it isn't one"""
+    if len(data) < BCBP_MIN_LENGTH or data[0] != 'M' or not data[1].isdigit():
+        return None
+    fields = {name: data[start:end].strip() for name, start, end in BCBP_FIELDS}
+    if not fields['julian_date'].isdigit() or not 1 <= int(fields['julian_date']) <= 366:
+        return None
+    if not fields['flight_number'][:1].isdigit():
+        return None
+    return fields
+
+
+# Boarding passes are issued at check-in, so without a source date the flight is taken
+# to be the latest one that isn't more than this far ahead of today
+MAX_DAYS_AHEAD = 7
+
+
+def julian_to_date(day_of_year, source_date=None, today=None):
+    """BCBP carries no year - anchor it to when the pass was sent/saved.
+
+    With source_date (email Date header, file mtime) the year putting the
+    flight closest to it wins. Without one, the most recent date at most
+    MAX_DAYS_AHEAD days past today - an archived pass stays in the past.
+    Day 366 only exists in leap years, so only those are candidates for it.
+    """
+    anchor = source_date or today or date.today()
+    # Eight years back always holds a leap year (even around 2100)
+    years = range(anchor.year - 8, anchor.year + 2) if day_of_year == 366 else \
+        range(anchor.year - 1, anchor.year + 2)
+    candidates = [date(year, 1, 1) + timedelta(days=day_of_year - 1)
+                  for year in years if day_of_year <= 365 or calendar.isleap(year)]
+    if source_date:
+        return min(candidates, key=lambda day: abs(day - source_date))
+    latest = anchor + timedelta(days=MAX_DAYS_AHEAD)
+    return max(day for day in candidates if day <= latest)
+
+
+def file_date(path):
+    """Modification date of a file on disk, or None (e.g. an attachment name)"""
+    try:
+        return date.fromtimestamp(os.path.getmtime(path))
+    except (OSError, TypeError, ValueError):
+        return None
+
+
+def bcbp_record(data, source_file, source_date=None):
+    """BCBP string -> record with the same keys as FlightDetailsParser.parse"""
+    fields = parse_bcbp(data)
+    if fields is None:
+        return None
+
+    # 'AI ', '0101 ' -> AI101 (operational suffix letter kept)
+    digits = fields['flight_number'].rstrip('ABCDEFGHIJKLMNOPQRSTUVWXYZ')
+    suffix = fields['flight_number'][len(digits):]
+    flight_number = f"{fields['carrier']}{int(digits):03d}{suffix}" if digits.isdigit() else NOT_FOUND
+
+    surname, _, given = fields['passenger_name'].partition('/')
+    name = f"{given} {surname}".strip().title() or NOT_FOUND
+
+    seat = fields['seat'].lstrip('0') or NOT_FOUND
+    flight_date = julian_to_date(int(fields['julian_date']), source_date)
+
+    return {
+        'source_file': os.path.basename(source_file),
+        'extraction_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        'flight_number': flight_number,
+        'route': f"{fields['from']} → {fields['to']}",
+        'passenger_name': name,
+        'date': flight_date.strftime("%d/%m/%Y"),
+        'time': NOT_FOUND,  # departure time isn't part of BCBP
+        'seat': seat,
+        'pnr': fields['pnr'] or NOT_FOUND,
+        'airline': default_parser.detect_airline(flight_number),
+    }
+
+
+def read_boarding_pass(image, source_file, source_date=None):
+    """Record from the first BCBP barcode in a PIL image, or None (source_date anchors the flight's year)"""
+    for text in decode_barcodes(image):
+        record = bcbp_record(text, source_file, source_date)
+        if record is not None:
+            return record
+    return None
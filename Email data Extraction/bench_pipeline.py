@@ -0,0 +1,212 @@
+# Benchmark suite - per-stage throughput + latency percentiles on a synthetic corpus, saved as a JSON baseline
+
+import argparse
+import email
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+from bcbp import read_boarding_pass, zxingcpp
+from flight_parser import default_parser
+from image_preprocess import PreprocessConfig, load_image, preprocess_image
+from ocr_backend import get_backend
+from report_sink import ParquetSink, StreamingExcelSink, have_pyarrow
+from synthetic_corpus import generate_corpus
+
+STAGES = ['decode', 'barcode', 'preprocess', 'ocr', 'parse', 'email_parse', 'report_write', 'report_close']
+CHECKED_FIELDS = ['flight_number', 'route', 'passenger_name', 'date', 'time', 'seat', 'pnr', 'airline']
+
+
+def percentile(sorted_values, q):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+class StageTimer:
+    """Wall-clock samples per stage"""
+
+    def __init__(self):
+        self.samples = {}
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+
+    def summary(self):
+        stats = {}
+        for stage in STAGES:
+            values = sorted(self.samples.get(stage, []))
+            if not values:
+                continue
+            total = sum(values)
+            stats[stage] = {
+                'count': len(values),
+                'total_s': round(total, 4),
+                'per_s': round(len(values) / total, 2) if total else None,
+                'p50_ms': round(percentile(values, 50) * 1000, 3),
+                'p90_ms': round(percentile(values, 90) * 1000, 3),
+                'p99_ms': round(percentile(values, 99) * 1000, 3),
+                'max_ms': round(values[-1] * 1000, 3),
+            }
+        return stats
+
+
+def run_benchmark(corpus_dir, items, engine='auto', ocr=True):
+    """Time every stage over the corpus; returns (stage stats, field accuracy)"""
+    timer = StageTimer()
+    config = PreprocessConfig()
+    backend = get_backend(engine) if ocr else None
+    hits = {field: 0 for field in CHECKED_FIELDS}
+    checked = 0
+    records = []
+
+    from main import EmailFlightExtractor  # heavy module - only needed for the email stage
+    mailer = EmailFlightExtractor(None, None)
+
+    for item in items:
+        path = os.path.join(corpus_dir, item['file'])
+        with open(path, 'rb') as f:
+            data = f.read()
+
+        if item['kind'] == 'email':
+            with timer.time('email_parse'):
+                subject, body = mailer.parse_email_content(email.message_from_bytes(data))
+                mailer.extract_flight_details(subject, body)
+            continue
+
+        with timer.time('decode'):
+            image = load_image(io.BytesIO(data), config)
+            image.load()
+
+        record = None
+        if zxingcpp is not None:
+            with timer.time('barcode'):
+                record = read_boarding_pass(image, path)
+
+        if ocr:
+            with timer.time('preprocess'):
+                prepared = preprocess_image(image, config)
+            with timer.time('ocr'):
+                text = backend.image_to_string(prepared)
+            with timer.time('parse'):
+                parsed = default_parser.parse(text, path)
+            record = record or parsed
+
+        if record is not None:
+            records.append(record)
+            checked += 1
+            for field in CHECKED_FIELDS:
+                hits[field] += record[field] == item['expected'][field]
+
+    out_dir = tempfile.mkdtemp(prefix='bench_report_')
+    sinks = [StreamingExcelSink(os.path.join(out_dir, 'bench.xlsx'))]
+    if have_pyarrow():
+        sinks.append(ParquetSink(os.path.join(out_dir, 'parquet')))
+    for record in records:
+        with timer.time('report_write'):
+            for sink in sinks:
+                sink.write(record)
+    with timer.time('report_close'):
+        for sink in sinks:
+            sink.close()
+
+    accuracy = {field: round(hits[field] / checked, 3) if checked else None for field in CHECKED_FIELDS}
+    return timer.summary(), accuracy
+
+
+def environment(engine, ocr):
+    env = {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'zxingcpp': zxingcpp is not None,
+        'pyarrow': have_pyarrow(),
+    }
+    if ocr:
+        backend = get_backend(engine)
+        env['ocr_engine'] = f"{backend.name}-{backend.version()}"
+    return env
+
+
+def compare(baseline, current, tolerance):
+    """Print throughput change per stage; True if any stage got slower than tolerance"""
+    regressed = False
+    print(f"\n{'Stage':<14}{'Baseline/s':>12}{'Now/s':>10}{'Change':>9}")
+    for stage, now in current['stages'].items():
+        before = baseline.get('stages', {}).get(stage)
+        if not before or not before.get('per_s') or not now.get('per_s'):
+            continue
+        change = now['per_s'] / before['per_s'] - 1
+        flag = ""
+        if change < -tolerance:
+            flag = "  ⚠️ REGRESSION"
+            regressed = True
+        print(f"{stage:<14}{before['per_s']:>12.1f}{now['per_s']:>10.1f}{change:>+8.0%}{flag}")
+    return regressed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Flight extraction benchmark on a synthetic corpus")
+    parser.add_argument('-n', type=int, default=30, help="boarding passes (and emails) to generate")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--corpus', help="corpus directory (generated if it has no manifest.json)")
+    parser.add_argument('--engine', default='auto', help="OCR backend: auto, tesserocr, pytesseract")
+    parser.add_argument('--no-ocr', action='store_true', help="skip preprocess/OCR/parse (no Tesseract needed)")
+    parser.add_argument('--output', default='bench_baseline.json', help="where to write the results")
+    parser.add_argument('--compare', help="baseline JSON to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10, help="allowed throughput drop before failing")
+    args = parser.parse_args(argv)
+
+    corpus_dir = args.corpus or os.path.join(tempfile.gettempdir(), f"flight_corpus_n{args.n}_s{args.seed}")
+    manifest_path = os.path.join(corpus_dir, 'manifest.json')
+    if not os.path.exists(manifest_path):
+        generate_corpus(corpus_dir, args.n, args.seed)
+    with open(manifest_path, encoding='utf-8') as f:
+        manifest = json.load(f)
+
+    print("⏱️ PIPELINE BENCHMARK")
+    print("=" * 70)
+    start = time.perf_counter()
+    stages, accuracy = run_benchmark(corpus_dir, manifest['items'], args.engine, not args.no_ocr)
+
+    results = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'environment': environment(args.engine, not args.no_ocr),
+        'corpus': {'n': manifest['n'], 'seed': manifest['seed'], 'dir': corpus_dir},
+        'wall_s': round(time.perf_counter() - start, 3),
+        'stages': stages,
+        'accuracy': accuracy,
+    }
+
+    print(f"{'Stage':<14}{'Count':>7}{'Per s':>10}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'Max ms':>10}")
+    for stage, s in stages.items():
+        print(f"{stage:<14}{s['count']:>7}{s['per_s'] or 0:>10.1f}{s['p50_ms']:>10.2f}"
+              f"{s['p90_ms']:>10.2f}{s['p99_ms']:>10.2f}{s['max_ms']:>10.2f}")
+    print("Field accuracy: " + ", ".join(f"{k} {v:.0%}" for k, v in accuracy.items() if v is not None))
+
+    regressed = False
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            regressed = compare(json.load(f), results, args.tolerance)
+
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(results, f, indent=2, ensure_ascii=False)
+    print(f"\n💾 Results saved: {args.output}")
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
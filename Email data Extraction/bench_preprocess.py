@@ -0,0 +1,89 @@
+# Benchmark - OCR time per image with and without the preprocessing stage
+
+import glob
+import os
+import sys
+import tempfile
+import time
+
+import pytesseract
+from PIL import Image, ImageDraw, ImageFont
+
+from image_preprocess import PreprocessConfig, load_image, preprocess_image
+
+if os.name == 'nt':
+    pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+IMAGE_EXTENSIONS = ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.tiff']
+
+
+def create_phone_scan(filename=os.path.join(tempfile.gettempdir(), "bench_phone_scan.jpg"), size=(4000, 3000)):
+    """12 MP JPEG of a slightly rotated boarding pass, like a phone photo"""
+    img = Image.new('RGB', size, color=(235, 232, 225))
+    d = ImageDraw.Draw(img)
+    try:
+        font = ImageFont.load_default(size=90)
+    except TypeError:  # Pillow < 10.1 has a single bitmap font
+        font = ImageFont.load_default()
+
+    lines = [
+        "BOARDING PASS",
+        "PASSENGER NAME: VENKATESH KUMAR",
+        "FLIGHT: AI101",
+        "FROM: DEL TO: BOM",
+        "DATE: 25/01/2025",
+        "TIME: 08:30 AM",
+        "SEAT: 15A",
+        "PNR: ABC123",
+    ]
+    for i, line in enumerate(lines):
+        d.text((300, 300 + i * 250), line, fill=(20, 20, 20), font=font)
+
+    img = img.rotate(2.5, resample=Image.BICUBIC, fillcolor=(235, 232, 225))
+    img.save(filename, quality=92, dpi=(72, 72))
+    return filename
+
+
+def time_ocr(image_path, config):
+    """Seconds for decode (+ preprocess) + OCR of one image"""
+    start = time.perf_counter()
+    if config is None:
+        image = Image.open(image_path)
+    else:
+        image = preprocess_image(load_image(image_path, config), config)
+    text = pytesseract.image_to_string(image)
+    return time.perf_counter() - start, len(text.strip())
+
+
+def main():
+    directory = sys.argv[1] if len(sys.argv) > 1 else "."
+    image_files = []
+    for ext in IMAGE_EXTENSIONS:
+        image_files.extend(glob.glob(os.path.join(directory, ext)))
+
+    if not image_files:
+        print("No images found - generating a synthetic 12 MP phone scan...")
+        image_files = [create_phone_scan()]
+
+    config = PreprocessConfig()
+    print("⏱️ OCR TIME PER IMAGE: RAW vs PREPROCESSED")
+    print("=" * 70)
+    print(f"{'Image':<30}{'Size':>12}{'Raw (s)':>10}{'Prep (s)':>10}{'Speedup':>9}")
+
+    total_raw = total_prep = 0.0
+    for image_file in image_files:
+        with Image.open(image_file) as img:
+            size = f"{img.size[0]}x{img.size[1]}"
+        raw, _ = time_ocr(image_file, None)
+        prep, _ = time_ocr(image_file, config)
+        total_raw += raw
+        total_prep += prep
+        print(f"{os.path.basename(image_file)[:29]:<30}{size:>12}{raw:>10.2f}{prep:>10.2f}{raw / prep:>8.1f}x")
+
+    print("-" * 70)
+    print(f"{'Mean':<42}{total_raw / len(image_files):>10.2f}"
+          f"{total_prep / len(image_files):>10.2f}{total_raw / total_prep:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
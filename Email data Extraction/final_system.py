@@ -1,298 +1,276 @@
-# Final Working System - Direct Image Processing (No PDF conversion needed)
-
-import pytesseract
-from PIL import Image
-import imaplib
-import email
-from email.header import decode_header
-import re
-import pandas as pd
-from datetime import datetime
-import os
-import glob
-
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-
-class FinalFlightExtractor:
-    def __init__(self, email_user=None, email_pass=None):
-        self.email_user = email_user
-        self.email_pass = email_pass
-        
-    def extract_from_image(self, image_path):
-        """Extract flight data directly from image (bypass PDF issues)"""
-        try:
-            print(f"Processing image: {os.path.basename(image_path)}")
-            
-            # OCR extract
-            text = pytesseract.image_to_string(Image.open(image_path))
-            print("Extracted text preview:")
-            print(text[:300] + "...")
-            
-            # Parse flight details
-            flight_details = self.parse_flight_details(text, image_path)
-            return flight_details
-            
-        except Exception as e:
-            print(f"Error processing image {image_path}: {e}")
-            return None
-
-    def parse_flight_details(self, text, source_file):
-        """Parse flight details from OCR text"""
-        details = {
-            'source_file': os.path.basename(source_file),
-            'extraction_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        }
-        
-        # Extract flight number
-        flight_patterns = [
-            r'FLIGHT:\s*([A-Z]{2}\d{3,4})',
-            r'([A-Z]{2}\d{3,4})',
-            r'FLIGHT\s*(?:NUMBER|NO)?\s*:?\s*([A-Z]{2}\d{3,4})'
-        ]
-        
-        for pattern in flight_patterns:
-            match = re.search(pattern, text.upper())
-            if match:
-                details['flight_number'] = match.group(1) if len(match.groups()) >= 1 else match.group(0)
-                break
-        else:
-            details['flight_number'] = "Not found"
-        
-        # Extract route
-        route_patterns = [
-            r'FROM:\s*([A-Z]{3})\s*TO:\s*([A-Z]{3})',
-            r'([A-Z]{3})\s*(?:→|-|TO)\s*([A-Z]{3})',
-        ]
-        
-        for pattern in route_patterns:
-            match = re.search(pattern, text.upper())
-            if match and len(match.groups()) >= 2:
-                details['route'] = f"{match.group(1)} → {match.group(2)}"
-                break
-        else:
-            details['route'] = "Not found"
-        
-        # Extract passenger name
-        name_patterns = [
-            r'PASSENGER\s*NAME:\s*([A-Z\s]+?)(?:\s+TERMINAL|\s+FLIGHT|\n)',
-            r'NAME:\s*([A-Z\s]+?)(?:\s+TERMINAL|\s+FLIGHT|\n)',
-        ]
-        
-        for pattern in name_patterns:
-            match = re.search(pattern, text.upper())
-            if match:
-                name = match.group(1).strip()
-                name = re.sub(r'\s+', ' ', name)  # Clean multiple spaces
-                name = name.replace('TERMINAL', '').replace('FLIGHT', '').strip()
-                details['passenger_name'] = name.title()
-                break
-        else:
-            details['passenger_name'] = "Not found"
-        
-        # Extract date
-        date_patterns = [
-            r'DATE:\s*(\d{1,2}/\d{1,2}/\d{4})',
-            r'(\d{1,2}/\d{1,2}/\d{4})',
-        ]
-        
-        for pattern in date_patterns:
-            match = re.search(pattern, text)
-            if match:
-                details['date'] = match.group(1)
-                break
-        else:
-            details['date'] = "Not found"
-        
-        # Extract time
-        time_patterns = [
-            r'TIME:\s*(\d{1,2}:\d{2}\s*(?:AM|PM))',
-            r'(\d{1,2}:\d{2}\s*(?:AM|PM))',
-        ]
-        
-        for pattern in time_patterns:
-            match = re.search(pattern, text.upper())
-            if match:
-                details['time'] = match.group(1)
-                break
-        else:
-            details['time'] = "Not found"
-        
-        # Extract seat
-        seat_patterns = [
-            r'SEAT:\s*([A-Z]?\d{1,2}[A-Z]?)',
-            r'SEAT\s*(?:NUMBER|NO)?\s*:?\s*([A-Z]?\d{1,2}[A-Z]?)'
-        ]
-        
-        for pattern in seat_patterns:
-            match = re.search(pattern, text.upper())
-            if match:
-                details['seat'] = match.group(1)
-                break
-        else:
-            details['seat'] = "Not found"
-        
-        # Extract PNR
-        pnr_patterns = [
-            r'PNR:\s*([A-Z0-9]{6})',
-            r'BOOKING\s*REF:\s*([A-Z0-9]{6})',
-        ]
-        
-        for pattern in pnr_patterns:
-            match = re.search(pattern, text.upper())
-            if match:
-                details['pnr'] = match.group(1)
-                break
-        else:
-            details['pnr'] = "Not found"
-        
-        # Determine airline
-        if 'AIR INDIA' in text.upper() or re.search(r'AI\d{3}', text.upper()):
-            details['airline'] = 'Air India'
-        elif 'INDIGO' in text.upper() or re.search(r'6E\d{3}', text.upper()):
-            details['airline'] = 'IndiGo'
-        elif 'VISTARA' in text.upper() or re.search(r'UK\d{3}', text.upper()):
-            details['airline'] = 'Vistara'
-        elif 'SPICEJET' in text.upper() or re.search(r'SG\d{3}', text.upper()):
-            details['airline'] = 'SpiceJet'
-        else:
-            details['airline'] = 'Unknown'
-        
-        return details
-
-    def process_local_images(self):
-        """Process all image files in current directory"""
-        image_extensions = ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.tiff']
-        image_files = []
-        
-        for ext in image_extensions:
-            image_files.extend(glob.glob(ext))
-        
-        if not image_files:
-            print("No image files found in current directory")
-            return []
-        
-        print(f"Found {len(image_files)} image files:")
-        for img in image_files:
-            print(f"  - {img}")
-        
-        all_flight_data = []
-        
-        for image_file in image_files:
-            print(f"\n--- Processing {image_file} ---")
-            flight_data = self.extract_from_image(image_file)
-            if flight_data:
-                all_flight_data.append(flight_data)
-                print("✅ Extraction successful")
-            else:
-                print("❌ Extraction failed")
-        
-        return all_flight_data
-
-    def create_final_report(self, flight_data, filename="final_flight_extraction.xlsx"):
-        """Create final Excel report"""
-        
-        if not flight_data:
-            print("Creating demo data based on working OCR test...")
-            demo_data = [{
-                'passenger_name': 'Venkatesh Kumar',
-                'flight_number': 'AI101',
-                'route': 'DEL → BOM',
-                'date': '25/01/2025',
-                'time': '08:30 AM',
-                'seat': '15A',
-                'pnr': 'ABC123',
-                'airline': 'Air India',
-                'source_file': 'test_boarding_pass.jpg',
-                'extraction_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                'status': 'OCR Test - Successful Extraction'
-            }]
-            flight_data = demo_data
-        
-        # Create DataFrame
-        df = pd.DataFrame(flight_data)
-        
-        # Create comprehensive Excel report
-        with pd.ExcelWriter(filename, engine='openpyxl') as writer:
-            # Main data
-            df.to_excel(writer, sheet_name='Flight Records', index=False)
-            
-            # Summary
-            summary_stats = {
-                'Project Status': [
-                    'OCR Functionality',
-                    'Pattern Matching',
-                    'Excel Export',
-                    'Gmail Integration',
-                    'Image Processing',
-                    'Overall Status'
-                ],
-                'Status': [
-                    'Working ✅',
-                    'Working ✅',
-                    'Working ✅', 
-                    'Working ✅',
-                    'Working ✅',
-                    'COMPLETE ✅'
-                ]
-            }
-            pd.DataFrame(summary_stats).to_excel(writer, sheet_name='Project Status', index=False)
-            
-            # Extraction Results
-            if len(df) > 0:
-                results_stats = {
-                    'Metric': [
-                        'Total Extractions',
-                        'Successful Flight Numbers',
-                        'Successful Routes', 
-                        'Successful Passenger Names',
-                        'Airlines Detected'
-                    ],
-                    'Count': [
-                        len(df),
-                        len(df[df['flight_number'] != 'Not found']),
-                        len(df[df['route'] != 'Not found']),
-                        len(df[df['passenger_name'] != 'Not found']),
-                        len(df['airline'].unique())
-                    ]
-                }
-                pd.DataFrame(results_stats).to_excel(writer, sheet_name='Extraction Stats', index=False)
-        
-        print(f"\n📊 Final report saved: {filename}")
-        print(f"📈 Records processed: {len(df)}")
-        
-        return df
-
-def main():
-    print("🎯 FINAL FLIGHT EXTRACTION SYSTEM")
-    print("=" * 45)
-    print("Direct Image Processing (No PDF conversion needed)")
-    
-    # Initialize extractor
-    extractor = FinalFlightExtractor()
-    
-    print("\n🔍 Looking for boarding pass images in current directory...")
-    print("Supported formats: JPG, JPEG, PNG, BMP, TIFF")
-    
-    # Process all images
-    flight_data = extractor.process_local_images()
-    
-    # Create final report
-    df = extractor.create_final_report(flight_data)
-    
-    print("\n🎉 EXTRACTION COMPLETE!")
-    print("\n📋 FINAL PROJECT STATUS:")
-    print("  ✅ OCR Working (Tesseract)")
-    print("  ✅ Pattern Matching Optimized") 
-    print("  ✅ Gmail Integration Ready")
-    print("  ✅ Excel Reports Generated")
-    print("  ✅ Image Processing Complete")
-    
-    print("\n🏆 YOUR EMAIL DATA EXTRACTION TOOL IS READY!")
-    
-    if len(flight_data) > 0:
-        print(f"Successfully processed {len(flight_data)} boarding pass images")
-    else:
-        print("Ready to process boarding pass images when available")
-
-if __name__ == "__main__":
+# Final Working System - Direct Image Processing, PDFs through their text layer (OCR only when needed)
+
+import pytesseract
+from datetime import datetime
+import os
+import io
+from flight_parser import FIELDS, default_parser
+from ocr_cache import OCRCache, DEFAULT_CACHE_PATH
+from image_preprocess import PreprocessConfig, load_image, preprocess_image
+from ocr_backend import get_backend
+from image_pipeline import ImagePipeline, discover_images
+from pdf_extract import DEFAULT_DPI, PdfTextExtractor, is_pdf
+from bcbp import file_date, read_boarding_pass, zxingcpp
+from ocr_cascade import OCRCascade, canonical_text, default_steps
+from layout_templates import DEFAULT_LAYOUTS_PATH, LayoutReader, TemplateRegistry
+from metrics import metrics, export_run
+from report_sink import StreamingExcelSink, ParquetSink, have_pyarrow
+from record_dedup import DedupIndex
+
+if os.name == 'nt':
+    pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+class FinalFlightExtractor:
+    def __init__(self, email_user=None, email_pass=None, use_cache=True, cache_path=DEFAULT_CACHE_PATH,
+                 preprocess=None, ocr_engine='auto', pdf_dpi=DEFAULT_DPI, pdf_workers=4, barcode_first=True,
+                 cascade=True, layouts_path=DEFAULT_LAYOUTS_PATH):
+        self.email_user = email_user
+        self.email_pass = email_pass
+        self.parser = default_parser
+        self.ocr_config = ''
+        self.ocr_engine = ocr_engine  # resolved per worker - engines don't pickle
+        self.preprocess = preprocess or PreprocessConfig()
+        self.ocr_cache = OCRCache(cache_path) if use_cache else None
+        self.pdf_dpi = pdf_dpi  # scanned PDF pages are rasterized at this DPI
+        self.pdf_workers = pdf_workers
+        self._pdf = None  # one PdfTextExtractor (and its OCR thread pool) for every PDF
+        self.barcode_first = barcode_first  # try the BCBP barcode before OCR (needs zxing-cpp)
+        self.cascade = cascade  # cheap OCR pass first, heavier ones only for missing/unsure fields
+        self.layouts = TemplateRegistry.load(layouts_path)  # airline layouts -> OCR field regions only
+        
+    def __enter__(self):
+        return self
+        
+    def __exit__(self, *exc):
+        self.close()
+        
+    def close(self):
+        """Stop the PDF OCR threads and close the text cache"""
+        if self._pdf is not None:
+            self._pdf.close()
+            self._pdf = None
+        if self.ocr_cache is not None:
+            self.ocr_cache.close()
+        
+    def run_ocr(self, image_bytes):
+        """Preprocess and run Tesseract on raw image bytes"""
+        return self.image_text(self.decode_image(image_bytes))
+        
+    def decode_image(self, image_bytes):
+        """Decoded PIL image (JPEG draft scaling applies)"""
+        with metrics.time('image_decode'):
+            image = load_image(io.BytesIO(image_bytes), self.preprocess)
+            image.load()
+        return image
+        
+    def ocr_image(self, image):
+        """Preprocess and run Tesseract on a PIL image"""
+        with metrics.time('preprocess'):
+            image = preprocess_image(image, self.preprocess)
+        with metrics.time('ocr'):
+            return get_backend(self.ocr_engine).image_to_string(image, config=self.ocr_config)
+        
+    def ocr_cascade(self):
+        # Built per call - backends are per process/thread and don't pickle
+        return OCRCascade(get_backend(self.ocr_engine), self.parser, default_steps(self.preprocess))
+        
+    def layout_fields(self, image):
+        """(airline, {field: (value, confidence)}) from a known layout's regions - (None, {}) otherwise"""
+        if not len(self.layouts):
+            return None, {}
+        template, fields = LayoutReader(self.layouts, get_backend(self.ocr_engine), self.parser).read(image)
+        if template is None:
+            return None, {}
+        print(f"📐 {template.airline} layout '{template.name}': {len(fields)}/{len(template.regions)} fields from regions")
+        return template.airline, fields
+        
+    def image_text(self, image):
+        """Text of a boarding pass image - layout regions first, then the OCR cascade (or one pass) for the rest"""
+        airline, fields = self.layout_fields(image)
+        if self.cascade:
+            return self.ocr_cascade().run(image, fields, airline)
+        seed = canonical_text({field: value for field, (value, _) in fields.items()}, airline) if fields else ""
+        # Region values come first - the parser's labelled patterns win over the page text
+        return seed + self.ocr_image(image)
+        
+    def image_text_config(self):
+        config = f"|layouts={self.layouts.signature()}" if len(self.layouts) else ""
+        config += f"|{self.ocr_cascade().signature()}" if self.cascade else ""
+        # Layout regions and the cascade store parsed fields, not page text - a parser change must miss
+        return config + f"|parser={self.parser.signature()}" if config else ""
+        
+    def ocr_image_bytes(self, image_bytes):
+        """OCR raw image bytes, reusing cached text for images seen before"""
+        return self.cached_text(image_bytes, self.image_text_config(), lambda: self.run_ocr(image_bytes))
+        
+    def pdf_text(self, pdf_bytes):
+        """PDF text - embedded text layer, OCR only for scanned pages (cached per document)"""
+        if self._pdf is None:
+            self._pdf = PdfTextExtractor(self.ocr_image, self.pdf_dpi, workers=self.pdf_workers)
+        pdf = self._pdf
+        return self.cached_text(pdf_bytes, f"|{pdf.signature()}", lambda: pdf.extract(pdf_bytes))
+        
+    def document_text(self, data):
+        """Text of an image or PDF file's bytes"""
+        if is_pdf(data):
+            return self.pdf_text(data)
+        return self.ocr_image_bytes(data)
+        
+    def extract_record(self, data, source_file, source_date=None):
+        """Flight record for an image/PDF file's bytes - boarding pass barcode first, OCR fallback.
+        
+        source_date (email Date header, file mtime) anchors the year of a barcode's flight date.
+        """
+        record, source = self._extract_record(data, source_file, source_date)
+        metrics.inc('flight_records_total', source=source)
+        metrics.count_fields(record, FIELDS + ['airline'], source='document')
+        return record
+        
+    def _extract_record(self, data, source_file, source_date):
+        if is_pdf(data):
+            return self.parse_flight_details(self.pdf_text(data), source_file), 'pdf'
+        if not self.barcode_first or zxingcpp is None:
+            return self.parse_flight_details(self.ocr_image_bytes(data), source_file), 'ocr'
+        
+        image = self.decode_image(data)
+        with metrics.time('barcode'):
+            record = read_boarding_pass(image, source_file, source_date)
+        if record is not None:
+            print(f"📶 Boarding pass barcode decoded: {os.path.basename(source_file)}")
+            return record, 'barcode'
+        
+        # No barcode - OCR the image we already decoded
+        text = self.cached_text(data, self.image_text_config(), lambda: self.image_text(image))
+        return self.parse_flight_details(text, source_file), 'ocr'
+        
+    def cached_text(self, data, extra_config, compute):
+        """compute() unless the cache has text for these bytes + engine + settings"""
+        if self.ocr_cache is None:
+            return compute()
+        
+        backend = get_backend(self.ocr_engine)
+        config = f"{self.ocr_config}|{self.preprocess.signature()}{extra_config}"
+        key = self.ocr_cache.make_key(data, f"{backend.name}-{backend.version()}", config)
+        text = self.ocr_cache.get(key)
+        metrics.inc('flight_ocr_cache_total', result='miss' if text is None else 'hit')
+        if text is None:
+            text = compute()
+            self.ocr_cache.put(key, text)
+        else:
+            print("♻️ OCR cache hit")
+        return text
+        
+    def extract_from_image(self, image_path):
+        """Extract flight data directly from an image or PDF file"""
+        try:
+            print(f"Processing image: {os.path.basename(image_path)}")
+            
+            # Barcode, text layer or OCR (cached by file content)
+            with open(image_path, 'rb') as f:
+                flight_details = self.extract_record(f.read(), image_path, file_date(image_path))
+            print(f"Extracted: {flight_details}")
+            return flight_details
+            
+        except Exception as e:
+            print(f"Error processing image {image_path}: {e}")
+            return None
+
+    def parse_flight_details(self, text, source_file):
+        """Parse flight details from OCR text"""
+        with metrics.time('parse'):
+            return self.parser.parse(text, source_file)
+
+    def process_local_images(self, parallel=False, workers=None):
+        """Process all image files in current directory"""
+        pipeline = ImagePipeline(self, workers if parallel else 1)
+        return list(pipeline.run(discover_images()))
+
+    def create_final_report(self, flight_data, filename="final_flight_extraction.xlsx", parquet_dir=None,
+                            partition_by='extraction_date', demo=True):
+        """Create final Excel report - flight_data can be any iterable, rows are streamed to disk.
+        
+        parquet_dir also writes the records as a partitioned Parquet dataset (needs pyarrow).
+        demo=False leaves an empty report empty instead of adding the demo row.
+        Returns the extraction stats dict (no DataFrame any more - rows aren't kept in memory).
+        """
+        sinks = [StreamingExcelSink(filename)]
+        if parquet_dir and not have_pyarrow():
+            print("⚠️ pyarrow not installed - skipping Parquet output")
+        elif parquet_dir:
+            sinks.append(ParquetSink(parquet_dir, partition_by))
+        sink = sinks[0]
+        
+        try:
+            for record in flight_data:
+                for each in sinks:
+                    each.write(record)
+            
+            if sink.total == 0 and demo:
+                # Demo row goes to the Excel report only - never into the Parquet dataset
+                print("Creating demo data based on working OCR test...")
+                sink.write({
+                    'passenger_name': 'Venkatesh Kumar',
+                    'flight_number': 'AI101',
+                    'route': 'DEL → BOM',
+                    'date': '25/01/2025',
+                    'time': '08:30 AM',
+                    'seat': '15A',
+                    'pnr': 'ABC123',
+                    'airline': 'Air India',
+                    'source_file': 'test_boarding_pass.jpg',
+                    'extraction_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                    'status': 'OCR Test - Successful Extraction'
+                })
+        finally:
+            for each in sinks:
+                each.close()
+        
+        print(f"\n📊 Final report saved: {filename}")
+        if len(sinks) > 1:
+            print(f"🗂️ Parquet dataset saved: {parquet_dir} (partitioned by {partition_by})")
+        print(f"📈 Records processed: {sink.total}")
+        
+        return sink.stats()
+
+def main():
+    print("🎯 FINAL FLIGHT EXTRACTION SYSTEM")
+    print("=" * 45)
+    print("Direct Image Processing (No PDF conversion needed)")
+    
+    # Initialize extractor
+    extractor = FinalFlightExtractor()
+    
+    print("\n🔍 Looking for boarding pass images in current directory...")
+    print("Supported formats: JPG, JPEG, PNG, BMP, TIFF, PDF")
+    
+    # Process all images - records stream straight into the report as they are extracted
+    pipeline = ImagePipeline(extractor)
+    flight_data = pipeline.run(discover_images())
+    
+    # One row per booking - the same pass as image and PDF, or across runs, is merged
+    flight_data = DedupIndex(namespace='document').dedupe(flight_data)
+    
+    # Create final report
+    stats = extractor.create_final_report(flight_data, parquet_dir="flight_records_parquet")
+    extractor.close()
+    export_run()
+    for metric, count in stats.items():
+        print(f"  {metric}: {count}")
+    
+    print("\n🎉 EXTRACTION COMPLETE!")
+    print("\n📋 FINAL PROJECT STATUS:")
+    print("  ✅ OCR Working (Tesseract)")
+    print("  ✅ Pattern Matching Optimized") 
+    print("  ✅ Gmail Integration Ready")
+    print("  ✅ Excel Reports Generated")
+    print("  ✅ Image Processing Complete")
+    
+    print("\n🏆 YOUR EMAIL DATA EXTRACTION TOOL IS READY!")
+    
+    if pipeline.succeeded > 0:
+        print(f"Successfully processed {pipeline.succeeded} boarding pass images")
+    else:
+        print("Ready to process boarding pass images when available")
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
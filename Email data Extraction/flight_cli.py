@@ -0,0 +1,295 @@
+# Command line entry point - ocr / calibrate / mail / ingest / report subcommands, no prompts
+#
+# Only argparse and the stdlib load at startup; each subcommand imports the
+# modules it needs (Tesseract/PIL for ocr, imaplib for mail, openpyxl/pyarrow
+# for report), so `--help` or a mail-only run never pays for OCR imports.
+
+import argparse
+import json
+import os
+import sys
+
+EXIT_OK, EXIT_FAILED, EXIT_USAGE = 0, 1, 2
+
+
+def set_tesseract_cmd(path):
+    if path:
+        import pytesseract
+        pytesseract.pytesseract.tesseract_cmd = path
+
+
+def expand_inputs(inputs):
+    """Files as given, directories expanded to the images/PDFs inside them"""
+    from image_pipeline import discover_images
+    for path in inputs:
+        if os.path.isdir(path):
+            yield from discover_images(path)
+        else:
+            yield path
+
+
+def write_jsonl(records, path):
+    """Pass records through while also saving them one JSON object per line"""
+    with open(path, 'w', encoding='utf-8') as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False, default=str) + '\n')
+            yield record
+
+
+def read_records(path):
+    """Records back from a .jsonl dump or an .xlsx report (first sheet, header row)"""
+    if path.endswith('.jsonl'):
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+        return
+
+    from openpyxl import load_workbook
+    workbook = load_workbook(path, read_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = next(rows, None) or ()
+        for row in rows:
+            record = {key: value for key, value in zip(header, row) if key is not None and value is not None}
+            if record:
+                yield record
+    finally:
+        workbook.close()
+
+
+def cmd_ocr(args):
+    set_tesseract_cmd(args.tesseract_cmd)
+    from final_system import FinalFlightExtractor
+    from image_pipeline import ImagePipeline
+
+    with FinalFlightExtractor(use_cache=not args.no_cache, ocr_engine=args.engine, pdf_dpi=args.pdf_dpi,
+                              barcode_first=not args.no_barcode, cascade=not args.single_pass,
+                              layouts_path=args.layouts) as extractor:
+        pipeline = ImagePipeline(extractor, workers=args.workers)
+        records = pipeline.run(expand_inputs(args.inputs or ['.']))
+        if not args.no_dedup:
+            from record_dedup import DedupIndex
+            records = DedupIndex(args.dedup_db, namespace='document').dedupe(records)
+        if args.jsonl:
+            records = write_jsonl(records, args.jsonl)
+
+        extractor.create_final_report(records, args.output, parquet_dir=args.parquet, partition_by=args.partition_by,
+                                      demo=False)
+    print(f"✅ {pipeline.succeeded} documents extracted, {pipeline.failed} failed")
+    return EXIT_FAILED if pipeline.failed and not pipeline.succeeded else EXIT_OK
+
+
+def cmd_calibrate(args):
+    set_tesseract_cmd(args.tesseract_cmd)
+    from PIL import Image
+    from flight_parser import default_parser
+    from layout_templates import TemplateRegistry, calibrate
+    from ocr_backend import get_backend
+
+    with Image.open(args.sample) as image:
+        try:
+            template = calibrate(image, get_backend(args.engine), default_parser, args.name, args.airline)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return EXIT_FAILED
+    if not template.regions:
+        print("❌ No fields located - use a clean, upright sample")
+        return EXIT_FAILED
+
+    registry = TemplateRegistry.load(args.layouts)
+    registry.register(template)
+    registry.save(args.layouts)
+    print(f"💾 {len(registry)} layouts saved: {args.layouts}")
+    return EXIT_OK
+
+
+def read_password(args):
+    if args.password_file:
+        with open(args.password_file, encoding='utf-8') as f:
+            return f.read().strip()
+    return os.environ.get('FLIGHT_EMAIL_PASSWORD')
+
+
+def cmd_mail(args):
+    password = read_password(args)
+    if not args.user or not password:
+        print("❌ Set --user (or FLIGHT_EMAIL_USER) and FLIGHT_EMAIL_PASSWORD (or --password-file)")
+        return EXIT_USAGE
+
+    from main import EmailFlightExtractor
+    from sync_state import DEFAULT_STATE_PATH, SyncStateStore
+
+    ocr = None
+    if args.ocr_attachments:
+        set_tesseract_cmd(args.tesseract_cmd)
+        from final_system import FinalFlightExtractor
+        ocr = FinalFlightExtractor(ocr_engine=args.engine)
+
+    sync_state = None if args.no_sync else SyncStateStore(args.sync_state or DEFAULT_STATE_PATH)
+    extractor = EmailFlightExtractor(args.user, password, imap_server=args.server, folder=args.folder,
+                                     fetch_mode=args.fetch_mode, sync_state=sync_state, ocr=ocr)
+    if not extractor.connect_to_email():
+        return EXIT_FAILED
+
+    flights = extractor.process_emails(max_emails=args.max_emails)
+    attachments = extractor.attachment_records
+    if not args.no_dedup:
+        from record_dedup import DedupIndex
+        flights = list(DedupIndex(args.dedup_db, namespace='email').dedupe(flights, only_new=not args.overwrite))
+        attachments = list(DedupIndex(args.dedup_db, namespace='attachment').dedupe(attachments))
+    extractor.save_to_excel(flights, args.output, append=not args.overwrite, sample=False)
+    if attachments:
+        ocr.create_final_report(attachments, args.attachments_output, parquet_dir=args.parquet, demo=False)
+    if ocr is not None:
+        ocr.close()
+    print(f"✅ {len(flights)} flight bookings, {len(attachments)} from attachments")
+    return EXIT_OK
+
+
+def read_accounts(path):
+    """Accounts JSON - [{"user", "password" or "password_file", "server", "folders"}, ...]"""
+    with open(path, encoding='utf-8') as f:
+        accounts = json.load(f)
+    for account in accounts:
+        if 'password_file' in account:
+            with open(account.pop('password_file'), encoding='utf-8') as f:
+                account['password'] = f.read().strip()
+        if not account.get('user') or not account.get('password'):
+            raise ValueError(f"account {account.get('user', '?')}: needs user and password/password_file")
+    return accounts
+
+
+def cmd_ingest(args):
+    try:
+        accounts = read_accounts(args.accounts)
+    except (OSError, ValueError) as e:
+        print(f"❌ {e}")
+        return EXIT_USAGE
+
+    from async_ingest import run_ingestion
+    from main import EmailFlightExtractor
+    from sync_state import DEFAULT_STATE_PATH, SyncStateStore
+
+    sync_state = None if args.no_sync else SyncStateStore(args.sync_state or DEFAULT_STATE_PATH)
+    records = run_ingestion(accounts, max_per_server=args.max_per_server, chunk_size=args.chunk_size,
+                            sync_state=sync_state)
+    if not args.no_dedup:
+        from record_dedup import DedupIndex
+        records = list(DedupIndex(args.dedup_db, namespace='ingest').dedupe(records, only_new=not args.overwrite))
+    EmailFlightExtractor(None, None).save_to_excel(records, args.output, append=not args.overwrite, sample=False)
+    return EXIT_OK
+
+
+def cmd_report(args):
+    from report_sink import ParquetSink, StreamingExcelSink, have_pyarrow
+
+    sinks = []
+    if args.output:
+        sinks.append(StreamingExcelSink(args.output))
+    if args.parquet:
+        if not have_pyarrow():
+            print("❌ pyarrow not installed - can't write Parquet")
+            return EXIT_FAILED
+        sinks.append(ParquetSink(args.parquet, args.partition_by))
+    if not sinks:
+        print("❌ Nothing to write - give --output and/or --parquet")
+        return EXIT_USAGE
+
+    total = 0
+    try:
+        for path in args.inputs:
+            for record in read_records(path):
+                for sink in sinks:
+                    sink.write(record)
+                total += 1
+    finally:
+        for sink in sinks:
+            sink.close()
+    print(f"📊 {total} records written")
+    return EXIT_OK
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='flight_cli', description="Flight data extraction from images, PDFs and email")
+    parser.add_argument('--metrics-json', default=os.environ.get('FLIGHT_METRICS_JSON', 'run_metrics.json'),
+                        help="run metrics summary ('' to skip)")
+    parser.add_argument('--metrics-prom', default=os.environ.get('FLIGHT_METRICS_PROM', 'flight_extraction.prom'),
+                        help="Prometheus textfile ('' to skip)")
+    parser.add_argument('--tesseract-cmd', default=os.environ.get('TESSERACT_CMD'),
+                        help="tesseract executable (if not on PATH)")
+    parser.add_argument('--dedup-db', default=os.path.join(os.path.expanduser("~"), ".flight_dedup.sqlite3"),
+                        help="booking index used to merge duplicate records across runs")
+    parser.add_argument('--no-dedup', action='store_true', help="keep every extracted record as its own row")
+    parser.add_argument('--layouts', default=os.path.join(os.path.expanduser("~"), ".flight_layouts.json"),
+                        help="airline layout templates (written by `calibrate`)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ocr = commands.add_parser('ocr', help="extract boarding passes from image/PDF files")
+    ocr.add_argument('inputs', nargs='*', help="files or directories (default: current directory)")
+    ocr.add_argument('--workers', type=int, help="OCR processes (default: CPU count)")
+    ocr.add_argument('--engine', default='auto', help="OCR backend: auto, tesserocr, pytesseract")
+    ocr.add_argument('--no-cache', action='store_true', help="don't read or write the OCR cache")
+    ocr.add_argument('--no-barcode', action='store_true', help="skip BCBP barcode decoding, OCR only")
+    ocr.add_argument('--single-pass', action='store_true', help="one full OCR pass instead of the confidence cascade")
+    ocr.add_argument('--pdf-dpi', type=int, default=300, help="rasterization DPI for scanned PDF pages")
+    ocr.add_argument('-o', '--output', default='final_flight_extraction.xlsx')
+    ocr.add_argument('--parquet', help="also write a partitioned Parquet dataset here")
+    ocr.add_argument('--partition-by', default='extraction_date', choices=['extraction_date', 'airline'])
+    ocr.add_argument('--jsonl', help="also save the raw records as JSON lines (input for `report`)")
+    ocr.set_defaults(func=cmd_ocr)
+
+    layout = commands.add_parser('calibrate', help="learn an airline's boarding pass layout from a sample image")
+    layout.add_argument('sample', help="clean, upright boarding pass image")
+    layout.add_argument('--airline', help="airline name or IATA designator, e.g. IndiGo or 6E (default: detected from the sample)")
+    layout.add_argument('--name', default='default', help="layout name - airlines can have several")
+    layout.add_argument('--engine', default='auto', help="OCR backend: auto, tesserocr, pytesseract")
+    layout.set_defaults(func=cmd_calibrate)
+
+    mail = commands.add_parser('mail', help="extract flight confirmations from an IMAP mailbox")
+    mail.add_argument('--user', default=os.environ.get('FLIGHT_EMAIL_USER'))
+    mail.add_argument('--password-file', help="file holding the app password (default: $FLIGHT_EMAIL_PASSWORD)")
+    mail.add_argument('--server', default='imap.gmail.com')
+    mail.add_argument('--folder', default='inbox')
+    mail.add_argument('--fetch-mode', default='parts', choices=['parts', 'rfc822'])
+    mail.add_argument('--max-emails', type=int)
+    mail.add_argument('--no-sync', action='store_true', help="ignore the saved high-water mark, scan everything")
+    mail.add_argument('--sync-state', help="sync state database path")
+    mail.add_argument('-o', '--output', default='flight_records.xlsx')
+    mail.add_argument('--overwrite', action='store_true', help="replace the report instead of appending")
+    mail.add_argument('--ocr-attachments', action='store_true', help="also OCR image/PDF attachments")
+    mail.add_argument('--engine', default='auto', help="OCR backend for attachments")
+    mail.add_argument('--attachments-output', default='email_attachment_records.xlsx')
+    mail.add_argument('--parquet', help="Parquet dataset for attachment records")
+    mail.set_defaults(func=cmd_mail)
+
+    ingest = commands.add_parser('ingest', help="fetch flight emails from many IMAP accounts concurrently")
+    ingest.add_argument('accounts', help="JSON list of accounts: user, password or password_file, server, folders")
+    ingest.add_argument('--max-per-server', type=int, default=4, help="concurrent connections per IMAP server")
+    ingest.add_argument('--chunk-size', type=int, default=200, help="messages per FETCH")
+    ingest.add_argument('--no-sync', action='store_true', help="ignore the saved high-water marks, scan everything")
+    ingest.add_argument('--sync-state', help="sync state database path")
+    ingest.add_argument('-o', '--output', default='flight_records_accounts.xlsx')
+    ingest.add_argument('--overwrite', action='store_true', help="replace the report instead of appending")
+    ingest.set_defaults(func=cmd_ingest)
+
+    report = commands.add_parser('report', help="convert saved records (.jsonl or .xlsx) to Excel/Parquet")
+    report.add_argument('inputs', nargs='+')
+    report.add_argument('-o', '--output', help="Excel report to write")
+    report.add_argument('--parquet', help="Parquet dataset to write")
+    report.add_argument('--partition-by', default='extraction_date', choices=['extraction_date', 'airline'])
+    report.set_defaults(func=cmd_report)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    status = args.func(args)
+    if args.metrics_json or args.metrics_prom:
+        from metrics import metrics
+        metrics.export(args.metrics_json, args.metrics_prom)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+# Flight details parser - pattern registry compiled once, text normalized once
+
+import hashlib
+import json
+import os
+import re
+from datetime import datetime
+
+from iata_codes import AIRLINE_NAMES, AIRLINES, AIRPORTS
+
+NOT_FOUND = "Not found"
+
+# Output fields in the order they appear in the report
+FIELDS = ['flight_number', 'route', 'passenger_name', 'date', 'time', 'seat', 'pnr']
+
+# Field pattern registry: (field, pattern, guard), highest priority first.
+# Unanchored patterns carry a guard - at least one of its substrings must be
+# in the text before the (slow) pattern is tried at every position.
+# Flight numbers and routes are candidates only - each match is checked
+# against the IATA tables and the first valid one wins.
+FIELD_PATTERNS = [
+    ('flight_number', r'FLIGHT\s*(?:NUMBER|NO\.?)?\s*:?\s*([A-Z0-9]{2})\s?-?\s?(\d{1,4})(?!\d)', None),
+    ('flight_number', r'(?<![A-Z0-9])([A-Z0-9]{2})-?(\d{3,4})(?![\d:])', None),
+    # Spaced ('6E 2134') only right before a route - in prose 'VALID AS 2025' is just two words
+    ('flight_number', r'(?<![A-Z0-9])([A-Z0-9]{2})(?:\s-?\s?|-\s)(\d{3,4})(?=[ \t]+[A-Z]{3}\s*(?:→|-|TO)\s*[A-Z]{3}\b)',
+     None),
+    ('route', r'FROM:\s*([A-Z]{3})\s*TO:\s*([A-Z]{3})\b', None),
+    # Second code in a lookahead so 'XYZ - DEL - BOM' still finds DEL - BOM
+    ('route', r'\b([A-Z]{3})\s*(?:→|-|TO)\s*(?=([A-Z]{3})\b)', ('→', '-', 'TO')),
+    ('passenger_name', r'PASSENGER\s*NAME:\s*([A-Z\s]+?)(?:\s+TERMINAL|\s+FLIGHT|\n)', None),
+    ('passenger_name', r'NAME:\s*([A-Z\s]+?)(?:\s+TERMINAL|\s+FLIGHT|\n)', None),
+    ('date', r'DATE:\s*(\d{1,2}/\d{1,2}/\d{4})', None),
+    ('date', r'(\d{1,2}/\d{1,2}/\d{4})', ('/',)),
+    ('time', r'TIME:\s*(\d{1,2}:\d{2}\s*(?:AM|PM))', None),
+    ('time', r'(\d{1,2}:\d{2}\s*(?:AM|PM))', ('AM', 'PM')),
+    ('seat', r'SEAT:\s*([A-Z]?\d{1,2}[A-Z]?)', None),
+    ('seat', r'SEAT\s*(?:NUMBER|NO)?\s*:?\s*([A-Z]?\d{1,2}[A-Z]?)', None),
+    ('pnr', r'PNR:\s*([A-Z0-9]{6})', None),
+    ('pnr', r'BOOKING\s*REF:\s*([A-Z0-9]{6})', None),
+]
+
+_SPACES = re.compile(r'\s+')
+_WORDS = re.compile(r'[A-Z0-9]+')
+
+
+class FlightDetailsParser:
+    """Reusable flight details parser shared by the OCR and email paths"""
+
+    def __init__(self, field_patterns=FIELD_PATTERNS, airlines=AIRLINES, airports=AIRPORTS,
+                 airline_names=AIRLINE_NAMES):
+        self.registry = {field: [] for field in FIELDS}
+        for field, pattern, guard in field_patterns:
+            self.registry.setdefault(field, []).append((re.compile(pattern), guard))
+
+        self.airlines = airlines
+        self.airports = airports
+        self.airline_names = airline_names
+        self.max_name_words = max((len(words) for words in airline_names), default=0)
+        self.validators = {'flight_number': self.valid_flight_number, 'route': self.valid_route}
+
+        data = json.dumps([field_patterns, sorted(airlines.items()), sorted(airports),
+                           sorted((' '.join(words), code) for words, code in airline_names.items())])
+        self._signature = hashlib.sha1(data.encode('utf-8')).hexdigest()[:12]
+
+    def signature(self):
+        """Changes with any pattern or table - part of the OCR cache key where parsed fields are cached"""
+        return self._signature
+
+    def valid_flight_number(self, match):
+        """'6E', '2134' -> '6E2134' if 6E is a known designator"""
+        designator, number = match.groups()
+        return designator + number if designator in self.airlines else None
+
+    def valid_route(self, match):
+        """Two different codes - known airports at both ends, unless the text says it's a route.
+
+        The bundled table isn't every airport: after an explicit FROM:/TO:
+        label any well-formed pair is taken, and across an arrow one known
+        end is enough ('DEL → IXY'). 'THE → AND' is still not a route.
+        """
+        origin, destination = match.groups()
+        if origin == destination:
+            return None
+        known = (origin in self.airports) + (destination in self.airports)
+        if known == 2 or match.group(0).startswith('FROM:') or (known == 1 and '→' in match.group(0)):
+            return origin, destination
+        return None
+
+    def extract_field(self, field, text):
+        """First (valid) match of a field's patterns in a normalized text, or None"""
+        validate = self.validators.get(field)
+        for regex, guard in self.registry.get(field, ()):
+            if guard and not any(token in text for token in guard):
+                continue
+            if validate is None:
+                match = regex.search(text)
+                if match:
+                    return match.group(1) if regex.groups == 1 else match.groups()
+                continue
+            for match in regex.finditer(text):
+                value = validate(match)
+                if value is not None:
+                    return value
+        return None
+
+    def extract_fields(self, text):
+        """Return {field: value} for an already normalized (upper-case) text"""
+        values = {}
+        for field in self.registry:
+            value = self.extract_field(field, text)
+            if value is not None:
+                values[field] = value
+        return values
+
+    def find_flight_number(self, text):
+        return self.extract_field('flight_number', text)
+
+    def find_route(self, text):
+        return self.extract_field('route', text)
+
+    def detect_airline(self, text, flight_number=None):
+        """Airline from a normalized text - flight number designator, else the first airline name in it"""
+        flight_number = flight_number or self.find_flight_number(text)
+        if flight_number and flight_number[:2] in self.airlines:
+            return self.airlines[flight_number[:2]]
+
+        # Word n-grams against the name table, longest first ('AIR INDIA EXPRESS' before 'AIR INDIA')
+        words = _WORDS.findall(text)
+        for i in range(len(words)):
+            for n in range(min(self.max_name_words, len(words) - i), 0, -1):
+                code = self.airline_names.get(tuple(words[i:i + n]))
+                if code:
+                    return self.airlines[code]
+        return 'Unknown'
+
+    def resolve_airline(self, value):
+        """User-given airline ('indigo', '6e', 'AIR INDIA') -> its name in the airline table, or None"""
+        words = tuple(_WORDS.findall(str(value or '').upper()))
+        if len(words) == 1 and words[0] in self.airlines:
+            return self.airlines[words[0]]
+        code = self.airline_names.get(words)
+        return self.airlines[code] if code else None
+
+    def parse(self, text, source_file):
+        """Parse flight details from OCR/email text"""
+        details = {
+            'source_file': os.path.basename(source_file),
+            'extraction_time': datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+        # Normalize once for every field
+        text = text.upper()
+        values = self.extract_fields(text)
+
+        for field in FIELDS:
+            value = values.get(field)
+            if value is None:
+                details[field] = NOT_FOUND
+            elif field == 'route':
+                details[field] = f"{value[0]} → {value[1]}"
+            elif field == 'passenger_name':
+                name = _SPACES.sub(' ', value.strip())  # Clean multiple spaces
+                name = name.replace('TERMINAL', '').replace('FLIGHT', '').strip()
+                details[field] = name.title()
+            else:
+                details[field] = value
+
+        details['airline'] = self.detect_airline(text, values.get('flight_number'))
+        return details
+
+
+# Shared instance - the registry is compiled once per process
+default_parser = FlightDetailsParser()
+
+
+def parse_flight_details(text, source_file):
+    """Module level shortcut for the default parser"""
+    return default_parser.parse(text, source_file)
@@ -0,0 +1,96 @@
+# HTML email bodies -> plain text in one streaming pass (no DOM, no BeautifulSoup)
+
+import re
+from html.parser import HTMLParser
+
+from metrics import metrics
+
+# Never visible - everything inside is dropped
+SKIP_TAGS = {'script', 'style', 'head', 'title', 'noscript', 'template', 'svg', 'object'}
+# End the current line (layout table rows included - cells stay on one line)
+BLOCK_TAGS = {'p', 'div', 'br', 'tr', 'li', 'ul', 'ol', 'table', 'tbody', 'thead', 'tfoot', 'section',
+              'article', 'header', 'footer', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'hr', 'blockquote', 'center',
+              'pre', 'dl', 'dt', 'dd', 'form', 'address'}
+CELL_TAGS = {'td', 'th'}
+VOID_TAGS = {'br', 'hr', 'img', 'meta', 'link', 'input', 'col', 'area', 'base', 'wbr', 'source'}
+
+_HIDDEN_STYLE = re.compile(r'display\s*:\s*none|visibility\s*:\s*hidden|max-height\s*:\s*0', re.I)
+_SPACES = re.compile(r'[ \t\r\f\v\xa0\u200b-\u200d\u2060\ufeff\u034f]+')  # incl. zero-width preheader padding
+
+# text/plain shorter than this next to an HTML part is a "view in browser" stub
+MIN_PLAIN_TEXT = 200
+
+
+class HTMLTextExtractor(HTMLParser):
+    """Visible text of an HTML document, fed in chunks.
+
+    Scripts, styles and hidden preheaders are skipped, block elements and
+    table rows end a line and cells are joined with ' | ', so a layout
+    table like <tr><td>PNR</td><td>ABC123</td></tr> reads 'PNR | ABC123'.
+    Work and memory are linear in the input - only the text is kept.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self._lines = []
+        self._line = []
+        self._skip_tag = None   # tag whose content is being dropped
+        self._skip_depth = 0
+        self._cells = 0         # cells already on the current line
+
+    def handle_starttag(self, tag, attrs):
+        if self._skip_tag:
+            if tag == self._skip_tag:
+                self._skip_depth += 1
+            return
+        if tag in SKIP_TAGS or (tag not in VOID_TAGS and _HIDDEN_STYLE.search(dict(attrs).get('style') or '')):
+            self._skip_tag, self._skip_depth = tag, 1
+            return
+        if tag in CELL_TAGS:
+            if self._cells:
+                self._line.append(' | ')
+            self._cells += 1
+        elif tag in BLOCK_TAGS:
+            self._newline()
+
+    def handle_endtag(self, tag):
+        if self._skip_tag:
+            if tag == self._skip_tag:
+                self._skip_depth -= 1
+                if not self._skip_depth:
+                    self._skip_tag = None
+            return
+        if tag in BLOCK_TAGS:
+            self._newline()
+
+    def handle_data(self, data):
+        if not self._skip_tag:
+            self._line.append(data)
+
+    def _newline(self):
+        line = _SPACES.sub(' ', ''.join(self._line).replace('\n', ' ')).strip(' |')
+        if line:
+            self._lines.append(line)
+        self._line = []
+        self._cells = 0
+
+    def text(self):
+        self.close()
+        self._newline()
+        return '\n'.join(self._lines)
+
+
+def html_to_text(html, chunk_size=64 * 1024):
+    """Visible text of an HTML string, parsed chunk by chunk"""
+    with metrics.time('html_to_text'):
+        parser = HTMLTextExtractor()
+        for start in range(0, len(html), chunk_size):
+            parser.feed(html[start:start + chunk_size])
+        return parser.text()
+
+
+def best_body(plain, html):
+    """text/plain unless it's missing or a stub next to an HTML part - then the HTML's text"""
+    if html is not None and (plain is None or len(plain.strip()) < MIN_PLAIN_TEXT):
+        return html_to_text(html)
+    return plain or ""
@@ -0,0 +1,73 @@
+# Bundled IATA tables - airline designators and airport codes, indexed once at import
+
+# Designator -> airline (the four original carriers keep their report names)
+AIRLINES = {
+    # India
+    'AI': 'Air India', '6E': 'IndiGo', 'UK': 'Vistara', 'SG': 'SpiceJet', 'IX': 'Air India Express',
+    'I5': 'AIX Connect', 'QP': 'Akasa Air', '9I': 'Alliance Air', 'S5': 'Star Air', 'G8': 'Go First',
+    # Neighbours
+    'UL': 'SriLankan Airlines', 'BG': 'Biman Bangladesh Airlines', 'RA': 'Nepal Airlines',
+    'KB': 'Druk Air', 'PK': 'Pakistan International Airlines', '8M': 'Myanmar Airways International',
+    # Middle East
+    'EK': 'Emirates', 'EY': 'Etihad Airways', 'QR': 'Qatar Airways', 'FZ': 'flydubai', 'G9': 'Air Arabia',
+    'GF': 'Gulf Air', 'WY': 'Oman Air', 'SV': 'Saudia', 'XY': 'flynas', 'KU': 'Kuwait Airways',
+    'J9': 'Jazeera Airways',
+    # Asia / Pacific
+    'SQ': 'Singapore Airlines', 'TR': 'Scoot', 'MH': 'Malaysia Airlines', 'OD': 'Batik Air Malaysia',
+    'AK': 'AirAsia', 'FD': 'Thai AirAsia', 'TG': 'Thai Airways', 'CX': 'Cathay Pacific',
+    'JL': 'Japan Airlines', 'NH': 'All Nippon Airways', 'KE': 'Korean Air', 'OZ': 'Asiana Airlines',
+    'CA': 'Air China', 'MU': 'China Eastern Airlines', 'CZ': 'China Southern Airlines',
+    'VN': 'Vietnam Airlines', 'PR': 'Philippine Airlines', '5J': 'Cebu Pacific', 'GA': 'Garuda Indonesia',
+    'QF': 'Qantas', 'JQ': 'Jetstar', 'VA': 'Virgin Australia', 'NZ': 'Air New Zealand',
+    # Europe
+    'BA': 'British Airways', 'VS': 'Virgin Atlantic', 'LH': 'Lufthansa', 'LX': 'Swiss', 'OS': 'Austrian Airlines',
+    'AF': 'Air France', 'KL': 'KLM', 'TK': 'Turkish Airlines', 'EI': 'Aer Lingus', 'IB': 'Iberia',
+    'AZ': 'ITA Airways', 'SK': 'SAS', 'AY': 'Finnair', 'U2': 'easyJet', 'FR': 'Ryanair', 'W6': 'Wizz Air',
+    # Americas
+    'AA': 'American Airlines', 'UA': 'United Airlines', 'DL': 'Delta Air Lines', 'AC': 'Air Canada',
+    'B6': 'JetBlue', 'WN': 'Southwest Airlines', 'AS': 'Alaska Airlines',
+    # Africa
+    'ET': 'Ethiopian Airlines', 'KQ': 'Kenya Airways', 'SA': 'South African Airways', 'MS': 'EgyptAir',
+}
+
+# Airport code -> city
+AIRPORTS = {
+    # India
+    'DEL': 'Delhi', 'BOM': 'Mumbai', 'NMI': 'Navi Mumbai', 'BLR': 'Bengaluru', 'MAA': 'Chennai',
+    'HYD': 'Hyderabad', 'CCU': 'Kolkata', 'GOI': 'Goa (Dabolim)', 'GOX': 'Goa (Mopa)', 'COK': 'Kochi',
+    'PNQ': 'Pune', 'AMD': 'Ahmedabad', 'TRV': 'Thiruvananthapuram', 'CCJ': 'Kozhikode', 'CNN': 'Kannur',
+    'IXE': 'Mangaluru', 'JAI': 'Jaipur', 'LKO': 'Lucknow', 'PAT': 'Patna', 'GAU': 'Guwahati',
+    'BBI': 'Bhubaneswar', 'IXC': 'Chandigarh', 'SXR': 'Srinagar', 'IXJ': 'Jammu', 'IXL': 'Leh',
+    'ATQ': 'Amritsar', 'VNS': 'Varanasi', 'IXB': 'Bagdogra', 'NAG': 'Nagpur', 'IDR': 'Indore',
+    'BHO': 'Bhopal', 'RPR': 'Raipur', 'VTZ': 'Visakhapatnam', 'VGA': 'Vijayawada', 'TIR': 'Tirupati',
+    'IXM': 'Madurai', 'TRZ': 'Tiruchirappalli', 'CJB': 'Coimbatore', 'IXZ': 'Port Blair', 'IXR': 'Ranchi',
+    'UDR': 'Udaipur', 'JDH': 'Jodhpur', 'STV': 'Surat', 'BDQ': 'Vadodara', 'RAJ': 'Rajkot', 'HSR': 'Rajkot (Hirasar)',
+    'IXA': 'Agartala', 'IMF': 'Imphal', 'DIB': 'Dibrugarh', 'JRH': 'Jorhat', 'IXS': 'Silchar', 'SHL': 'Shillong',
+    'DED': 'Dehradun', 'IXU': 'Aurangabad', 'HBX': 'Hubballi', 'IXG': 'Belagavi', 'GAY': 'Gaya',
+    'JLR': 'Jabalpur', 'GWL': 'Gwalior', 'DHM': 'Dharamshala', 'KNU': 'Kanpur', 'AYJ': 'Ayodhya',
+    'GOP': 'Gorakhpur', 'IXD': 'Prayagraj', 'SAG': 'Shirdi', 'DGH': 'Deoghar', 'ISK': 'Nashik', 'KLH': 'Kolhapur',
+    # Neighbours / Middle East
+    'CMB': 'Colombo', 'MLE': 'Male', 'KTM': 'Kathmandu', 'DAC': 'Dhaka', 'PBH': 'Paro', 'DXB': 'Dubai',
+    'AUH': 'Abu Dhabi', 'SHJ': 'Sharjah', 'DOH': 'Doha', 'MCT': 'Muscat', 'BAH': 'Bahrain', 'KWI': 'Kuwait',
+    'RUH': 'Riyadh', 'JED': 'Jeddah', 'DMM': 'Dammam',
+    # Asia / Pacific
+    'SIN': 'Singapore', 'KUL': 'Kuala Lumpur', 'BKK': 'Bangkok', 'DMK': 'Bangkok (Don Mueang)', 'HKT': 'Phuket',
+    'HKG': 'Hong Kong', 'NRT': 'Tokyo (Narita)', 'HND': 'Tokyo (Haneda)', 'ICN': 'Seoul', 'PEK': 'Beijing',
+    'PVG': 'Shanghai', 'CAN': 'Guangzhou', 'MNL': 'Manila', 'CGK': 'Jakarta', 'DPS': 'Bali',
+    'SGN': 'Ho Chi Minh City', 'HAN': 'Hanoi', 'SYD': 'Sydney', 'MEL': 'Melbourne', 'PER': 'Perth',
+    'AKL': 'Auckland',
+    # Europe
+    'LHR': 'London (Heathrow)', 'LGW': 'London (Gatwick)', 'MAN': 'Manchester', 'BHX': 'Birmingham',
+    'FRA': 'Frankfurt', 'MUC': 'Munich', 'CDG': 'Paris', 'AMS': 'Amsterdam', 'ZRH': 'Zurich', 'VIE': 'Vienna',
+    'IST': 'Istanbul', 'FCO': 'Rome', 'MXP': 'Milan', 'MAD': 'Madrid', 'BCN': 'Barcelona', 'CPH': 'Copenhagen',
+    'HEL': 'Helsinki', 'ARN': 'Stockholm',
+    # Americas / Africa
+    'JFK': 'New York (JFK)', 'EWR': 'Newark', 'ORD': 'Chicago', 'SFO': 'San Francisco', 'LAX': 'Los Angeles',
+    'IAD': 'Washington (Dulles)', 'ATL': 'Atlanta', 'DFW': 'Dallas', 'SEA': 'Seattle', 'BOS': 'Boston',
+    'YYZ': 'Toronto', 'YVR': 'Vancouver', 'NBO': 'Nairobi', 'ADD': 'Addis Ababa', 'JNB': 'Johannesburg',
+    'CAI': 'Cairo',
+}
+
+# Upper-case name as a word tuple -> designator, e.g. ('AIR', 'INDIA', 'EXPRESS') -> 'IX'
+AIRLINE_NAMES = {tuple(name.upper().split()): code for code, name in AIRLINES.items()}
+AIRLINE_NAMES[('AIR', 'ASIA')] = 'AK'
@@ -0,0 +1,159 @@
+# Streaming image pipeline - discover -> load -> OCR -> parse -> sink, every stage overlapped
+
+import glob
+import os
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from bcbp import file_date
+from metrics import metrics
+
+IMAGE_EXTENSIONS = ['*.jpg', '*.jpeg', '*.png', '*.bmp', '*.tiff']
+DOCUMENT_EXTENSIONS = IMAGE_EXTENSIONS + ['*.pdf']
+
+_DONE = object()
+
+
+def discover_images(directory='.', extensions=DOCUMENT_EXTENSIONS):
+    """Yield image paths lazily - nothing is listed up front"""
+    for ext in extensions:
+        yield from glob.iglob(os.path.join(directory, ext))
+
+
+class ImagePipeline:
+    """Bounded, generator-based image extraction.
+
+    A loader thread reads files into a queue of queue_size entries, barcode
+    decoding / OCR + parsing runs in a process pool with at most 2 * workers
+    images in flight, and records are yielded in input order as soon as each
+    is ready. Memory
+    is bounded by queue_size + 2 * workers images however many files there
+    are; throughput is set by the slowest stage.
+    """
+
+    def __init__(self, extractor, workers=None, queue_size=8):
+        self.extractor = extractor
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.succeeded = 0
+        self.failed = 0
+        self.first_record_after = None
+        self.elapsed = 0.0
+
+    def _load(self, paths, loaded, stop):
+        """Loader stage - file bytes into the bounded queue"""
+        try:
+            for path in paths:
+                try:
+                    with open(path, 'rb') as f:
+                        item = (path, f.read(), None)
+                    metrics.inc('flight_bytes_total', len(item[1]), source='file')
+                except OSError as e:
+                    item = (path, None, e)
+                # put() blocks while the queue is full - that's the backpressure
+                while not stop.is_set():
+                    try:
+                        loaded.put(item, timeout=0.1)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+        finally:
+            if not stop.is_set():
+                loaded.put(_DONE)
+
+    def _loaded_items(self, paths, stop):
+        loaded = queue.Queue(maxsize=self.queue_size)
+        loader = threading.Thread(target=self._load, args=(paths, loaded, stop), daemon=True)
+        loader.start()
+        while True:
+            item = loaded.get()
+            if item is _DONE:
+                return
+            yield item
+
+    def _records(self, items):
+        """Extraction stage - (path, record or None, error) in input order"""
+        if self.workers <= 1:
+            for path, image_bytes, error in items:
+                if error is not None:
+                    yield path, None, error
+                    continue
+                try:
+                    yield path, self.extractor.extract_record(image_bytes, path, file_date(path)), None
+                except Exception as e:
+                    yield path, None, e
+            return
+
+        in_flight = deque()
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                 initargs=(self.extractor,)) as executor:
+            for path, image_bytes, error in items:
+                future = None if error is not None else executor.submit(_extract_in_worker, image_bytes, path)
+                in_flight.append((path, future, error))
+                # Window of 2 per worker keeps the pool busy without reading ahead
+                if len(in_flight) >= 2 * self.workers:
+                    yield _collect(*in_flight.popleft())
+            while in_flight:
+                yield _collect(*in_flight.popleft())
+
+    def run(self, paths):
+        """Yield flight records for paths (any iterable) as they are extracted"""
+        start = time.perf_counter()
+        stop = threading.Event()
+        try:
+            for path, record, error in self._records(self._loaded_items(paths, stop)):
+                if error is not None:
+                    print(f"Error processing image {path}: {error}")
+                    print(f"❌ Extraction failed: {path}")
+                    self.failed += 1
+                    continue
+
+                if self.first_record_after is None:
+                    self.first_record_after = time.perf_counter() - start
+                self.succeeded += 1
+                print(f"✅ Extraction successful: {path}")
+                yield record
+        finally:
+            stop.set()
+            self.elapsed = time.perf_counter() - start
+            self.report()
+
+    def report(self):
+        total = self.succeeded + self.failed
+        if not total:
+            print("No image files found")
+            return
+        rate = total / self.elapsed if self.elapsed else 0.0
+        first = f"{self.first_record_after:.2f}s" if self.first_record_after is not None else "n/a"
+        print(f"⏱️ {total} images in {self.elapsed:.2f}s ({rate:.1f}/s), first record after {first}")
+
+
+def _collect(path, future, error):
+    if future is None:
+        return path, None, error
+    try:
+        record, worker_metrics = future.result()
+        metrics.merge(worker_metrics)
+        return path, record, None
+    except Exception as e:  # one bad file (or a crashed worker) only loses that result
+        return path, None, e
+
+
+# Process pool workers - one extractor per worker process
+_worker_extractor = None
+
+
+def _init_worker(extractor):
+    global _worker_extractor
+    _worker_extractor = extractor
+
+
+def _extract_in_worker(image_bytes, path):
+    # Worker timings/counters travel back with the record
+    record = _worker_extractor.extract_record(image_bytes, path, file_date(path))
+    return record, metrics.drain()
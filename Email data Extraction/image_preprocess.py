@@ -0,0 +1,141 @@
+# Image preprocessing before OCR - fewer, cleaner pixels for Tesseract
+
+from PIL import Image, ImageOps
+
+
+class PreprocessConfig:
+    """Settings for the preprocessing stage in front of OCR"""
+
+    def __init__(self, enabled=True, target_dpi=300, assumed_dpi=None, max_side=2000,
+                 grayscale=True, binarize=True, deskew=True, max_skew=5.0, skew_step=0.5,
+                 draft_min_pixels=4_000_000):
+        self.enabled = enabled
+        self.target_dpi = target_dpi        # downscale anything scanned above this
+        self.assumed_dpi = assumed_dpi      # used when the file carries no DPI info
+        self.max_side = max_side            # hard cap on the long side (phone photos)
+        self.grayscale = grayscale
+        self.binarize = binarize
+        self.deskew = deskew
+        self.max_skew = max_skew            # degrees searched either way
+        self.skew_step = skew_step
+        self.draft_min_pixels = draft_min_pixels  # JPEGs above this use draft decoding
+
+    def signature(self):
+        """Stable string for cache keys - different settings give different text"""
+        if not self.enabled:
+            return "raw"
+        return (f"dpi={self.target_dpi},assumed={self.assumed_dpi},max={self.max_side},"
+                f"gray={int(self.grayscale)},bin={int(self.binarize)},"
+                f"deskew={int(self.deskew)}:{self.max_skew}:{self.skew_step},draft={self.draft_min_pixels}")
+
+
+def source_dpi(image, config):
+    """DPI from the file metadata, else the configured assumption"""
+    dpi = image.info.get('dpi')
+    if dpi and dpi[0]:
+        return float(dpi[0])
+    return config.assumed_dpi
+
+
+def target_size(image, config):
+    """Output size after the DPI and long-side limits"""
+    width, height = image.size
+    scale = 1.0
+
+    dpi = source_dpi(image, config)
+    if dpi and config.target_dpi and dpi > config.target_dpi:
+        scale = config.target_dpi / dpi
+
+    if config.max_side and max(width, height) * scale > config.max_side:
+        scale = config.max_side / max(width, height)
+
+    return max(1, int(width * scale)), max(1, int(height * scale))
+
+
+def load_image(fp, config):
+    """Open an image, letting libjpeg decode big photos at reduced scale"""
+    image = Image.open(fp)
+    if not config.enabled:
+        return image
+
+    if image.format == 'JPEG' and image.size[0] * image.size[1] >= config.draft_min_pixels:
+        # draft() picks the smallest 1/2, 1/4, 1/8 scale still >= the requested size
+        mode = 'L' if config.grayscale else image.mode
+        width = image.size[0]
+        dpi = source_dpi(image, config)
+        image.draft(mode, target_size(image, config))
+        if dpi and image.size[0] != width:
+            # Keep the DPI honest so preprocess_image doesn't shrink it twice
+            scaled = dpi * image.size[0] / width
+            image.info['dpi'] = (scaled, scaled)
+    return image
+
+
+def otsu_threshold(image):
+    """Otsu's threshold from a grayscale histogram"""
+    histogram = image.histogram()[:256]
+    total = sum(histogram)
+    sum_all = sum(i * count for i, count in enumerate(histogram))
+
+    sum_bg = 0.0
+    weight_bg = 0
+    best_threshold, best_variance = 127, 0.0
+    for i, count in enumerate(histogram):
+        weight_bg += count
+        if weight_bg == 0:
+            continue
+        weight_fg = total - weight_bg
+        if weight_fg == 0:
+            break
+        sum_bg += i * count
+        mean_bg = sum_bg / weight_bg
+        mean_fg = (sum_all - sum_bg) / weight_fg
+        variance = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+        if variance > best_variance:
+            best_threshold, best_variance = i, variance
+    return best_threshold
+
+
+def estimate_skew(image, config):
+    """Skew angle that maximises the row-profile variance of a small thumbnail"""
+    thumb = image.copy()
+    thumb.thumbnail((600, 600))
+    thumb = ImageOps.invert(thumb)  # text becomes bright, background black
+
+    best_angle, best_score = 0.0, -1.0
+    steps = int(config.max_skew / config.skew_step)
+    for step in range(-steps, steps + 1):
+        angle = step * config.skew_step
+        rotated = thumb.rotate(angle, resample=Image.BILINEAR, fillcolor=0)
+        # Resizing to one column averages every row - a cheap projection profile
+        profile = list(rotated.resize((1, rotated.size[1]), Image.BOX).getdata())
+        mean = sum(profile) / len(profile)
+        score = sum((value - mean) ** 2 for value in profile)
+        if score > best_score:
+            best_angle, best_score = angle, score
+    return best_angle
+
+
+def preprocess_image(image, config):
+    """Downscale, grayscale, deskew and binarize an image for OCR"""
+    if not config.enabled:
+        return image
+
+    image = ImageOps.exif_transpose(image)
+
+    size = target_size(image, config)
+    if config.grayscale and image.mode != 'L':
+        image = image.convert('L')
+    if size != image.size:
+        image = image.resize(size, Image.LANCZOS)
+
+    if config.deskew and image.mode == 'L':
+        angle = estimate_skew(image, config)
+        if angle:
+            image = image.rotate(angle, resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+    if config.binarize and image.mode == 'L':
+        threshold = otsu_threshold(image)
+        image = image.point(lambda value: 255 if value > threshold else 0, mode='1')
+
+    return image
@@ -0,0 +1,394 @@
+# Batched IMAP UID fetching - one round trip per chunk instead of per message
+
+import base64
+import quopri
+import re
+
+from html_text import MIN_PLAIN_TEXT, html_to_text
+from metrics import metrics
+
+DEFAULT_CHUNK_SIZE = 200
+SLICE_SIZE = 1024 * 1024          # messages bigger than this are fetched in <offset.length> slices
+BATCH_BYTES = 8 * 1024 * 1024     # cap on the raw bytes one batched FETCH of small messages returns
+
+_UID = re.compile(rb'UID (\d+)')
+_SIZE = re.compile(rb'RFC822\.SIZE (\d+)')
+_MESSAGE_START = re.compile(rb'\d+ \(')
+_LITERAL_ITEM = re.compile(rb'([A-Z0-9.]+(?:\[[^\]]*\])?(?:<\d+>)?) \{\d+\}$')
+
+
+def uid_search(mail, criteria, start_uid=1):
+    """UID SEARCH - returns UIDs as ints, sorted ascending.
+
+    start_uid > 1 limits the search to new mail (UID start:*). 'n:*' always
+    includes the highest UID even when it is below n, so filter it out.
+    """
+    if start_uid > 1:
+        criteria = f'UID {start_uid}:* {criteria}'
+    with metrics.time('imap_search'):
+        status, data = mail.uid('SEARCH', None, criteria)
+    if status != 'OK' or not data or not data[0]:
+        return []
+    return sorted(uid for uid in (int(uid) for uid in data[0].split()) if uid >= start_uid)
+
+
+def subject_search(mail, keywords):
+    """One SEARCH matching any keyword in the Subject.
+
+    Gmail gets an X-GM-RAW query, other servers a nested OR:
+    OR OR SUBJECT "a" SUBJECT "b" SUBJECT "c".
+    """
+    if 'X-GM-EXT-1' in getattr(mail, 'capabilities', ()):
+        # Gmail search syntax matches whole words, which is what we want here
+        return f'X-GM-RAW "subject:({" OR ".join(keywords)})"'
+    return 'OR ' * (len(keywords) - 1) + ' '.join(f'SUBJECT "{keyword}"' for keyword in keywords)
+
+
+def matched_keywords(subject, keywords):
+    """Which keywords a Subject contains - same case-insensitive substring test as SEARCH SUBJECT"""
+    subject = subject.lower()
+    return [keyword for keyword in keywords if keyword.lower() in subject]
+
+
+def get_uidvalidity(mail, folder):
+    """UIDVALIDITY of the selected folder - from the SELECT response, else STATUS"""
+    typ, data = mail.response('UIDVALIDITY')
+    if data and data[-1]:
+        return int(data[-1])
+    status, data = mail.status(folder, '(UIDVALIDITY)')
+    match = re.search(rb'UIDVALIDITY (\d+)', data[0] or b'')
+    return int(match.group(1)) if match else 0
+
+
+def compress_uid_set(uids):
+    """[1, 2, 3, 7, 9, 10] -> '1:3,7,9:10' (keeps FETCH commands short)"""
+    ranges = []
+    start = prev = None
+    for uid in sorted(uids):
+        if start is None:
+            start = prev = uid
+        elif uid == prev + 1:
+            prev = uid
+        else:
+            ranges.append(f"{start}:{prev}" if start != prev else str(start))
+            start = prev = uid
+    if start is not None:
+        ranges.append(f"{start}:{prev}" if start != prev else str(start))
+    return ','.join(ranges)
+
+
+def chunked(items, size):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def parse_fetch_response(data):
+    """Split an imaplib FETCH response into [(uid, {item: bytes}, meta)].
+
+    Each response line ending in a literal arrives as a (prefix, literal)
+    tuple - one per literal item such as RFC822 or BODY[1] - and the line
+    is finished by a plain bytes item. meta keeps the non-literal text
+    (UID, FLAGS, BODYSTRUCTURE...), with any other literals inlined as
+    quoted strings.
+    """
+    messages = []
+    current = None
+
+    for item in data:
+        prefix = item[0] if isinstance(item, tuple) else item
+        if not prefix:
+            continue
+
+        if current is None:
+            current = {'items': {}, 'meta': b''}
+            messages.append(current)
+            if _MESSAGE_START.match(prefix):
+                prefix = prefix.split(b' (', 1)[1]
+
+        if isinstance(item, tuple):
+            literal = item[1]
+            match = _LITERAL_ITEM.search(prefix)
+            if match:
+                current['items'][match.group(1).decode()] = literal
+                current['meta'] += prefix[:match.start()]
+            else:
+                current['meta'] += prefix[:prefix.rfind(b'{')] + _quote(literal)
+        else:
+            # A bare bytes item ends the response line, and so the message
+            current['meta'] += prefix
+            current = None
+
+    results = []
+    for message in messages:
+        match = _UID.search(message['meta'])
+        uid = int(match.group(1)) if match else None
+        results.append((uid, message['items'], message['meta']))
+    return results
+
+
+def _quote(literal):
+    return b'"' + literal.replace(b'\\', b'\\\\').replace(b'"', b'\\"') + b'"'
+
+
+def fetch_batched(mail, uids, query='(RFC822)', chunk_size=DEFAULT_CHUNK_SIZE):
+    """Yield (uid, {item: bytes}, meta) for every UID, chunk_size messages per FETCH"""
+    uids = sorted(uids)
+    if 'UID' not in query:
+        query = '(UID ' + query[1:-1] + ')'
+
+    for chunk in chunked(uids, chunk_size):
+        with metrics.time('imap_fetch'):
+            status, data = mail.uid('FETCH', compress_uid_set(chunk), query)
+        if status != 'OK':
+            print(f"❌ FETCH failed for {len(chunk)} messages: {data}")
+            continue
+        metrics.inc('flight_bytes_total', sum(len(item[1]) for item in data if isinstance(item, tuple)),
+                    source='imap')
+        yield from parse_fetch_response(data)
+
+
+# --- BODYSTRUCTURE: fetch only the parts we need ------------------------------
+
+HEADER_QUERY = 'BODY.PEEK[HEADER.FIELDS (SUBJECT FROM DATE MESSAGE-ID)]'
+
+_SEXP_TOKEN = re.compile(rb'\(|\)|"(?:[^"\\]|\\.)*"|[^\s()"]+')
+
+
+def _parse_sexp(text, start):
+    """Parse one parenthesized IMAP list starting at text[start] == '('"""
+    stack = [[]]
+    for match in _SEXP_TOKEN.finditer(text, start):
+        token = match.group()
+        if token == b'(':
+            stack.append([])
+        elif token == b')':
+            done = stack.pop()
+            stack[-1].append(done)
+            if len(stack) == 1:
+                return stack[0][0]
+        elif token.startswith(b'"'):
+            stack[-1].append(re.sub(rb'\\(.)', rb'\1', token[1:-1]).decode(errors='ignore'))
+        elif token.upper() == b'NIL':
+            stack[-1].append(None)
+        else:
+            stack[-1].append(token.decode(errors='ignore'))
+    raise ValueError("Unbalanced BODYSTRUCTURE")
+
+
+def parse_bodystructure(meta):
+    """BODYSTRUCTURE from a FETCH meta string as nested lists, or None"""
+    index = meta.find(b'BODYSTRUCTURE (')
+    if index < 0:
+        return None
+    return _parse_sexp(meta, index + len(b'BODYSTRUCTURE '))
+
+
+def _params(value):
+    """('CHARSET' 'utf-8' ...) -> {'charset': 'utf-8'}"""
+    if not isinstance(value, list):
+        return {}
+    return {str(k).lower(): v for k, v in zip(value[::2], value[1::2])}
+
+
+def walk_parts(structure, section=''):
+    """Flatten a BODYSTRUCTURE into leaf parts with their FETCH section numbers"""
+    if isinstance(structure[0], list):
+        # multipart: (part)(part)... subtype [params disposition ...]
+        for number, child in enumerate(structure, 1):
+            if not isinstance(child, list):
+                break
+            yield from walk_parts(child, f"{section}.{number}" if section else str(number))
+        return
+
+    main_type = (structure[0] or '').lower()
+    sub_type = (structure[1] or '').lower()
+    # Disposition follows the body MD5: basic parts have 7 fields (MD5 at 7), text adds
+    # the line count (MD5 at 8), message/rfc822 adds envelope, body and line count (MD5 at 10)
+    index = 9 if main_type == 'text' else 8
+    if main_type == 'message' and sub_type == 'rfc822':
+        index = 11
+    disposition = structure[index] if len(structure) > index else None
+
+    disposition_type = None
+    filename = None
+    if isinstance(disposition, list) and disposition:
+        disposition_type = (disposition[0] or '').lower()
+        filename = _params(disposition[1] if len(disposition) > 1 else None).get('filename')
+    params = _params(structure[2])
+
+    yield {
+        'section': section or '1',
+        'content_type': f"{main_type}/{sub_type}",
+        'charset': params.get('charset') or 'utf-8',
+        'encoding': (structure[5] or '7bit').lower(),
+        'size': int(structure[6]) if str(structure[6]).isdigit() else 0,
+        'disposition': disposition_type,
+        'filename': filename or params.get('name'),
+    }
+
+
+def is_attachment(part):
+    return part['disposition'] == 'attachment' or (
+        part['filename'] is not None and not part['content_type'].startswith('text/'))
+
+
+# Smaller images are logos, icons and tracking pixels, not boarding passes
+MIN_IMAGE_SIZE = 4096
+
+
+def is_image_attachment(part, min_size=MIN_IMAGE_SIZE):
+    """Image parts (attached or inline) big enough to be a boarding pass or e-ticket"""
+    return part['content_type'].startswith('image/') and part['size'] >= min_size
+
+
+def is_ticket_attachment(part, min_size=MIN_IMAGE_SIZE):
+    """Boarding pass images and PDF e-tickets"""
+    return is_image_attachment(part, min_size) or part['content_type'] == 'application/pdf'
+
+
+def select_text_part(parts):
+    """Inline text/plain part, or text/html when there's no plain part or only a stub - same choice as the RFC822 path"""
+    plain = html = None
+    for part in parts:
+        if is_attachment(part):
+            continue
+        if part['content_type'] == 'text/plain' and plain is None:
+            plain = part
+        elif part['content_type'] == 'text/html' and html is None:
+            html = part
+    if html is not None and (plain is None or plain['size'] < MIN_PLAIN_TEXT):
+        return html
+    return plain
+
+
+def decode_part(payload, part):
+    """Undo the transfer encoding of a fetched part (bytes out)"""
+    if part['encoding'] == 'base64':
+        return base64.b64decode(payload)
+    if part['encoding'] == 'quoted-printable':
+        return quopri.decodestring(payload)
+    return payload
+
+
+def part_text(payload, part):
+    try:
+        text = decode_part(payload, part).decode(part['charset'], errors='ignore')
+    except LookupError:  # unknown charset label
+        text = decode_part(payload, part).decode('utf-8', errors='ignore')
+    return html_to_text(text) if part['content_type'] == 'text/html' else text
+
+
+def fetch_section(mail, uids, section, chunk_size=DEFAULT_CHUNK_SIZE):
+    """{uid: bytes} for BODY.PEEK[section] of each UID (doesn't set \\Seen)"""
+    results = {}
+    for uid, items, meta in fetch_batched(mail, uids, f'(BODY.PEEK[{section}])', chunk_size):
+        if uid is not None and f'BODY[{section}]' in items:
+            results[uid] = items[f'BODY[{section}]']
+    return results
+
+
+def fetch_message_parts(mail, uids, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Headers + the text part only - attachments stay on the server.
+
+    Two rounds per chunk: BODYSTRUCTURE with the headers, then one
+    BODY.PEEK[section] FETCH per distinct text section. Yields dicts with
+    uid, header (bytes), parts, text_part and text (str).
+    """
+    for chunk in chunked(sorted(uids), chunk_size):
+        messages = []
+        for uid, items, meta in fetch_batched(mail, chunk, f'(BODYSTRUCTURE {HEADER_QUERY})', chunk_size):
+            structure = parse_bodystructure(meta)
+            if uid is None or structure is None:
+                continue
+            header = next((value for key, value in items.items() if key.startswith('BODY[HEADER')), b'')
+            parts = list(walk_parts(structure))
+            messages.append({'uid': uid, 'header': header, 'parts': parts,
+                             'text_part': select_text_part(parts), 'text': ''})
+
+        # Group by section so most chunks need a single extra FETCH
+        by_section = {}
+        for message in messages:
+            if message['text_part']:
+                by_section.setdefault(message['text_part']['section'], []).append(message)
+
+        for section, group in by_section.items():
+            payloads = fetch_section(mail, [m['uid'] for m in group], section, chunk_size)
+            for message in group:
+                if message['uid'] in payloads:
+                    message['text'] = part_text(payloads[message['uid']], message['text_part'])
+
+        yield from messages
+
+
+def fetch_attachments(mail, uid, parts, predicate=is_attachment):
+    """Fetch (part, decoded bytes) for the attachments an OCR stage asks for - one FETCH per message"""
+    wanted = [part for part in parts if predicate(part)]
+    if not wanted:
+        return
+    query = '(' + ' '.join(f"BODY.PEEK[{part['section']}]" for part in wanted) + ')'
+    for _, items, _ in fetch_batched(mail, [uid], query):
+        for part in wanted:
+            # pop - the encoded literal is released as soon as it is decoded
+            payload = items.pop(f"BODY[{part['section']}]", None)
+            if payload is not None:
+                yield part, decode_part(payload, part)
+
+
+# --- Streaming: whole messages as a sequence of slices -----------------------
+
+def message_sizes(mail, uids, chunk_size=DEFAULT_CHUNK_SIZE):
+    """{uid: RFC822.SIZE} - one small FETCH per chunk"""
+    sizes = {}
+    for uid, items, meta in fetch_batched(mail, uids, '(RFC822.SIZE)', chunk_size):
+        match = _SIZE.search(meta)
+        if uid is not None and match:
+            sizes[uid] = int(match.group(1))
+    return sizes
+
+
+def _message_slices(mail, uid, slice_size):
+    """BODY.PEEK[]<offset.length> until a short slice - RFC822.SIZE is only a hint"""
+    offset = 0
+    while True:
+        data = None
+        for _, items, _ in fetch_batched(mail, [uid], f'(BODY.PEEK[]<{offset}.{slice_size}>)'):
+            data = items.get(f'BODY[]<{offset}>')
+        if not data:
+            return
+        yield data
+        if len(data) < slice_size:
+            return
+        offset += len(data)
+
+
+def fetch_streamed(mail, uids, chunk_size=DEFAULT_CHUNK_SIZE, slice_size=SLICE_SIZE, batch_bytes=BATCH_BYTES):
+    """Yield (uid, chunks) - each raw message as an iterator of byte slices, in UID order.
+
+    Small messages are still fetched chunk_size at a time (at most
+    batch_bytes per FETCH); anything over slice_size is fetched on its
+    own, one slice per FETCH, while the caller consumes it - so a 30 MB
+    message never sits in memory whole. Consume each message's chunks
+    before moving on to the next. BODY.PEEK doesn't set \\Seen.
+    """
+    sizes = message_sizes(mail, uids, chunk_size)
+    batch, batch_size = [], 0
+
+    def flush(batch):
+        for uid, items, _ in fetch_batched(mail, batch, '(BODY.PEEK[])', chunk_size):
+            data = items.pop('BODY[]', None)
+            if uid is not None and data is not None:
+                yield uid, iter([data])
+
+    for uid in sorted(sizes):
+        size = sizes[uid]
+        if size > slice_size:
+            yield from flush(batch)
+            batch, batch_size = [], 0
+            yield uid, _message_slices(mail, uid, slice_size)
+            continue
+        if batch and (len(batch) >= chunk_size or batch_size + size > batch_bytes):
+            yield from flush(batch)
+            batch, batch_size = [], 0
+        batch.append(uid)
+        batch_size += size
+    yield from flush(batch)
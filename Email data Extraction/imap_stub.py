@@ -0,0 +1,291 @@
+# Local IMAP stand-in - speaks imaplib's response shapes without a server
+
+import email
+import re
+from email.header import decode_header, make_header
+
+_FETCH_ITEM = re.compile(r'BODY(?:\.PEEK)?\[[^\]]*\](?:<\d+\.\d+>)?|BODYSTRUCTURE|RFC822\.SIZE|RFC822|UID|FLAGS')
+_PARTIAL = re.compile(r'<(\d+)\.(\d+)>$')
+
+
+def _tokenize(criteria):
+    """Split a SEARCH string into atoms, quoted strings and parens"""
+    return re.findall(r'\(|\)|"(?:[^"\\]|\\.)*"|[^\s()]+', criteria)
+
+
+def _parse_uid_set(text, max_uid):
+    uids = set()
+    for part in text.split(','):
+        if ':' in part:
+            start, end = part.split(':')
+            start = max_uid if start == '*' else int(start)
+            end = max_uid if end == '*' else int(end)
+            uids.update(range(min(start, end), max(start, end) + 1))
+        else:
+            uids.add(max_uid if part == '*' else int(part))
+    return uids
+
+
+class FakeIMAP4:
+    """In-memory mailbox with the imaplib.IMAP4 methods the extractors use.
+
+    Every command is recorded in self.calls so callers can count round trips.
+    """
+
+    def __init__(self, host='localhost', port=993, messages=None):
+        self.host = host
+        self.capabilities = ('IMAP4REV1', 'UIDPLUS')
+        self.mailboxes = {'INBOX': {}}
+        self.uidvalidity = {'INBOX': 1}
+        self.selected = None
+        self.untagged = {}
+        self.calls = []
+        self.next_uid = 1
+        for raw in messages or []:
+            self.append('INBOX', raw)
+
+    def append(self, mailbox, raw):
+        """Add a message (bytes) and return its UID"""
+        uid = self.next_uid
+        self.next_uid += 1
+        self.mailboxes.setdefault(mailbox.upper(), {})[uid] = raw
+        self.uidvalidity.setdefault(mailbox.upper(), 1)
+        return uid
+
+    def renumber(self, mailbox='INBOX'):
+        """Simulate a server rebuild - new UIDVALIDITY, UIDs reassigned"""
+        name = mailbox.upper()
+        messages = [raw for uid, raw in sorted(self.mailboxes[name].items())]
+        self.mailboxes[name] = {}
+        self.uidvalidity[name] += 1
+        for raw in messages:
+            self.append(name, raw)
+
+    def _messages(self):
+        return self.mailboxes[self.selected]
+
+    # --- imaplib.IMAP4 API -------------------------------------------------
+
+    def login(self, user, password):
+        self.calls.append(('LOGIN', user))
+        return 'OK', [b'LOGIN completed']
+
+    def select(self, mailbox='INBOX', readonly=False):
+        self.calls.append(('SELECT', mailbox))
+        name = mailbox.strip('"').upper()
+        if name not in self.mailboxes:
+            return 'NO', [b'Mailbox does not exist']
+        self.selected = name
+        self.untagged['UIDVALIDITY'] = [str(self.uidvalidity[name]).encode()]
+        return 'OK', [str(len(self._messages())).encode()]
+
+    def response(self, code):
+        return code, self.untagged.pop(code.upper(), [None])
+
+    def status(self, mailbox, names):
+        self.calls.append(('STATUS', mailbox, names))
+        name = mailbox.strip('"').upper()
+        if name not in self.mailboxes:
+            return 'NO', [b'Mailbox does not exist']
+        uidnext = max(self.mailboxes[name], default=0) + 1
+        return 'OK', [f'"{mailbox}" (MESSAGES {len(self.mailboxes[name])} UIDNEXT {uidnext} '
+                      f'UIDVALIDITY {self.uidvalidity[name]})'.encode()]
+
+    def search(self, charset, *criteria):
+        self.calls.append(('SEARCH',) + criteria)
+        uids = sorted(self._messages())
+        matched = self._search(' '.join(criteria))
+        seqs = [str(uids.index(uid) + 1) for uid in sorted(matched)]
+        return 'OK', [' '.join(seqs).encode()]
+
+    def fetch(self, message_set, message_parts):
+        self.calls.append(('FETCH', message_set, message_parts))
+        uids = sorted(self._messages())
+        if isinstance(message_set, bytes):
+            message_set = message_set.decode()
+        seqs = _parse_uid_set(message_set, len(uids))
+        return 'OK', self._fetch([uids[seq - 1] for seq in sorted(seqs) if seq <= len(uids)],
+                                 message_parts, include_uid=False)
+
+    def uid(self, command, *args):
+        command = command.upper()
+        self.calls.append(('UID ' + command,) + args)
+        if command == 'SEARCH':
+            matched = self._search(' '.join(a for a in args if a))
+            return 'OK', [' '.join(str(uid) for uid in sorted(matched)).encode()]
+        if command == 'FETCH':
+            message_set, message_parts = args
+            uids = _parse_uid_set(message_set, max(self._messages(), default=0))
+            existing = sorted(uid for uid in uids if uid in self._messages())
+            return 'OK', self._fetch(existing, message_parts, include_uid=True)
+        return 'BAD', [f'Unsupported UID command {command}'.encode()]
+
+    def noop(self):
+        self.calls.append(('NOOP',))
+        return 'OK', [b'NOOP completed']
+
+    def close(self):
+        self.calls.append(('CLOSE',))
+        self.selected = None
+        return 'OK', [b'CLOSE completed']
+
+    def logout(self):
+        self.calls.append(('LOGOUT',))
+        return 'BYE', [b'LOGOUT completed']
+
+    # --- helpers ------------------------------------------------------------
+
+    def _search(self, criteria):
+        tokens = _tokenize(criteria)
+        matched = set()
+        for uid, raw in self._messages().items():
+            position = [0]
+            result = True
+            while position[0] < len(tokens):
+                # Top-level keys are ANDed - always evaluate to consume tokens
+                result = self._match(tokens, position, uid, raw) and result
+            if result:
+                matched.add(uid)
+        return matched
+
+    def _match(self, tokens, position, uid, raw):
+        """Evaluate one search key at tokens[position] against a message"""
+        token = tokens[position[0]]
+        position[0] += 1
+        key = token.upper()
+
+        if key == '(':
+            result = True
+            while tokens[position[0]] != ')':
+                result = self._match(tokens, position, uid, raw) and result
+            position[0] += 1
+            return result
+        if key == 'ALL':
+            return True
+        if key == 'OR':
+            left = self._match(tokens, position, uid, raw)
+            right = self._match(tokens, position, uid, raw)
+            return left or right
+        if key == 'NOT':
+            return not self._match(tokens, position, uid, raw)
+        if key in ('SUBJECT', 'FROM', 'TO', 'BODY', 'TEXT'):
+            needle = tokens[position[0]].strip('"').lower()
+            position[0] += 1
+            return needle in self._field(raw, key).lower()
+        if key == 'UID':
+            uid_set = tokens[position[0]]
+            position[0] += 1
+            return uid in _parse_uid_set(uid_set, max(self._messages()))
+        raise ValueError(f"FakeIMAP4 can't evaluate search key {token}")
+
+    @staticmethod
+    def _field(raw, key):
+        msg = email.message_from_bytes(raw)
+        if key in ('SUBJECT', 'FROM', 'TO'):
+            return str(make_header(decode_header(msg.get(key, ''))))
+        text = raw.decode(errors='ignore')
+        return text if key == 'TEXT' else text.split('\n\n', 1)[-1]
+
+    def _fetch(self, uids, message_parts, include_uid):
+        uids_list = sorted(self._messages())
+        wanted = _FETCH_ITEM.findall(message_parts.upper())
+        response = []
+        for uid in uids:
+            raw = self._messages()[uid]
+            seq = uids_list.index(uid) + 1
+            text = f'{seq} ('
+            if include_uid or 'UID' in wanted:
+                text += f'UID {uid} '
+
+            literals = []
+            for item in wanted:
+                if item == 'BODYSTRUCTURE':
+                    text += f'BODYSTRUCTURE {_bodystructure(email.message_from_bytes(raw))} '
+                elif item == 'RFC822.SIZE':
+                    text += f'RFC822.SIZE {len(raw)} '
+                elif _PARTIAL.search(item):
+                    # BODY.PEEK[]<offset.length> - the response names only the offset
+                    partial = _PARTIAL.search(item)
+                    offset, length = int(partial.group(1)), int(partial.group(2))
+                    section = item[item.index('[') + 1:item.index(']')]
+                    body = raw if not section else _section(raw, section)
+                    literals.append((f'BODY[{section}]<{offset}>', body[offset:offset + length]))
+                elif item in ('RFC822', 'BODY[]', 'BODY.PEEK[]'):
+                    literals.append(('RFC822' if item == 'RFC822' else 'BODY[]', raw))
+                elif item.startswith('BODY'):
+                    section = item[item.index('[') + 1:-1]
+                    literals.append((f'BODY[{section}]', _section(raw, section)))
+
+            if not literals:
+                response.append((text.rstrip() + ')').encode())
+                continue
+            for i, (name, literal) in enumerate(literals):
+                line = (text if i == 0 else ' ') + f'{name} {{{len(literal)}}}'
+                response.append((line.encode(), literal))
+            response.append(b')')
+        return response
+
+
+def _quoted(value):
+    return 'NIL' if value is None else '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def _param_list(pairs):
+    pairs = [(k, v) for k, v in pairs if v is not None]
+    if not pairs:
+        return 'NIL'
+    return '(' + ' '.join(f'{_quoted(k.upper())} {_quoted(v)}' for k, v in pairs) + ')'
+
+
+def _bodystructure(part):
+    """RFC 3501 BODYSTRUCTURE for a parsed message (basic + extension fields)"""
+    if part.is_multipart():
+        children = ''.join(_bodystructure(child) for child in part.get_payload())
+        boundary = _param_list([('boundary', part.get_boundary())])
+        return f'({children} {_quoted(part.get_content_subtype().upper())} {boundary} NIL NIL NIL)'
+
+    body = _part_body(part)
+    params = _param_list([(k, v) for k, v in part.get_params()[1:]] if part.get_params() else [])
+    encoding = _quoted((part.get('Content-Transfer-Encoding') or '7bit').upper())
+    fields = (f'{_quoted(part.get_content_maintype().upper())} {_quoted(part.get_content_subtype().upper())} '
+              f'{params} NIL NIL {encoding} {len(body)}')
+    if part.get_content_maintype() == 'text':
+        fields += ' ' + str(body.count(b'\n'))
+
+    disposition = 'NIL'
+    if part.get_content_disposition():
+        filename = _param_list([('filename', part.get_filename())])
+        disposition = f'({_quoted(part.get_content_disposition().upper())} {filename})'
+    return f'({fields} NIL {disposition} NIL NIL)'
+
+
+def _part_body(part):
+    """Body of a leaf part exactly as on the wire (still transfer-encoded)"""
+    payload = part.get_payload()
+    if isinstance(payload, str):
+        return payload.encode('utf-8', errors='surrogateescape')
+    return part.as_bytes().split(b'\n\n', 1)[-1]
+
+
+def _section(raw, section):
+    """BODY[section] - HEADER, HEADER.FIELDS (...), TEXT or a part number"""
+    msg = email.message_from_bytes(raw)
+    head, _, body = raw.replace(b'\r\n', b'\n').partition(b'\n\n')
+    upper = section.upper()
+
+    if upper == 'HEADER':
+        return head + b'\n\n'
+    if upper.startswith('HEADER.FIELDS'):
+        names = upper[upper.index('(') + 1:upper.index(')')].split()
+        lines = [f'{name.title()}: {msg[name]}' for name in names if msg[name] is not None]
+        return ('\r\n'.join(lines) + '\r\n\r\n').encode()
+    if upper == 'TEXT':
+        return body
+
+    part = msg
+    for number in section.split('.'):
+        if part.is_multipart():
+            part = part.get_payload()[int(number) - 1]
+        elif number != '1':
+            return b''
+    return _part_body(part)
@@ -0,0 +1,222 @@
+# Per-airline boarding pass layouts - OCR a few small field regions instead of the whole page
+
+import hashlib
+import json
+import os
+import re
+
+from PIL import Image, ImageOps
+
+from image_preprocess import PreprocessConfig, otsu_threshold, preprocess_image
+from metrics import metrics
+
+DEFAULT_LAYOUTS_PATH = os.path.join(os.path.expanduser("~"), ".flight_layouts.json")
+
+# Per field: (Tesseract whitelist, value pattern in the region's text)
+FIELD_RULES = {
+    'flight_number': ('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-', None),  # validated by the parser's IATA check
+    'route': ('ABCDEFGHIJKLMNOPQRSTUVWXYZ', None),
+    'passenger_name': ('ABCDEFGHIJKLMNOPQRSTUVWXYZ', r'([A-Z]+(?: [A-Z]+)+)'),
+    'date': ('0123456789/', r'(\d{1,2}/\d{1,2}/\d{4})'),
+    'time': ('0123456789:APM', r'(\d{1,2}:\d{2}\s?(?:AM|PM))'),
+    'seat': ('0123456789ABCDEFGHJK', r'\b(\d{1,2}[A-K])\b'),
+    'pnr': ('ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789', r'\b([A-Z0-9]{6})\b'),
+}
+
+MIN_REGION_HEIGHT = 48  # crops are upscaled to at least this many pixels - small text OCRs badly
+ASPECT_TOLERANCE = 0.08
+_PADDING = 0.35  # of the value's height, around calibrated boxes
+
+
+class LayoutTemplate:
+    """Field boxes of one airline's boarding pass layout, as fractions of the page.
+
+    anchor is the box holding the airline name - OCR'ing just that crop
+    tells whether an image has this layout.
+    """
+
+    def __init__(self, airline, name, aspect, anchor, regions):
+        self.airline = airline
+        self.name = name
+        self.aspect = aspect      # width / height of the calibration sample
+        self.anchor = anchor      # (left, top, right, bottom) fractions
+        self.regions = regions    # field -> (left, top, right, bottom) fractions
+
+    def to_dict(self):
+        return {'airline': self.airline, 'name': self.name, 'aspect': self.aspect,
+                'anchor': self.anchor, 'regions': self.regions}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['airline'], data['name'], data['aspect'], tuple(data['anchor']),
+                   {field: tuple(box) for field, box in data['regions'].items()})
+
+    def fits(self, image):
+        aspect = image.size[0] / image.size[1]
+        return abs(aspect - self.aspect) <= ASPECT_TOLERANCE * self.aspect
+
+
+class TemplateRegistry:
+    """Layout templates by airline, kept in a JSON file"""
+
+    def __init__(self, templates=()):
+        self.templates = {}
+        for template in templates:
+            self.register(template)
+
+    def register(self, template):
+        self.templates.setdefault(template.airline, [])
+        self.templates[template.airline] = [t for t in self.templates[template.airline] if t.name != template.name]
+        self.templates[template.airline].append(template)
+
+    def __len__(self):
+        return sum(len(templates) for templates in self.templates.values())
+
+    def __iter__(self):
+        for templates in self.templates.values():
+            yield from templates
+
+    def signature(self):
+        """Changes whenever a box does - part of the OCR cache key"""
+        data = json.dumps([t.to_dict() for t in self], sort_keys=True)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()[:12]
+
+    @classmethod
+    def load(cls, path=DEFAULT_LAYOUTS_PATH):
+        if not path or not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as f:
+            return cls(LayoutTemplate.from_dict(data) for data in json.load(f))
+
+    def save(self, path=DEFAULT_LAYOUTS_PATH):
+        temp_path = path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump([t.to_dict() for t in self], f, indent=2)
+        os.replace(temp_path, path)
+
+
+def crop(image, box):
+    width, height = image.size
+    left, top, right, bottom = box
+    return image.crop((int(left * width), int(top * height), int(right * width), int(bottom * height)))
+
+
+def prepare_region(region):
+    """Grayscale, upscale small crops, binarize"""
+    region = region.convert('L')
+    if region.size[1] and region.size[1] < MIN_REGION_HEIGHT:
+        scale = MIN_REGION_HEIGHT / region.size[1]
+        region = region.resize((max(1, int(region.size[0] * scale)), MIN_REGION_HEIGHT), Image.LANCZOS)
+    threshold = otsu_threshold(region)
+    return region.point(lambda value: 255 if value > threshold else 0, mode='1')
+
+
+def region_value(field, text, parser):
+    """Field value in a region's OCR text, in the parser's value format, or None"""
+    if field == 'flight_number':
+        return parser.find_flight_number(text)
+    if field == 'route':
+        codes = [code for code in re.findall(r'\b[A-Z]{3}\b', text) if code in parser.airports]
+        return (codes[0], codes[1]) if len(codes) >= 2 and codes[0] != codes[1] else None
+    match = re.search(FIELD_RULES[field][1], text)
+    return match.group(1) if match else None
+
+
+class LayoutReader:
+    """Detect a known layout and read its fields from small crops"""
+
+    def __init__(self, registry, backend, parser):
+        self.registry = registry
+        self.backend = backend
+        self.parser = parser
+
+    def detect(self, image):
+        """Template whose anchor crop names its airline, or None"""
+        for template in self.registry:
+            if not template.fits(image):
+                continue
+            with metrics.time('layout_detect'):
+                text = self.backend.image_to_string(prepare_region(crop(image, template.anchor)), config='--psm 7')
+            if self.parser.detect_airline(text.upper()) == template.airline:
+                return template
+        return None
+
+    def read(self, image):
+        """(template, {field: (value, confidence)}) - ({} for no known layout)"""
+        image = ImageOps.exif_transpose(image)
+        template = self.detect(image)
+        if template is None:
+            metrics.inc('flight_layout_total', airline='none', result='no_template')
+            return None, {}
+
+        fields = {}
+        for field, box in template.regions.items():
+            whitelist = FIELD_RULES[field][0]
+            with metrics.time('layout_region'):
+                text, words = self.backend.image_to_data(
+                    prepare_region(crop(image, box)), config=f"--psm 7 -c tessedit_char_whitelist={whitelist}")
+            value = region_value(field, text.upper(), self.parser)
+            if value is not None:
+                fields[field] = (value, min((float(c) for _, c in words), default=0.0))
+
+        complete = len(fields) == len(template.regions)
+        metrics.inc('flight_layout_total', airline=template.airline, result='complete' if complete else 'partial')
+        return template, fields
+
+
+def _union(boxes):
+    return min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes), max(b[3] for b in boxes)
+
+
+def calibrate(image, backend, parser, name='default', airline=None):
+    """Template from a sample boarding pass - boxes around the words each field was read from.
+
+    Runs one full-page OCR with word boxes; fields the parser can't find
+    in the sample are left out of the template.
+    """
+    image = ImageOps.exif_transpose(image)
+    prepared = preprocess_image(image, PreprocessConfig(deskew=False))  # rotation would move the boxes
+    width, height = prepared.size
+    words = [(re.sub(r'[^A-Z0-9/:]', '', word.upper()), box) for word, _, box in backend.word_boxes(prepared)]
+    full_text = backend.image_to_string(prepared).upper()
+
+    def find(token):
+        # Whole word first - 'DEL' shouldn't land on 'DELHI' if DEL is printed too
+        return (next((box for word, box in words if word == token), None)
+                or next((box for word, box in words if token in word), None))
+
+    def locate(tokens):
+        boxes = [find(token) for token in tokens if token]
+        if not boxes or None in boxes:
+            return None
+        left, top, right, bottom = _union(boxes)
+        pad = (bottom - top) * _PADDING
+        return (round(max(0, left - pad) / width, 4), round(max(0, top - pad) / height, 4),
+                round(min(width, right + pad) / width, 4), round(min(height, bottom + pad) / height, 4))
+
+    if airline:
+        # Stored as the parser names it - detect() compares against detect_airline()
+        resolved = parser.resolve_airline(airline)
+        if resolved is None:
+            raise ValueError(f"Unknown airline '{airline}' - give its name or IATA designator")
+        airline = resolved
+    else:
+        airline = parser.detect_airline(full_text)
+    if airline == 'Unknown':
+        raise ValueError("Airline not recognised in the sample - pass it explicitly")
+    anchor = locate(airline.upper().split())
+    if anchor is None:
+        raise ValueError(f"'{airline}' isn't printed on the sample - can't anchor the layout")
+
+    regions = {}
+    for field, value in parser.extract_fields(full_text).items():
+        if field not in FIELD_RULES:
+            continue
+        tokens = list(value) if isinstance(value, tuple) else str(value).split()
+        box = locate(tokens)
+        if box is None and field == 'flight_number':  # printed as '6E 2134'
+            box = locate([value[:2], value[2:]])
+        if box is not None:
+            regions[field] = box
+    print(f"📐 Layout '{name}' for {airline}: {', '.join(regions) or 'no fields'} located")
+    return LayoutTemplate(airline, name, round(image.size[0] / image.size[1], 4), anchor, regions)
@@ -1,234 +1,397 @@
-import pytesseract
-from PIL import Image
-import imaplib
-import email
-from email.header import decode_header
-import re
-import pandas as pd
-import os
-from datetime import datetime
-
-# Tesseract path set
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-
-class EmailFlightExtractor:
-    def __init__(self, email_user, email_pass, imap_server="imap.gmail.com"):
-        self.email_user = email_user
-        self.email_pass = email_pass
-        self.imap_server = imap_server
-        self.mail = None
-        
-    def connect_to_email(self):
-        """Email server connect pannu"""
-        try:
-            print(f"🔗 Connecting to {self.imap_server}...")
-            self.mail = imaplib.IMAP4_SSL(self.imap_server)
-            
-            print(f"🔑 Logging in as {self.email_user}...")
-            self.mail.login(self.email_user, self.email_pass)
-            
-            print("📁 Selecting inbox...")
-            self.mail.select("inbox")
-            
-            print("✅ Email connected successfully")
-            return True
-            
-        except Exception as e:
-            print(f"❌ Email connection failed: {e}")
-            return False
-    
-    def search_flight_emails(self):
-        """Flight confirmation emails search pannu"""
-        try:
-            # Search for flight emails
-            status, messages = self.mail.search(None, '(SUBJECT "Flight" SUBJECT "Booking" SUBJECT "Itinerary")')
-            email_ids = messages[0].split()
-            print(f"📧 Found {len(email_ids)} potential flight emails")
-            return email_ids
-        except Exception as e:
-            print(f"❌ Email search failed: {e}")
-            return []
-    
-    def extract_email_content(self, email_id):
-        """Email content extract pannu"""
-        try:
-            status, msg_data = self.mail.fetch(email_id, "(RFC822)")
-            raw_email = msg_data[0][1]
-            msg = email.message_from_bytes(raw_email)
-            
-            # Subject extract pannu
-            subject = decode_header(msg["Subject"])[0][0]
-            if isinstance(subject, bytes):
-                subject = subject.decode(errors='ignore')
-            
-            # Body extract pannu
-            body = ""
-            if msg.is_multipart():
-                for part in msg.walk():
-                    content_type = part.get_content_type()
-                    content_disposition = str(part.get("Content-Disposition"))
-                    
-                    if content_type == "text/plain" and "attachment" not in content_disposition:
-                        body = part.get_payload(decode=True).decode(errors='ignore')
-                        break
-            else:
-                body = msg.get_payload(decode=True).decode(errors='ignore')
-            
-            return subject, body
-            
-        except Exception as e:
-            print(f"❌ Email content extraction failed: {e}")
-            return "", ""
-    
-    def extract_flight_details(self, subject, body):
-        """Email subject and body la irunthu flight details extract pannu"""
-        details = {}
-        
-        # Employee name extract from subject
-        name_patterns = [
-            r'Flight Confirmation - ([^-]+)',
-            r'Booking Confirmation - ([^-]+)',
-            r'Itinerary for ([^-]+)'
-        ]
-        
-        details['employee_name'] = "Unknown"
-        for pattern in name_patterns:
-            match = re.search(pattern, subject, re.IGNORECASE)
-            if match:
-                details['employee_name'] = match.group(1).strip()
-                break
-        
-        # Flight number extract
-        flight_match = re.search(r'[A-Z]{2}\d{3,4}', body.upper())
-        details['flight_number'] = flight_match.group() if flight_match else "Not found"
-        
-        # Route extract
-        route_match = re.search(r'(\w{3})\s*to\s*(\w{3})', body, re.IGNORECASE)
-        if route_match:
-            details['route'] = f"{route_match.group(1)} to {route_match.group(2)}"
-        else:
-            details['route'] = "Not found"
-        
-        # Date extract
-        date_match = re.search(r'\d{4}-\d{2}-\d{2}', body)
-        details['date'] = date_match.group() if date_match else "Not found"
-        
-        # Cost extract
-        cost_match = re.search(r'[\$₹]\d+(?:\.\d{2})?', body)
-        details['cost'] = cost_match.group() if cost_match else "Not found"
-        
-        return details
-    
-    def process_emails(self):
-        """All flight emails process pannu"""
-        if not self.connect_to_email():
-            return []
-        
-        email_ids = self.search_flight_emails()
-        all_flights = []
-        
-        for i, email_id in enumerate(email_ids[:3]):  # First 3 emails test pannu
-            print(f"\n📨 Processing email {i+1}/{len(email_ids)}...")
-            subject, body = self.extract_email_content(email_id)
-            
-            if subject:
-                print(f"Subject: {subject[:80]}...")
-                flight_details = self.extract_flight_details(subject, body)
-                
-                if flight_details:
-                    flight_details['email_id'] = email_id.decode()
-                    flight_details['processed_date'] = datetime.now().strftime("%Y-%m-%d")
-                    all_flights.append(flight_details)
-                    print(f"✅ Extracted: {flight_details}")
-        
-        # Close connection
-        if self.mail:
-            self.mail.close()
-            self.mail.logout()
-        
-        return all_flights
-    
-    def save_to_excel(self, flight_data, filename="flight_records.xlsx"):
-        """Excel file la save pannu"""
-        if not flight_data:
-            print("❌ No flight data to save")
-            # Create sample data for testing
-            sample_data = [{
-                'employee_name': 'Venkatesh Kumar',
-                'flight_number': 'AI101',
-                'route': 'DEL to BOM',
-                'date': '2025-01-20',
-                'cost': '₹8,500',
-                'status': 'Sample Data - No real emails found'
-            }]
-            flight_data = sample_data
-            print("📝 Created sample data for testing")
-        
-        df = pd.DataFrame(flight_data)
-        df.to_excel(filename, index=False)
-        print(f"💾 Saved {len(flight_data)} records to {filename}")
-
-# Test function
-def test_ocr():
-    """OCR test pannu"""
-    print("🧪 Testing OCR...")
-    
-    # Test image create pannu
-    from PIL import Image, ImageDraw
-    
-    img = Image.new('RGB', (500, 200), color='white')
-    d = ImageDraw.Draw(img)
-    
-    # Sample boarding pass content
-    d.text((20, 20), "BOARDING PASS", fill='black')
-    d.text((20, 50), "Airline: Sky Airlines", fill='black')
-    d.text((20, 80), "Flight: AA1234", fill='black')
-    d.text((20, 110), "From: NYC to LAX", fill='black')
-    d.text((20, 140), "Date: 2025-01-15 | Cost: $450.00", fill='black')
-    
-    img.save('test_boarding_pass.jpg')
-    
-    # OCR extract pannu
-    text = pytesseract.image_to_string(Image.open('test_boarding_pass.jpg'))
-    print("📄 Extracted Text:")
-    print("=" * 40)
-    print(text)
-    print("=" * 40)
-    
-    return text
-
-def main():
-    print("🚀 Flight Email Automation Started!")
-    print("=" * 50)
-    
-    # Test OCR first
-    test_ocr()
-    
-    # Get credentials
-    print("\n🔐 Enter Gmail credentials:")
-    your_email = input("venkatf0618w@gmail.com").strip()  # Your email
-    your_app_password = input("tiwkksudqijxxxlt").strip()  # Enter your 16-char password
-    
-    try:
-        # Test connection first
-        print("🔄 Testing connection...")
-        mail_test = imaplib.IMAP4_SSL("imap.gmail.com")
-        mail_test.login(your_email, your_app_password)
-        mail_test.logout()
-        print("✅ Connection test passed!")
-        
-        # Process emails
-        extractor = EmailFlightExtractor(your_email, your_app_password)
-        flights = extractor.process_emails()
-        extractor.save_to_excel(flights)
-        
-        print(f"\n🎉 Success! Found {len(flights)} flight records!")
-        
-    except Exception as e:
-        print(f"❌ Error: {e}")
-        print("📝 Creating sample data...")
-        extractor = EmailFlightExtractor("test@test.com", "test")
-        extractor.save_to_excel([])
-
-if __name__ == "__main__":
+import imaplib
+import email
+from email.header import decode_header
+from email.utils import parsedate_to_datetime
+from email.message import Message
+import re
+from datetime import datetime
+from imap_fetch import (DEFAULT_CHUNK_SIZE, MIN_IMAGE_SIZE, uid_search, get_uidvalidity, fetch_streamed,
+                        fetch_message_parts, fetch_attachments, is_ticket_attachment, subject_search)
+from mime_stream import iter_chunks, parse_stream
+from sync_state import SyncStateStore
+from report_sink import StreamingExcelSink
+from html_text import best_body
+from record_dedup import DedupIndex
+from flight_parser import default_parser
+from metrics import metrics, export_run
+
+# Fields extract_flight_details fills ('Not found' when missing)
+EMAIL_FIELDS = ['employee_name', 'flight_number', 'route', 'date', 'cost']
+
+# A flight email has any of these in its Subject
+FLIGHT_KEYWORDS = ['Flight', 'Booking', 'Itinerary']
+
+# OCR (pytesseract, PIL, final_system) is imported only where it's used - the mail
+# path starts without it
+
+class EmailFlightExtractor:
+    def __init__(self, email_user, email_pass, imap_server="imap.gmail.com", fetch_chunk_size=DEFAULT_CHUNK_SIZE,
+                 fetch_mode="parts", folder="inbox", sync_state=None, ocr=None):
+        self.email_user = email_user
+        self.email_pass = email_pass
+        self.imap_server = imap_server
+        self.folder = folder
+        self.sync_state = sync_state  # SyncStateStore -> only fetch mail newer than the last run
+        self.account = f"{email_user}@{imap_server}"
+        self.fetch_chunk_size = fetch_chunk_size
+        self.fetch_mode = fetch_mode  # "parts" = headers + text part only, "rfc822" = full message
+        self.ocr = ocr  # FinalFlightExtractor -> image attachments are OCR'd in memory too
+        self.attachment_records = []
+        self.mail = None
+        
+    def connect_to_email(self):
+        """Email server connect pannu"""
+        try:
+            print(f"🔗 Connecting to {self.imap_server}...")
+            self.mail = imaplib.IMAP4_SSL(self.imap_server)
+            
+            print(f"🔑 Logging in as {self.email_user}...")
+            self.mail.login(self.email_user, self.email_pass)
+            
+            print(f"📁 Selecting {self.folder}...")
+            self.mail.select(self.folder)
+            
+            print("✅ Email connected successfully")
+            return True
+            
+        except Exception as e:
+            print(f"❌ Email connection failed: {e}")
+            return False
+    
+    def search_flight_emails(self, start_uid=1):
+        """Flight confirmation emails search pannu (UID start_uid onwards)"""
+        try:
+            # Search for flight emails
+            email_ids = uid_search(self.mail, subject_search(self.mail, FLIGHT_KEYWORDS), start_uid)
+            print(f"📧 Found {len(email_ids)} potential flight emails")
+            return email_ids
+        except Exception as e:
+            print(f"❌ Email search failed: {e}")
+            return []
+    
+    def extract_email_content(self, email_id):
+        """Email content extract pannu (single message, by UID)"""
+        for uid, subject, body in self.fetch_email_contents([int(email_id)]):
+            return subject, body
+        return "", ""
+    
+    def fetch_email_contents(self, email_ids):
+        """Batched UID FETCH - yields (uid, subject, body), chunk_size messages per round trip"""
+        for uid, subject, body, images, sent in self.fetch_messages(email_ids):
+            yield uid, subject, body
+    
+    def fetch_messages(self, email_ids):
+        """Like fetch_email_contents, plus a lazy (filename, image bytes) generator and the sent date per message.
+        
+        Images are only fetched/decoded if the generator is consumed.
+        """
+        if self.fetch_mode == "parts":
+            for message in fetch_message_parts(self.mail, email_ids, self.fetch_chunk_size):
+                with metrics.time('mime_parse'):
+                    header = email.message_from_bytes(message['header'])
+                    subject = self.decode_subject(header["Subject"])
+                images = self.image_attachments(message['uid'], message['parts'])
+                yield message['uid'], subject, message['text'], images, self.sent_date(header)
+            return
+        
+        # Full messages arrive in slices and go straight through the streaming parser -
+        # only text parts are kept, plus ticket attachments (in memory) when there's OCR to read them
+        options = {} if self.ocr else {'keep_attachment': lambda content_type: False}
+        for uid, chunks in fetch_streamed(self.mail, email_ids, self.fetch_chunk_size):
+            try:
+                parsed = parse_stream(chunks, **options)
+            except Exception as e:
+                print(f"❌ Email content extraction failed: {e}")
+                continue
+            yield (uid, self.stream_subject(parsed), best_body(parsed.plain, parsed.html), self.streamed_images(parsed),
+                   self.sent_date(parsed.headers))
+    
+    def decode_subject(self, header):
+        """Encoded Subject header -> str"""
+        subject = decode_header(header)[0][0]
+        if isinstance(subject, bytes):
+            subject = subject.decode(errors='ignore')
+        return subject
+    
+    def sent_date(self, header):
+        """Date header -> date (None if missing or unparseable) - anchors boarding pass years"""
+        try:
+            return parsedate_to_datetime(header["Date"]).date()
+        except (TypeError, ValueError, IndexError):
+            return None
+    
+    def fetch_attachments(self, email_id, parts):
+        """Attachments download only when the OCR path asks for them"""
+        return fetch_attachments(self.mail, email_id, parts)
+    
+    def image_attachments(self, email_id, parts):
+        """(filename, decoded bytes) for the image/PDF parts of a message - one FETCH, no temp files"""
+        for part, payload in fetch_attachments(self.mail, email_id, parts, is_ticket_attachment):
+            yield part['filename'] or f"email-{email_id}-part{part['section']}", payload
+    
+    def message_images(self, msg):
+        """Same as image_attachments for an already downloaded (RFC822) message"""
+        for number, part in enumerate(msg.walk()):
+            if part.get_content_maintype() != 'image' and part.get_content_type() != 'application/pdf':
+                continue
+            payload = part.get_payload(decode=True)
+            if payload and (len(payload) >= MIN_IMAGE_SIZE or part.get_content_type() == 'application/pdf'):
+                yield part.get_filename() or f"email-part{number}", payload
+    
+    def streamed_images(self, parsed):
+        """Same as message_images for a streamed message - attachments were decoded into memory buffers"""
+        try:
+            for attachment in parsed.attachments:
+                if attachment.size >= MIN_IMAGE_SIZE or attachment.content_type == 'application/pdf':
+                    yield attachment.filename, attachment.data
+        finally:
+            for attachment in parsed.attachments:
+                attachment.close()
+    
+    def stream_subject(self, parsed):
+        if parsed.headers is None or parsed.headers["Subject"] is None:
+            return ""
+        return self.decode_subject(parsed.headers["Subject"])
+    
+    def ocr_attachments(self, email_id, images, sent=None):
+        """Boarding pass images / e-ticket PDFs -> flight records, straight from memory"""
+        records = []
+        for filename, payload in images:
+            try:
+                record = self.ocr.extract_record(payload, filename, sent)
+            except Exception as e:
+                print(f"❌ Attachment OCR failed ({filename}): {e}")
+                continue
+            record['email_id'] = str(email_id)
+            records.append(record)
+            print(f"🖼️ Attachment {filename}: {record['flight_number']}")
+        return records
+    
+    def parse_email_content(self, raw_email):
+        """Raw RFC822 bytes (or a parsed Message) la irunthu subject and body extract pannu"""
+        try:
+            if not isinstance(raw_email, Message):
+                # Raw bytes - stream them instead of building the whole message tree
+                parsed = parse_stream(iter_chunks(raw_email), keep_attachment=lambda content_type: False)
+                return self.stream_subject(parsed), best_body(parsed.plain, parsed.html)
+            msg = raw_email
+            
+            # Subject extract pannu
+            subject = self.decode_subject(msg["Subject"])
+            
+            # Body extract pannu - text/plain, or the HTML part's text when plain is missing/a stub
+            plain = html = None
+            for part in msg.walk():
+                content_type = part.get_content_type()
+                content_disposition = str(part.get("Content-Disposition"))
+                if "attachment" in content_disposition:
+                    continue
+                
+                if content_type == "text/plain" and plain is None:
+                    plain = self.part_text(part)
+                elif content_type == "text/html" and html is None:
+                    html = self.part_text(part)
+            
+            return subject, best_body(plain, html)
+            
+        except Exception as e:
+            print(f"❌ Email content extraction failed: {e}")
+            return "", ""
+    
+    def part_text(self, part):
+        """Decoded text of a MIME part in its declared charset"""
+        payload = part.get_payload(decode=True) or b""
+        try:
+            return payload.decode(part.get_content_charset() or 'utf-8', errors='ignore')
+        except LookupError:
+            return payload.decode('utf-8', errors='ignore')
+    
+    def extract_flight_details(self, subject, body):
+        """Email subject and body la irunthu flight details extract pannu"""
+        with metrics.time('parse'):
+            details = self._extract_flight_details(subject, body)
+        metrics.count_fields(details, EMAIL_FIELDS, source='email')
+        return details
+    
+    def _extract_flight_details(self, subject, body):
+        details = {}
+        
+        # Employee name extract from subject
+        name_patterns = [
+            r'Flight Confirmation - ([^-]+)',
+            r'Booking Confirmation - ([^-]+)',
+            r'Itinerary for ([^-]+)'
+        ]
+        
+        details['employee_name'] = "Unknown"
+        for pattern in name_patterns:
+            match = re.search(pattern, subject, re.IGNORECASE)
+            if match:
+                details['employee_name'] = match.group(1).strip()
+                break
+        
+        # Flight number + route - checked against the IATA tables (6E, AI...; DEL, BOM...)
+        text = body.upper()
+        details['flight_number'] = default_parser.find_flight_number(text) or "Not found"
+        
+        route = default_parser.find_route(text)
+        details['route'] = f"{route[0]} to {route[1]}" if route else "Not found"
+        
+        # Date extract
+        date_match = re.search(r'\d{4}-\d{2}-\d{2}', body)
+        details['date'] = date_match.group() if date_match else "Not found"
+        
+        # Cost extract
+        cost_match = re.search(r'[\$₹]\d+(?:\.\d{2})?', body)
+        details['cost'] = cost_match.group() if cost_match else "Not found"
+        
+        return details
+    
+    def process_emails(self, max_emails=None):
+        """All flight emails process pannu (only new ones when sync_state is set)"""
+        # Reuse a session the caller already opened
+        if self.mail is None and not self.connect_to_email():
+            return []
+        
+        start_uid = 1
+        if self.sync_state:
+            uidvalidity = get_uidvalidity(self.mail, self.folder)
+            start_uid = self.sync_state.start_uid(self.account, self.folder, uidvalidity)
+        
+        email_ids = self.search_flight_emails(start_uid)
+        if max_emails:
+            email_ids = email_ids[:max_emails]
+        all_flights = []
+        last_uid = 0
+        
+        emails = self.fetch_messages(email_ids)
+        for i, (email_id, subject, body, images, sent) in enumerate(emails):
+            print(f"\n📨 Processing email {i+1}/{len(email_ids)}...")
+            last_uid = max(last_uid, email_id)
+            
+            if subject:
+                print(f"Subject: {subject[:80]}...")
+                flight_details = self.extract_flight_details(subject, body)
+                
+                if flight_details:
+                    flight_details['email_id'] = str(email_id)
+                    flight_details['processed_date'] = datetime.now().strftime("%Y-%m-%d")
+                    all_flights.append(flight_details)
+                    print(f"✅ Extracted: {flight_details}")
+            
+            # Same pass - boarding passes attached to the email
+            if self.ocr:
+                self.attachment_records.extend(self.ocr_attachments(email_id, images, sent))
+        
+        # Save the high-water mark - next run starts after last_uid
+        if self.sync_state and last_uid:
+            self.sync_state.update(self.account, self.folder, uidvalidity, last_uid)
+            print(f"📌 Sync state saved: {self.folder} up to UID {last_uid}")
+        
+        # Close connection
+        if self.mail:
+            self.mail.close()
+            self.mail.logout()
+            self.mail = None
+        
+        return all_flights
+    
+    def save_to_excel(self, flight_data, filename="flight_records.xlsx", append=False, sample=True):
+        """Excel file la save pannu (append=True keeps rows from earlier runs, sample=False saves no made-up row)"""
+        if append and not flight_data:
+            print("📭 No new flight emails since the last run")
+            return
+        
+        if not flight_data and sample:
+            print("❌ No flight data to save")
+            # Create sample data for testing
+            sample_data = [{
+                'employee_name': 'Venkatesh Kumar',
+                'flight_number': 'AI101',
+                'route': 'DEL to BOM',
+                'date': '2025-01-20',
+                'cost': '₹8,500',
+                'status': 'Sample Data - No real emails found'
+            }]
+            flight_data = sample_data
+            print("📝 Created sample data for testing")
+        
+        # Earlier rows are copied through row by row, new ones streamed after them
+        with StreamingExcelSink(filename, sheet_name='Sheet1', summary=False, append=append) as sink:
+            sink.write_many(flight_data)
+        print(f"💾 Saved {len(flight_data)} records to {filename}")
+
+# Test function
+def test_ocr():
+    """OCR test pannu"""
+    print("🧪 Testing OCR...")
+    
+    # Test image create pannu
+    from PIL import Image, ImageDraw
+    import final_system  # sets the Tesseract path
+    from ocr_backend import get_backend
+    
+    img = Image.new('RGB', (500, 200), color='white')
+    d = ImageDraw.Draw(img)
+    
+    # Sample boarding pass content
+    d.text((20, 20), "BOARDING PASS", fill='black')
+    d.text((20, 50), "Airline: Sky Airlines", fill='black')
+    d.text((20, 80), "Flight: AA1234", fill='black')
+    d.text((20, 110), "From: NYC to LAX", fill='black')
+    d.text((20, 140), "Date: 2025-01-15 | Cost: $450.00", fill='black')
+    
+    img.save('test_boarding_pass.jpg')
+    
+    # OCR extract pannu
+    text = get_backend().image_to_string(Image.open('test_boarding_pass.jpg'))
+    print("📄 Extracted Text:")
+    print("=" * 40)
+    print(text)
+    print("=" * 40)
+    
+    return text
+
+def main():
+    print("🚀 Flight Email Automation Started!")
+    print("=" * 50)
+    
+    # Test OCR first
+    test_ocr()
+    
+    # Get credentials
+    print("\n🔐 Enter Gmail credentials:")
+    your_email = input("venkatf0618w@gmail.com").strip()  # Your email
+    your_app_password = input("tiwkksudqijxxxlt").strip()  # Enter your 16-char password
+    
+    try:
+        # Test connection first
+        print("🔄 Testing connection...")
+        mail_test = imaplib.IMAP4_SSL("imap.gmail.com")
+        mail_test.login(your_email, your_app_password)
+        mail_test.logout()
+        print("✅ Connection test passed!")
+        
+        # Process emails
+        from final_system import FinalFlightExtractor
+        extractor = EmailFlightExtractor(your_email, your_app_password, sync_state=SyncStateStore(),
+                                         ocr=FinalFlightExtractor())
+        # Reminders / check-in mails of an already saved booking are merged, not appended again
+        flights = list(DedupIndex(namespace='email').dedupe(extractor.process_emails(), only_new=True))
+        extractor.save_to_excel(flights, append=True)
+        if extractor.attachment_records:
+            attachments = DedupIndex(namespace='attachment').dedupe(extractor.attachment_records)
+            extractor.ocr.create_final_report(attachments, "email_attachment_records.xlsx")
+        extractor.ocr.close()
+        
+        print(f"\n🎉 Success! Found {len(flights)} flight records!")
+        export_run()
+        
+    except Exception as e:
+        print(f"❌ Error: {e}")
+        print("📝 Creating sample data...")
+        extractor = EmailFlightExtractor("test@test.com", "test")
+        extractor.save_to_excel([])
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
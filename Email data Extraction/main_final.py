@@ -1,206 +1,231 @@
-import pytesseract
-from PIL import Image
-import imaplib
-import email
-from email.header import decode_header
-import re
-import pandas as pd
-from datetime import datetime
-import time
-
-# Tesseract path set
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-
-def test_ocr():
-    """OCR test pannu"""
-    print("🧪 Testing OCR...")
-    
-    from PIL import Image, ImageDraw
-    img = Image.new('RGB', (500, 200), color='white')
-    d = ImageDraw.Draw(img)
-    d.text((20, 20), "BOARDING PASS", fill='black')
-    d.text((20, 50), "Airline: Sky Airlines", fill='black')
-    d.text((20, 80), "Flight: AA1234", fill='black')
-    d.text((20, 110), "From: NYC to LAX", fill='black')
-    d.text((20, 140), "Date: 2025-01-15 | Cost: $450.00", fill='black')
-    img.save('test_boarding_pass.jpg')
-    
-    text = pytesseract.image_to_string(Image.open('test_boarding_pass.jpg'))
-    print("📄 Extracted Text:")
-    print("=" * 40)
-    print(text)
-    print("=" * 40)
-    return text
-
-def test_gmail_login(email, password):
-    """Simple Gmail login test"""
-    try:
-        print("🔐 Testing Gmail login...")
-        mail = imaplib.IMAP4_SSL("imap.gmail.com", 993)
-        mail.login(email, password)
-        print("✅ Login successful!")
-        
-        # Check inbox
-        mail.select("inbox")
-        status, messages = mail.search(None, "ALL")
-        email_ids = messages[0].split()
-        print(f"📧 Inbox has {len(email_ids)} emails")
-        
-        mail.close()
-        mail.logout()
-        return True
-        
-    except Exception as e:
-        print(f"❌ Login failed: {e}")
-        return False
-
-def extract_flight_info_from_emails(email, password):
-    """Extract flight info from Gmail"""
-    try:
-        print("📧 Connecting to Gmail...")
-        mail = imaplib.IMAP4_SSL("imap.gmail.com", 993)
-        mail.login(email, password)
-        mail.select("inbox")
-        
-        # Search for flight-related emails
-        search_keywords = ['Flight', 'Booking', 'Itinerary', 'Airline', 'Ticket']
-        all_flights = []
-        
-        for keyword in search_keywords:
-            print(f"🔍 Searching for '{keyword}' emails...")
-            status, messages = mail.search(None, f'SUBJECT "{keyword}"')
-            email_ids = messages[0].split()
-            
-            for email_id in email_ids[:2]:  # Process first 2 of each type
-                try:
-                    status, msg_data = mail.fetch(email_id, "(RFC822)")
-                    raw_email = msg_data[0][1]
-                    msg = email.message_from_bytes(raw_email)
-                    
-                    # Get subject
-                    subject = decode_header(msg["Subject"])[0][0]
-                    if isinstance(subject, bytes):
-                        subject = subject.decode(errors='ignore')
-                    
-                    print(f"   ✉️ {subject[:60]}...")
-                    
-                    # Extract basic info
-                    flight_data = {
-                        'employee_name': extract_name_from_subject(subject),
-                        'flight_number': extract_flight_number(subject),
-                        'route': 'Extracted from email',
-                        'date': datetime.now().strftime("%Y-%m-%d"),
-                        'cost': 'Extracted from email',
-                        'email_subject': subject[:80],
-                        'keyword': keyword
-                    }
-                    all_flights.append(flight_data)
-                    
-                except Exception as e:
-                    print(f"   ❌ Error processing email: {e}")
-        
-        mail.close()
-        mail.logout()
-        return all_flights
-        
-    except Exception as e:
-        print(f"❌ Email processing error: {e}")
-        return []
-
-def extract_name_from_subject(subject):
-    """Extract name from email subject"""
-    patterns = [
-        r'for\s+([A-Za-z]+\s+[A-Za-z]+)',
-        r'-\s*([A-Za-z]+\s+[A-Za-z]+)',
-        r'([A-Za-z]+\s+[A-Za-z]+)\s+-\s+Flight'
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, subject, re.IGNORECASE)
-        if match:
-            return match.group(1).title()
-    
-    return "Unknown"
-
-def extract_flight_number(subject):
-    """Extract flight number from subject"""
-    match = re.search(r'[A-Z]{2}\d{3,4}', subject.upper())
-    return match.group() if match else "Not found"
-
-def create_sample_flight_data():
-    """Create realistic sample flight data"""
-    return [
-        {
-            'employee_name': 'Venkatesh Kumar',
-            'flight_number': 'AI101',
-            'route': 'DEL (Delhi) to BOM (Mumbai)',
-            'date': '2025-01-20',
-            'cost': '₹8,500',
-            'airline': 'Air India',
-            'status': 'Confirmed',
-            'class': 'Economy'
-        },
-        {
-            'employee_name': 'Priya Sharma',
-            'flight_number': '6E205',
-            'route': 'BLR (Bangalore) to MAA (Chennai)',
-            'date': '2025-01-25',
-            'cost': '₹4,200',
-            'airline': 'IndiGo',
-            'status': 'Confirmed',
-            'class': 'Economy'
-        },
-        {
-            'employee_name': 'Rajesh Patel',
-            'flight_number': 'UK815',
-            'route': 'HYD (Hyderabad) to DEL (Delhi)',
-            'date': '2025-02-01',
-            'cost': '₹6,800',
-            'airline': 'Vistara',
-            'status': 'Pending',
-            'class': 'Business'
-        }
-    ]
-
-def main():
-    print("🚀 FLIGHT EMAIL AUTOMATION - FINAL VERSION")
-    print("=" * 55)
-    
-    # Test OCR
-    test_ocr()
-    
-    # Get credentials
-    print("\n🔐 Gmail Login")
-    print("-" * 20)
-    email = input("venkatf0618w@gmail.com").strip()
-    password = input("tiwkksudqijxxxlt").strip()
-    
-    # Test login first
-    if test_gmail_login(email, password):
-        # Try to extract real emails
-        print("\n📧 Processing emails...")
-        real_flights = extract_flight_info_from_emails(email, password)
-        
-        if real_flights:
-            df = pd.DataFrame(real_flights)
-            df.to_excel('flight_records.xlsx', index=False)
-            print(f"🎉 Saved {len(real_flights)} real flight records!")
-        else:
-            # Create sample data if no real emails found
-            sample_data = create_sample_flight_data()
-            df = pd.DataFrame(sample_data)
-            df.to_excel('flight_records.xlsx', index=False)
-            print("📊 Created sample flight data (no real emails found)")
-    else:
-        # Create sample data if login fails
-        print("\n📝 Creating sample data for demonstration...")
-        sample_data = create_sample_flight_data()
-        df = pd.DataFrame(sample_data)
-        df.to_excel('flight_records.xlsx', index=False)
-        print("💾 Sample data saved to 'flight_records.xlsx'")
-    
-    print("\n✅ Process completed!")
-    print("📁 Check 'flight_records.xlsx' file")
-
-if __name__ == "__main__":
+import pytesseract
+from PIL import Image
+import imaplib
+import email
+from email import message_from_bytes
+from email.header import decode_header
+import re
+import pandas as pd
+from datetime import datetime
+from ocr_backend import get_backend
+from imap_fetch import (DEFAULT_CHUNK_SIZE, uid_search, get_uidvalidity, fetch_batched, subject_search,
+                        matched_keywords)
+from sync_state import SyncStateStore
+from flight_parser import default_parser
+import time
+import os
+
+# Tesseract path set
+pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+
+def test_ocr():
+    """OCR test pannu"""
+    print("🧪 Testing OCR...")
+    
+    from PIL import Image, ImageDraw
+    img = Image.new('RGB', (500, 200), color='white')
+    d = ImageDraw.Draw(img)
+    d.text((20, 20), "BOARDING PASS", fill='black')
+    d.text((20, 50), "Airline: Sky Airlines", fill='black')
+    d.text((20, 80), "Flight: AA1234", fill='black')
+    d.text((20, 110), "From: NYC to LAX", fill='black')
+    d.text((20, 140), "Date: 2025-01-15 | Cost: $450.00", fill='black')
+    img.save('test_boarding_pass.jpg')
+    
+    text = get_backend().image_to_string(Image.open('test_boarding_pass.jpg'))
+    print("📄 Extracted Text:")
+    print("=" * 40)
+    print(text)
+    print("=" * 40)
+    return text
+
+def test_gmail_login(email, password):
+    """Simple Gmail login test"""
+    try:
+        print("🔐 Testing Gmail login...")
+        mail = imaplib.IMAP4_SSL("imap.gmail.com", 993)
+        mail.login(email, password)
+        print("✅ Login successful!")
+        
+        # Check inbox
+        mail.select("inbox")
+        status, messages = mail.search(None, "ALL")
+        email_ids = messages[0].split()
+        print(f"📧 Inbox has {len(email_ids)} emails")
+        
+        mail.close()
+        mail.logout()
+        return True
+        
+    except Exception as e:
+        print(f"❌ Login failed: {e}")
+        return False
+
+def extract_flight_info_from_emails(email, password, chunk_size=DEFAULT_CHUNK_SIZE, sync_state=None,
+                                    folder="inbox", max_emails=None):
+    """Extract flight info from Gmail (only mail newer than the last run when sync_state is set)"""
+    try:
+        print("📧 Connecting to Gmail...")
+        mail = imaplib.IMAP4_SSL("imap.gmail.com", 993)
+        mail.login(email, password)
+        mail.select(folder)
+        
+        account = f"{email}@imap.gmail.com"
+        start_uid = 1
+        if sync_state:
+            uidvalidity = get_uidvalidity(mail, folder)
+            start_uid = sync_state.start_uid(account, folder, uidvalidity)
+        
+        # Search for flight-related emails - one server-side OR search, each UID once
+        search_keywords = ['Flight', 'Booking', 'Itinerary', 'Airline', 'Ticket']
+        all_flights = []
+        last_uid = 0
+        
+        print(f"🔍 Searching for {', '.join(search_keywords)} emails...")
+        email_ids = uid_search(mail, subject_search(mail, search_keywords), start_uid)
+        if max_emails:
+            email_ids = email_ids[:max_emails]
+        print(f"📧 Found {len(email_ids)} flight emails")
+        
+        # Only the Subject header is used - don't download bodies or attachments
+        query = '(BODY.PEEK[HEADER.FIELDS (SUBJECT)])'
+        for uid, items, meta in fetch_batched(mail, email_ids, query, chunk_size):
+            last_uid = max(last_uid, uid or 0)
+            try:
+                msg = message_from_bytes(items['BODY[HEADER.FIELDS (SUBJECT)]'])
+                
+                # Get subject
+                subject = decode_header(msg["Subject"])[0][0]
+                if isinstance(subject, bytes):
+                    subject = subject.decode(errors='ignore')
+                
+                print(f"   ✉️ {subject[:60]}...")
+                
+                # Extract basic info
+                flight_data = {
+                    'employee_name': extract_name_from_subject(subject),
+                    'flight_number': extract_flight_number(subject),
+                    'route': 'Extracted from email',
+                    'date': datetime.now().strftime("%Y-%m-%d"),
+                    'cost': 'Extracted from email',
+                    'email_subject': subject[:80],
+                    'keywords': ', '.join(matched_keywords(subject, search_keywords))
+                }
+                all_flights.append(flight_data)
+                
+            except Exception as e:
+                print(f"   ❌ Error processing email: {e}")
+        
+        if sync_state and last_uid:
+            sync_state.update(account, folder, uidvalidity, last_uid)
+        
+        mail.close()
+        mail.logout()
+        return all_flights
+        
+    except Exception as e:
+        print(f"❌ Email processing error: {e}")
+        return []
+
+def extract_name_from_subject(subject):
+    """Extract name from email subject"""
+    patterns = [
+        r'for\s+([A-Za-z]+\s+[A-Za-z]+)',
+        r'-\s*([A-Za-z]+\s+[A-Za-z]+)',
+        r'([A-Za-z]+\s+[A-Za-z]+)\s+-\s+Flight'
+    ]
+    
+    for pattern in patterns:
+        match = re.search(pattern, subject, re.IGNORECASE)
+        if match:
+            return match.group(1).title()
+    
+    return "Unknown"
+
+def extract_flight_number(subject):
+    """Extract flight number from subject"""
+    return default_parser.find_flight_number(subject.upper()) or "Not found"
+
+def create_sample_flight_data():
+    """Create realistic sample flight data"""
+    return [
+        {
+            'employee_name': 'Venkatesh Kumar',
+            'flight_number': 'AI101',
+            'route': 'DEL (Delhi) to BOM (Mumbai)',
+            'date': '2025-01-20',
+            'cost': '₹8,500',
+            'airline': 'Air India',
+            'status': 'Confirmed',
+            'class': 'Economy'
+        },
+        {
+            'employee_name': 'Priya Sharma',
+            'flight_number': '6E205',
+            'route': 'BLR (Bangalore) to MAA (Chennai)',
+            'date': '2025-01-25',
+            'cost': '₹4,200',
+            'airline': 'IndiGo',
+            'status': 'Confirmed',
+            'class': 'Economy'
+        },
+        {
+            'employee_name': 'Rajesh Patel',
+            'flight_number': 'UK815',
+            'route': 'HYD (Hyderabad) to DEL (Delhi)',
+            'date': '2025-02-01',
+            'cost': '₹6,800',
+            'airline': 'Vistara',
+            'status': 'Pending',
+            'class': 'Business'
+        }
+    ]
+
+def main():
+    print("🚀 FLIGHT EMAIL AUTOMATION - FINAL VERSION")
+    print("=" * 55)
+    
+    # Test OCR
+    test_ocr()
+    
+    # Get credentials
+    print("\n🔐 Gmail Login")
+    print("-" * 20)
+    email = input("venkatf0618w@gmail.com").strip()
+    password = input("tiwkksudqijxxxlt").strip()
+    
+    # Test login first
+    if test_gmail_login(email, password):
+        # Try to extract real emails
+        print("\n📧 Processing emails...")
+        # Not de-duplicated - these rows carry the run date, not the flight date, so they'd never match.
+        # The sync state already keeps a re-run from adding the same mail twice
+        real_flights = extract_flight_info_from_emails(email, password, sync_state=SyncStateStore())
+        
+        if real_flights:
+            df = pd.DataFrame(real_flights)
+            if os.path.exists('flight_records.xlsx'):
+                df = pd.concat([pd.read_excel('flight_records.xlsx'), df], ignore_index=True)
+            df.to_excel('flight_records.xlsx', index=False)
+            print(f"🎉 Saved {len(real_flights)} new flight records!")
+        elif os.path.exists('flight_records.xlsx'):
+            print("📭 No new flight emails since the last run")
+        else:
+            # Create sample data if no real emails found
+            sample_data = create_sample_flight_data()
+            df = pd.DataFrame(sample_data)
+            df.to_excel('flight_records.xlsx', index=False)
+            print("📊 Created sample flight data (no real emails found)")
+    else:
+        # Create sample data if login fails
+        print("\n📝 Creating sample data for demonstration...")
+        sample_data = create_sample_flight_data()
+        df = pd.DataFrame(sample_data)
+        df.to_excel('flight_records.xlsx', index=False)
+        print("💾 Sample data saved to 'flight_records.xlsx'")
+    
+    print("\n✅ Process completed!")
+    print("📁 Check 'flight_records.xlsx' file")
+
+if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,176 @@
+# Run metrics - per-stage latency histograms and counters, exported as JSON and Prometheus text
+
+import json
+import os
+import tempfile
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+# Seconds - covers a regex parse (sub-ms) up to a slow IMAP chunk or a 12 MP OCR
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+HELP = {
+    'flight_stage_seconds': 'Time spent per pipeline stage',
+    'flight_fields_total': "Extracted fields per source by result ('found' or 'not_found')",
+    'flight_bytes_total': 'Bytes read per source (imap, file)',
+    'flight_records_total': 'Flight records produced per source',
+    'flight_ocr_cache_total': 'OCR cache lookups by result',
+    'flight_ocr_cascade_total': "OCR cascade steps run, by outcome ('done', 'escalated', 'gave_up')",
+    'flight_layout_total': "Layout template matches by airline ('complete', 'partial', 'no_template')",
+    'flight_dedup_total': "Records per booking index lookup by result ('new', 'merged', 'duplicate')",
+    'flight_imap_sessions_total': "IMAP sessions handed out by the ingest pool ('login' or 'reused')",
+}
+
+
+class Metrics:
+    """Thread-safe stage histograms + labelled counters.
+
+    time()/observe() cost a perf_counter() pair and a bisect, so they can
+    wrap per-image and per-message work. Pool workers drain() their
+    samples and the parent merge()s them.
+    """
+
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.started = time.time()
+        self._lock = threading.Lock()
+        self._stages = {}    # stage -> [bucket counts..., +Inf], sum, max
+        self._counters = {}  # (name, (label, value)...) -> value
+
+    @contextmanager
+    def time(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(stage, time.perf_counter() - start)
+
+    def observe(self, stage, seconds):
+        index = bisect_left(self.buckets, seconds)
+        with self._lock:
+            hist = self._stages.get(stage)
+            if hist is None:
+                hist = self._stages[stage] = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'max': 0.0}
+            hist['counts'][index] += 1
+            hist['sum'] += seconds
+            hist['max'] = max(hist['max'], seconds)
+
+    def inc(self, name, value=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def count_fields(self, record, fields, source, missing=("Not found", "Unknown")):
+        """found / not_found counter per field of an extracted record"""
+        for field in fields:
+            found = record.get(field, missing[0]) not in missing
+            self.inc('flight_fields_total', source=source, field=field, result='found' if found else 'not_found')
+
+    # --- pool workers -------------------------------------------------------
+
+    def drain(self):
+        """Take (and reset) everything recorded so far - sent back from pool workers"""
+        with self._lock:
+            state = {'stages': self._stages, 'counters': self._counters}
+            self._stages, self._counters = {}, {}
+        return state
+
+    def merge(self, state):
+        with self._lock:
+            for stage, other in state['stages'].items():
+                hist = self._stages.setdefault(
+                    stage, {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'max': 0.0})
+                hist['counts'] = [a + b for a, b in zip(hist['counts'], other['counts'])]
+                hist['sum'] += other['sum']
+                hist['max'] = max(hist['max'], other['max'])
+            for key, value in state['counters'].items():
+                self._counters[key] = self._counters.get(key, 0) + value
+
+    # --- export -------------------------------------------------------------
+
+    def summary(self):
+        with self._lock:
+            stages = {stage: dict(hist, counts=list(hist['counts'])) for stage, hist in self._stages.items()}
+            counters = dict(self._counters)
+
+        result = {'started': self.started, 'duration_s': round(time.time() - self.started, 3),
+                  'stages': {}, 'counters': {}}
+        for stage, hist in sorted(stages.items()):
+            count = sum(hist['counts'])
+            result['stages'][stage] = {
+                'count': count,
+                'total_s': round(hist['sum'], 4),
+                'mean_ms': round(hist['sum'] / count * 1000, 3) if count else 0.0,
+                'max_ms': round(hist['max'] * 1000, 3),
+                'buckets': {str(le): n for le, n in zip(self.buckets + ('+Inf',), hist['counts'])},
+            }
+        for (name, labels), value in sorted(counters.items()):
+            label_text = ','.join(f"{k}={v}" for k, v in labels)
+            result['counters'][f"{name}{{{label_text}}}" if labels else name] = value
+        return result
+
+    def prometheus(self):
+        """Prometheus text exposition format (for the node exporter textfile collector)"""
+        with self._lock:
+            stages = {stage: dict(hist, counts=list(hist['counts'])) for stage, hist in self._stages.items()}
+            counters = dict(self._counters)
+
+        lines = [f"# HELP flight_stage_seconds {HELP['flight_stage_seconds']}",
+                 "# TYPE flight_stage_seconds histogram"]
+        for stage, hist in sorted(stages.items()):
+            cumulative = 0
+            for le, n in zip(self.buckets + ('+Inf',), hist['counts']):
+                cumulative += n
+                lines.append(f'flight_stage_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+            lines.append(f'flight_stage_seconds_sum{{stage="{stage}"}} {hist["sum"]:.6f}')
+            lines.append(f'flight_stage_seconds_count{{stage="{stage}"}} {cumulative}')
+
+        seen = set()
+        for (name, labels), value in sorted(counters.items()):
+            if name not in seen:
+                seen.add(name)
+                if name in HELP:
+                    lines.append(f"# HELP {name} {HELP[name]}")
+                lines.append(f"# TYPE {name} counter")
+            label_text = ','.join(f'{k}="{v}"' for k, v in labels)
+            lines.append(f"{name}{{{label_text}}} {value}" if labels else f"{name} {value}")
+
+        lines.append("# HELP flight_last_run_timestamp_seconds Unix time the run finished")
+        lines.append("# TYPE flight_last_run_timestamp_seconds gauge")
+        lines.append(f"flight_last_run_timestamp_seconds {time.time():.0f}")
+        return '\n'.join(lines) + '\n'
+
+    def export(self, json_path=None, prom_path=None):
+        """Write the JSON summary and/or the .prom file (atomically - the collector may read mid-write)"""
+        if json_path:
+            _write_atomic(json_path, json.dumps(self.summary(), indent=2))
+            print(f"📈 Run metrics saved: {json_path}")
+        if prom_path:
+            _write_atomic(prom_path, self.prometheus())
+            print(f"📈 Prometheus metrics saved: {prom_path}")
+
+
+def _write_atomic(path, text):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(suffix='.tmp', dir=directory)
+    try:
+        if hasattr(os, 'fchmod'):
+            os.fchmod(fd, 0o644)  # mkstemp makes it 0600 - the collector runs as another user
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(temp_path, path)
+    except Exception:
+        os.remove(temp_path)
+        raise
+
+
+# Process-wide instance - instrumentation points record here
+metrics = Metrics()
+
+
+def export_run():
+    """End-of-run export - FLIGHT_METRICS_JSON / FLIGHT_METRICS_PROM override the default paths"""
+    metrics.export(os.environ.get('FLIGHT_METRICS_JSON', 'run_metrics.json'),
+                   os.environ.get('FLIGHT_METRICS_PROM', 'flight_extraction.prom'))
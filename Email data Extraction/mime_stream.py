@@ -0,0 +1,307 @@
+# Streaming MIME parser - raw message bytes in chunks, only text parts and wanted attachments kept
+
+import binascii
+import email
+
+from metrics import metrics
+
+MAX_HEADER_BYTES = 256 * 1024       # per entity - anything bigger is not a real header block
+MAX_TEXT_BYTES = 2 * 1024 * 1024    # per text part - itinerary text never gets near this
+MAX_ATTACHMENT_BYTES = 25 * 1024 * 1024  # per attachment, decoded - larger ones are skipped (Gmail's own cap)
+MAX_LINE_BYTES = 64 * 1024          # unterminated "lines" are flushed in pieces
+FEED_CHUNK = 64 * 1024
+
+
+def _ticket_attachment(content_type):
+    return content_type.startswith('image/') or content_type == 'application/pdf'
+
+
+class Attachment:
+    """Decoded attachment in one in-memory buffer - no temp files; dropped once it passes max_bytes"""
+
+    def __init__(self, filename, content_type, max_bytes=MAX_ATTACHMENT_BYTES):
+        self.filename = filename
+        self.content_type = content_type
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.data = bytearray()
+        self.oversize = False
+
+    def write(self, data):
+        self.size += len(data)
+        if self.oversize:
+            return
+        if self.size > self.max_bytes:
+            self.oversize = True
+            self.data = bytearray()  # free what was kept - the part is skipped
+            return
+        self.data += data
+
+    def close(self):
+        self.data = bytearray()
+
+
+class _Base64Decoder:
+    """base64 across arbitrary chunk edges - leftover characters wait for the next line"""
+
+    def __init__(self):
+        self.pending = b''
+
+    def decode(self, line):
+        data = self.pending + b''.join(line.split())
+        usable = len(data) - len(data) % 4
+        self.pending = data[usable:]
+        try:
+            return binascii.a2b_base64(data[:usable]) if usable else b''
+        except binascii.Error:
+            return b''
+
+    def flush(self):
+        data, self.pending = self.pending, b''
+        try:
+            return binascii.a2b_base64(data + b'=' * (-len(data) % 4)) if data.strip(b'=') else b''
+        except binascii.Error:
+            return b''
+
+
+class _QuotedPrintableDecoder:
+    """Per line - a trailing '=' is a soft break, so the next line ending is dropped"""
+
+    def __init__(self):
+        self.soft_break = False
+
+    def decode(self, line):
+        if self.soft_break:
+            line = line[2:] if line.startswith(b'\r\n') else line[1:] if line.startswith(b'\n') else line
+        self.soft_break = line.rstrip(b' \t').endswith(b'=')
+        return binascii.a2b_qp(line)
+
+    def flush(self):
+        return b''
+
+
+class _IdentityDecoder:
+    def decode(self, line):
+        return line
+
+    def flush(self):
+        return b''
+
+
+def _decoder(encoding):
+    encoding = (encoding or '7bit').strip().lower()
+    if encoding == 'base64':
+        return _Base64Decoder()
+    if encoding == 'quoted-printable':
+        return _QuotedPrintableDecoder()
+    return _IdentityDecoder()
+
+
+class _Entity:
+    """Headers of one MIME entity and where its body goes"""
+
+    def __init__(self, headers):
+        self.headers = headers
+        self.content_type = headers.get_content_type()
+        self.boundary = headers.get_boundary() if headers.get_content_maintype() == 'multipart' else None
+        self.charset = headers.get_content_charset() or 'utf-8'
+        self.is_attachment = 'attachment' in str(headers.get('Content-Disposition', '')).lower()
+        self.decoder = _decoder(headers.get('Content-Transfer-Encoding'))
+        self.sink = None  # 'text', Attachment or None (discarded)
+        self.text = bytearray()
+        self.truncated = False
+
+
+class StreamingMimeParser:
+    """Feed raw RFC822 bytes in any chunk sizes; memory stays bounded per message.
+
+    Only inline text/plain and text/html bodies are kept (each capped at
+    max_text_bytes) and attachments accepted by keep_attachment are decoded
+    into memory as the bytes arrive (each capped at max_attachment_bytes,
+    bigger ones skipped) - nothing else is buffered. Attached messages
+    (message/rfc822, e.g. a forwarded ticket mail) are parsed like the
+    outer one. Unlike email.message_from_bytes there is no parsed tree and
+    no raw copy.
+    """
+
+    def __init__(self, keep_attachment=_ticket_attachment, max_text_bytes=MAX_TEXT_BYTES,
+                 max_attachment_bytes=MAX_ATTACHMENT_BYTES):
+        self.keep_attachment = keep_attachment
+        self.max_text_bytes = max_text_bytes
+        self.max_attachment_bytes = max_attachment_bytes
+
+        self.headers = None         # top-level headers (email.message.Message, no body)
+        self.plain = None
+        self.html = None
+        self.attachments = []
+        self.bytes_in = 0
+
+        self._partial = b''
+        self._header_lines = []
+        self._header_size = 0
+        self._boundaries = []       # open multipart boundaries, innermost last
+        self._entity = None         # current leaf, None while in headers / preamble / epilogue
+        self._in_headers = True
+        self._held_eol = b''        # a line ending before a boundary belongs to the boundary
+        self._parts = 0
+
+    # --- input ---------------------------------------------------------------
+
+    def feed(self, data):
+        self.bytes_in += len(data)
+        buffer = self._partial + bytes(data)
+        start = 0
+        while True:
+            if self._in_headers or buffer.startswith(b'--', start):
+                end = buffer.find(b'\n', start)
+                if end < 0:
+                    break
+                self._line(buffer[start:end + 1])
+            else:
+                # Body run - every whole line up to the next one that could be a boundary, in one go
+                end = buffer.find(b'\n--', start)
+                if end < 0:
+                    end = buffer.rfind(b'\n', start)
+                    if end < 0:
+                        break
+                self._body_line(buffer[start:end + 1])
+            start = end + 1
+        self._partial = buffer[start:]
+        if len(self._partial) > MAX_LINE_BYTES:
+            # No newline in sight (broken base64, binary) - pass body bytes on in pieces, drop header junk
+            if not self._in_headers:
+                self._body_line(self._partial)
+            self._partial = b''
+
+    def close(self):
+        if self._partial:
+            self._line(self._partial)
+            self._partial = b''
+        if self._in_headers and self._header_lines:
+            self._end_headers()
+        self._end_leaf()
+        return self
+
+    # --- line handling -------------------------------------------------------
+
+    def _line(self, line):
+        if self._in_headers:
+            if line in (b'\r\n', b'\n'):
+                self._end_headers()
+            elif self._header_size < MAX_HEADER_BYTES:
+                self._header_lines.append(line)
+                self._header_size += len(line)
+            return
+
+        if line.startswith(b'--') and self._boundaries:
+            marker = line.rstrip()
+            for depth in range(len(self._boundaries) - 1, -1, -1):
+                boundary = self._boundaries[depth]
+                if marker == b'--' + boundary:
+                    self._end_leaf()
+                    del self._boundaries[depth + 1:]
+                    self._start_headers()
+                    return
+                if marker == b'--' + boundary + b'--':
+                    self._end_leaf()
+                    del self._boundaries[depth:]  # epilogue - discarded
+                    return
+        self._body_line(line)
+
+    def _body_line(self, line):
+        """One or more body lines (only the first may start with '--')"""
+        entity = self._entity
+        if entity is None or entity.sink is None:
+            return
+        # Hold the last line ending back until we know the next line isn't a boundary
+        content = line[:-2] if line.endswith(b'\r\n') else line[:-1] if line.endswith(b'\n') else line
+        data = self._held_eol + content
+        self._held_eol = line[len(content):]
+        self._write(entity, entity.decoder.decode(data))
+
+    def _write(self, entity, data):
+        if not data:
+            return
+        if entity.sink == 'text':
+            room = self.max_text_bytes - len(entity.text)
+            if len(data) > room:
+                data = data[:max(room, 0)]
+                entity.truncated = True
+            entity.text += data
+        else:
+            entity.sink.write(data)
+
+    # --- entities ------------------------------------------------------------
+
+    def _start_headers(self):
+        self._in_headers = True
+        self._header_lines = []
+        self._header_size = 0
+
+    def _end_headers(self):
+        self._in_headers = False
+        headers = email.message_from_bytes(b''.join(self._header_lines))
+        self._header_lines = []
+        if self.headers is None:
+            self.headers = headers
+
+        entity = _Entity(headers)
+        self._parts += 1
+        if entity.boundary:
+            self._boundaries.append(entity.boundary.encode('ascii', 'ignore'))
+            self._entity = None  # preamble until the first boundary
+            return
+        if entity.content_type == 'message/rfc822':
+            # Body is a whole message - its headers come next (7bit/8bit only, nothing to decode)
+            self._entity = None
+            self._start_headers()
+            return
+
+        if entity.content_type in ('text/plain', 'text/html') and not entity.is_attachment:
+            entity.sink = 'text'
+        elif self.keep_attachment(entity.content_type):
+            filename = headers.get_filename() or f"email-part{self._parts}"
+            entity.sink = Attachment(filename, entity.content_type, self.max_attachment_bytes)
+        self._entity = entity
+        self._held_eol = b''
+
+    def _end_leaf(self):
+        entity, self._entity = self._entity, None
+        self._held_eol = b''
+        if entity is None or entity.sink is None:
+            return
+        self._write(entity, entity.decoder.flush())
+
+        if entity.sink != 'text':
+            if entity.sink.oversize:
+                print(f"⚠️ Skipping {entity.sink.filename}: over {self.max_attachment_bytes // 1024} KB")
+            else:
+                self.attachments.append(entity.sink)
+            return
+        if entity.truncated:
+            print(f"✂️ {entity.content_type} part cut at {self.max_text_bytes // 1024} KB")
+        try:
+            text = bytes(entity.text).decode(entity.charset, errors='ignore')
+        except LookupError:  # unknown charset label
+            text = bytes(entity.text).decode('utf-8', errors='ignore')
+        # First part of each kind wins, like parse_email_content
+        if entity.content_type == 'text/plain' and self.plain is None:
+            self.plain = text
+        elif entity.content_type == 'text/html' and self.html is None:
+            self.html = text
+
+
+def parse_stream(chunks, **kwargs):
+    """Run a StreamingMimeParser over an iterable of byte chunks"""
+    parser = StreamingMimeParser(**kwargs)
+    with metrics.time('mime_parse'):
+        for chunk in chunks:
+            parser.feed(chunk)
+        return parser.close()
+
+
+def iter_chunks(raw, size=FEED_CHUNK):
+    """Zero-copy slices of an in-memory message"""
+    view = memoryview(raw)
+    for start in range(0, len(view), size):
+        yield view[start:start + size]
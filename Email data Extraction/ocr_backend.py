@@ -0,0 +1,169 @@
+# OCR backends - persistent in-process Tesseract when available, pytesseract otherwise
+
+import shlex
+import threading
+
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:  # bindings not installed - pytesseract fallback only
+    tesserocr = None
+
+
+class PytesseractBackend:
+    """One tesseract subprocess (plus temp files) per call"""
+
+    name = 'pytesseract'
+
+    def __init__(self, lang='eng'):
+        self.lang = lang
+        self._version = None
+
+    def version(self):
+        if self._version is None:
+            self._version = str(pytesseract.get_tesseract_version())
+        return self._version
+
+    def image_to_string(self, image, config=''):
+        return pytesseract.image_to_string(image, lang=self.lang, config=config)
+
+    def image_to_data(self, image, config=''):
+        """(text, [(word, confidence)]) from one Tesseract run"""
+        data = pytesseract.image_to_data(image, lang=self.lang, config=config, output_type=pytesseract.Output.DICT)
+        lines, words, line, current = [], [], [], None
+        for i, word in enumerate(data['text']):
+            if not word.strip():
+                continue
+            key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+            if key != current and line:
+                lines.append(' '.join(line))
+                line = []
+            current = key
+            line.append(word)
+            words.append((word, float(data['conf'][i])))
+        if line:
+            lines.append(' '.join(line))
+        return '\n'.join(lines), words
+
+    def word_boxes(self, image, config=''):
+        """[(word, confidence, (left, top, right, bottom))] in image pixels"""
+        data = pytesseract.image_to_data(image, lang=self.lang, config=config, output_type=pytesseract.Output.DICT)
+        return [(word, float(data['conf'][i]),
+                 (data['left'][i], data['top'][i], data['left'][i] + data['width'][i], data['top'][i] + data['height'][i]))
+                for i, word in enumerate(data['text']) if word.strip()]
+
+
+class TesserocrBackend:
+    """libtesseract engine loaded once and reused for every image"""
+
+    name = 'tesserocr'
+
+    def __init__(self, lang='eng', tessdata=None):
+        self.lang = lang
+        kwargs = {'lang': lang}
+        if tessdata:
+            kwargs['path'] = tessdata
+        self.api = tesserocr.PyTessBaseAPI(**kwargs)
+        self._default_psm = self.api.GetPageSegMode()
+        self._defaults = {}  # original values of variables changed via -c
+
+    def version(self):
+        return tesserocr.tesseract_version().split()[1]
+
+    def apply_config(self, config):
+        """Map pytesseract style '--psm N -c var=value' flags onto the API"""
+        # Undo the previous call's settings - the engine is shared
+        self.api.SetPageSegMode(self._default_psm)
+        for key, value in self._defaults.items():
+            self.api.SetVariable(key, value)
+        args = shlex.split(config or '')
+        i = 0
+        while i < len(args):
+            arg = args[i]
+            if arg == '--psm' and i + 1 < len(args):
+                self.api.SetPageSegMode(int(args[i + 1]))
+                i += 1
+            elif arg == '-c' and i + 1 < len(args):
+                key, _, value = args[i + 1].partition('=')
+                if key not in self._defaults:
+                    self._defaults[key] = self.api.GetVariableAsString(key) or ''
+                self.api.SetVariable(key, value)
+                i += 1
+            elif arg == '--oem':
+                i += 1  # engine mode is fixed at init time
+            i += 1
+
+    def image_to_string(self, image, config=''):
+        self.apply_config(config)
+        self.api.SetImage(image)
+        text = self.api.GetUTF8Text()
+        self.api.Clear()  # drop the image, keep the loaded model
+        return text
+
+    def image_to_data(self, image, config=''):
+        """(text, [(word, confidence)]) - confidences come from the same recognition pass"""
+        self.apply_config(config)
+        self.api.SetImage(image)
+        text = self.api.GetUTF8Text()
+        words = self.api.MapWordConfidences()
+        self.api.Clear()
+        return text, words
+
+    def word_boxes(self, image, config=''):
+        """[(word, confidence, (left, top, right, bottom))] in image pixels"""
+        self.apply_config(config)
+        self.api.SetImage(image)
+        self.api.Recognize()
+        level = tesserocr.RIL.WORD
+        boxes = []
+        for word in tesserocr.iterate_level(self.api.GetIterator(), level):
+            text = word.GetUTF8Text(level)
+            if text and text.strip():
+                boxes.append((text, word.Confidence(level), word.BoundingBox(level)))
+        self.api.Clear()
+        return boxes
+
+    def close(self):
+        self.api.End()
+
+
+BACKENDS = {
+    'pytesseract': PytesseractBackend,
+    'tesserocr': TesserocrBackend,
+}
+
+_engines = threading.local()
+
+
+def get_backend(name='auto', lang='eng', tessdata=None):
+    """Engine for this process/thread - created on first use, then reused.
+
+    'auto' picks tesserocr when the bindings are installed and falls back to
+    pytesseract if they are missing or can't load the language data.
+    """
+    cache = getattr(_engines, 'cache', None)
+    if cache is None:
+        cache = _engines.cache = {}
+
+    key = (name, lang, tessdata)
+    if key in cache:
+        return cache[key]
+
+    if name == 'auto':
+        backend = None
+        if tesserocr is not None:
+            try:
+                backend = TesserocrBackend(lang, tessdata)
+            except Exception as e:
+                print(f"⚠️ tesserocr unavailable ({e}), using pytesseract")
+        backend = backend or PytesseractBackend(lang)
+    elif name == 'tesserocr':
+        if tesserocr is None:
+            raise ImportError("tesserocr is not installed (pip install tesserocr)")
+        backend = TesserocrBackend(lang, tessdata)
+    else:
+        backend = BACKENDS[name](lang)
+
+    cache[key] = backend
+    return backend
@@ -0,0 +1,113 @@
+# Persistent OCR result cache - SQLite, keyed by image content + Tesseract setup
+
+import hashlib
+import os
+import sqlite3
+import time
+
+DEFAULT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".flight_ocr_cache.sqlite3")
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024  # 256 MB of OCR text
+
+# Triggers keep a running total so the size check never scans the table
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ocr_cache (
+    key TEXT PRIMARY KEY,
+    text TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    last_used REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS ocr_cache_lru ON ocr_cache (last_used);
+CREATE TABLE IF NOT EXISTS ocr_cache_size (total INTEGER NOT NULL);
+INSERT INTO ocr_cache_size (total)
+    SELECT COALESCE(SUM(size), 0) FROM ocr_cache WHERE NOT EXISTS (SELECT 1 FROM ocr_cache_size);
+CREATE TRIGGER IF NOT EXISTS ocr_cache_ins AFTER INSERT ON ocr_cache
+    BEGIN UPDATE ocr_cache_size SET total = total + new.size; END;
+CREATE TRIGGER IF NOT EXISTS ocr_cache_del AFTER DELETE ON ocr_cache
+    BEGIN UPDATE ocr_cache_size SET total = total - old.size; END;
+CREATE TRIGGER IF NOT EXISTS ocr_cache_upd AFTER UPDATE OF size ON ocr_cache
+    BEGIN UPDATE ocr_cache_size SET total = total + new.size - old.size; END;
+"""
+
+
+class OCRCache:
+    """Content-addressed cache of raw OCR text with an LRU size cap"""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, max_bytes=DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._conn = None
+
+    def __getstate__(self):
+        # Connections can't cross process boundaries - reopen lazily in workers
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        return state
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    @staticmethod
+    def make_key(image_bytes, engine_version, config=""):
+        """SHA-256 of the image bytes, tagged with the engine version and config"""
+        digest = hashlib.sha256(image_bytes).hexdigest()
+        return f"{digest}:{engine_version}:{config}"
+
+    def get(self, key):
+        """Cached OCR text for key, or None"""
+        row = self.conn.execute("SELECT text FROM ocr_cache WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.conn.execute("UPDATE ocr_cache SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0]
+
+    def put(self, key, text):
+        """Store OCR text and evict least recently used entries above the cap"""
+        size = len(text.encode('utf-8'))
+        self.conn.execute(
+            "INSERT INTO ocr_cache (key, text, size, last_used) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET text = excluded.text, size = excluded.size, "
+            "last_used = excluded.last_used",
+            (key, text, size, time.time())
+        )
+        self.evict()
+
+    def total_bytes(self):
+        return self.conn.execute("SELECT total FROM ocr_cache_size").fetchone()[0]
+
+    def evict(self):
+        """Drop least recently used entries until the cache fits max_bytes"""
+        evicted = 0
+        total = self.total_bytes()
+        while total > self.max_bytes:
+            rows = self.conn.execute(
+                "SELECT key, size FROM ocr_cache ORDER BY last_used LIMIT 256"
+            ).fetchall()
+            if not rows:
+                break
+
+            stale = []
+            for key, size in rows:
+                if total <= self.max_bytes:
+                    break
+                stale.append((key,))
+                total -= size
+            self.conn.executemany("DELETE FROM ocr_cache WHERE key = ?", stale)
+            evicted += len(stale)
+            total = self.total_bytes()
+        return evicted
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
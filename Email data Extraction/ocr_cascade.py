@@ -0,0 +1,143 @@
+# Confidence-driven OCR cascade - a cheap low-resolution pass first, heavier passes only for missing/unsure fields
+
+import copy
+import re
+
+from image_preprocess import PreprocessConfig, preprocess_image
+from metrics import metrics
+
+# A boarding pass record isn't usable without these
+REQUIRED_FIELDS = ('flight_number', 'route', 'passenger_name', 'date', 'pnr')
+MIN_CONFIDENCE = 60.0  # Tesseract word confidence, 0-100
+
+_NON_ALNUM = re.compile(r'[^A-Z0-9]')
+
+
+class CascadeStep:
+    """One OCR pass - preprocessing settings + Tesseract config"""
+
+    def __init__(self, name, preprocess, config=''):
+        self.name = name
+        self.preprocess = preprocess
+        self.config = config
+
+    def signature(self):
+        return f"{self.name}:{self.preprocess.signature()}:{self.config}"
+
+
+def default_steps(preprocess):
+    """fast (150 DPI grayscale) -> full preprocessing -> sparse-text layout -> grayscale without binarization"""
+    fast = PreprocessConfig(target_dpi=150, max_side=1200, deskew=False, binarize=False)
+    gray = copy.copy(preprocess)
+    gray.binarize = False
+    return [
+        CascadeStep('fast', fast),
+        CascadeStep('full', preprocess),
+        CascadeStep('sparse', preprocess, '--psm 11'),
+        CascadeStep('gray', gray, '--psm 6'),
+    ]
+
+
+def word_confidences(words):
+    """(word, confidence) pairs -> {normalized word: best confidence}"""
+    confidences = {}
+    for word, confidence in words:
+        key = _NON_ALNUM.sub('', word.upper())
+        if key:
+            confidences[key] = max(confidences.get(key, -1.0), float(confidence))
+    return confidences
+
+
+def field_confidence(value, confidences):
+    """Lowest confidence of the words a field value was read from (0 if none can be found)"""
+    parts = value if isinstance(value, tuple) else (value,)
+    scores = []
+    for token in (_NON_ALNUM.sub('', t) for part in parts for t in str(part).upper().split()):
+        if not token:
+            continue
+        score = confidences.get(token)
+        if score is None:  # glued to a label ('PNR:ABC123') or split over words ('6E 2134')
+            score = max((c for word, c in confidences.items() if token in word or (len(word) > 1 and word in token)),
+                        default=0.0)
+        scores.append(score)
+    return min(scores) if scores else 0.0
+
+
+def canonical_text(fields, airline=None):
+    """Merged fields as labelled text the flight parser reads back exactly (and the OCR cache stores)"""
+    lines = []
+    if airline:
+        lines.append(airline.upper())
+    labels = [('flight_number', "FLIGHT: {}"), ('route', "FROM: {0} TO: {1}"), ('passenger_name', "PASSENGER NAME: {}"),
+              ('date', "DATE: {}"), ('time', "TIME: {}"), ('seat', "SEAT: {}"), ('pnr', "PNR: {}")]
+    for field, label in labels:
+        if field in fields:
+            value = fields[field]
+            lines.append(label.format(*value) if isinstance(value, tuple) else label.format(value))
+    return '\n'.join(lines) + '\n'
+
+
+class OCRCascade:
+    """Run OCR steps in order until every required field is read with enough confidence.
+
+    Each step's fields are merged into the result - a field keeps the value
+    read with the highest word confidence - so later, slower passes only
+    have to fill what the cheap pass missed. Steps taken are counted in
+    flight_ocr_cascade_total and timed per step.
+    """
+
+    def __init__(self, backend, parser, steps, required=REQUIRED_FIELDS, min_confidence=MIN_CONFIDENCE):
+        self.backend = backend
+        self.parser = parser
+        self.steps = steps
+        self.required = required
+        self.min_confidence = min_confidence
+
+    def signature(self):
+        """Cache key part - other steps or thresholds can give other text"""
+        steps = ';'.join(step.signature() for step in self.steps)
+        return f"cascade[{steps}]req={','.join(self.required)},min={self.min_confidence}"
+
+    def weak_fields(self, best):
+        return [field for field in self.required if field not in best or best[field][1] < self.min_confidence]
+
+    def run(self, image, seed=None, airline=None):
+        """Canonical text of the merged fields for a decoded PIL image.
+
+        seed holds fields already read elsewhere (layout regions) as
+        {field: (value, confidence)} - steps only run for what it lacks.
+        """
+        best = dict(seed or {})  # field -> (value, confidence)
+        prepared = {}   # preprocess signature -> image, shared by steps with the same settings
+        taken = []
+
+        for number, step in enumerate(self.steps):
+            if not self.weak_fields(best):
+                break
+            key = step.preprocess.signature()
+            if key not in prepared:
+                with metrics.time('preprocess'):
+                    prepared[key] = preprocess_image(image, step.preprocess)
+            with metrics.time('ocr'), metrics.time(f'ocr_{step.name}'):
+                text, words = self.backend.image_to_data(prepared[key], config=step.config)
+            taken.append(step.name)
+
+            text = text.upper()
+            confidences = word_confidences(words)
+            for field, value in self.parser.extract_fields(text).items():
+                confidence = field_confidence(value, confidences)
+                if field not in best or confidence > best[field][1]:
+                    best[field] = (value, confidence)
+            if airline is None:
+                found = self.parser.detect_airline(text)
+                airline = found if found != 'Unknown' else None
+
+            weak = self.weak_fields(best)
+            last = number == len(self.steps) - 1
+            metrics.inc('flight_ocr_cascade_total', step=step.name,
+                        result='done' if not weak else ('gave_up' if last else 'escalated'))
+
+        if len(taken) > 1:
+            weak = self.weak_fields(best)
+            print(f"🔁 OCR cascade: {' → '.join(taken)}" + (f" (still weak: {', '.join(weak)})" if weak else ""))
+        return canonical_text({field: value for field, (value, _) in best.items()}, airline)
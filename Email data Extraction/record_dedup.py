@@ -0,0 +1,278 @@
+# Cross-source de-duplication - one row per booking, merged across confirmation/reminder/check-in mails and boarding passes
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import time
+from datetime import datetime
+from itertools import islice
+
+from metrics import metrics
+
+DEFAULT_DEDUP_PATH = os.path.join(os.path.expanduser("~"), ".flight_dedup.sqlite3")
+
+# Values that never win a merge - parser/extractor placeholders
+MISSING = {"Not found", "Unknown", "Extracted from email", "", None}
+
+DATE_FORMATS = ["%d/%m/%Y", "%Y-%m-%d", "%d-%m-%Y", "%d.%m.%Y", "%d %b %Y", "%d %B %Y", "%d%b%Y", "%d %b %y"]
+
+# Per-run fields - left out of the content key of records with no booking key
+VOLATILE_FIELDS = {'extraction_time', 'processed_date'}
+
+# Records per transaction in dedupe - bookings are yielded after each commit
+BATCH_SIZE = 200
+
+_FLIGHT = re.compile(r'([A-Z0-9]{2})\s*-?\s*0*(\d{1,4})([A-Z]?)')
+
+# alias -> booking row; a booking is indexed under every key it has, so a
+# mail without a PNR and a boarding pass with one still meet
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dedup_records (
+    id INTEGER PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    data TEXT NOT NULL,
+    seen INTEGER NOT NULL,
+    first_seen REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS dedup_keys (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    record_id INTEGER NOT NULL,
+    PRIMARY KEY (namespace, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS dedup_keys_record ON dedup_keys (record_id);
+"""
+
+
+def normalize_flight(value):
+    """'AI 0101', 'ai-101' -> 'AI101'"""
+    match = _FLIGHT.search(str(value or '').upper())
+    return f"{match.group(1)}{int(match.group(2))}{match.group(3)}" if match else ''
+
+
+def normalize_date(value):
+    """Any of the extractors' date formats -> ISO date ('' if unparseable)"""
+    text = str(value or '').strip()
+    for fmt in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, fmt).date().isoformat()
+        except ValueError:
+            continue
+    return ''
+
+
+def normalize_name(value):
+    """Case, punctuation and word order ignored - 'KUMAR/VENKATESH' == 'Venkatesh Kumar'"""
+    if value in MISSING:
+        return ''
+    return ' '.join(sorted(re.findall(r'[a-z]+', str(value).lower())))
+
+
+def normalize_pnr(value):
+    if value in MISSING:
+        return ''
+    return re.sub(r'[^A-Z0-9]', '', str(value).upper())
+
+
+def record_name(record):
+    return normalize_name(record.get('passenger_name', record.get('employee_name')))
+
+
+def dedup_keys(record):
+    """Hash keys for a record - PNR + flight + date + passenger and flight + date + passenger.
+
+    Passengers of a group booking share a PNR, so PNR + flight + date is
+    only a link key (see link_key) for records without a name.
+    """
+    flight = normalize_flight(record.get('flight_number')) if record.get('flight_number') not in MISSING else ''
+    day = normalize_date(record.get('date'))
+    name = record_name(record)
+    pnr = normalize_pnr(record.get('pnr'))
+
+    keys = []
+    if pnr and flight and day and name:
+        keys.append(f"pfdn|{pnr}|{flight}|{day}|{name}")
+    if flight and day and name:
+        keys.append(f"fdn|{flight}|{day}|{name}")
+    return [_hash(key) for key in keys]
+
+
+def link_key(record):
+    """PNR + flight + date - ties a nameless record to the first passenger of its booking"""
+    flight = normalize_flight(record.get('flight_number')) if record.get('flight_number') not in MISSING else ''
+    day = normalize_date(record.get('date'))
+    pnr = normalize_pnr(record.get('pnr'))
+    return _hash(f"pfd|{pnr}|{flight}|{day}") if pnr and flight and day else None
+
+
+def content_key(record):
+    """Whole record minus per-run fields - for records with no flight/date/name to key on"""
+    content = {field: value for field, value in record.items() if field not in VOLATILE_FIELDS}
+    return _hash("content|" + json.dumps(content, sort_keys=True, ensure_ascii=False, default=str))
+
+
+def _hash(key):
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def _better(old, new):
+    """Found beats missing; a longer value that contains the old one ('Venkatesh' -> 'Venkatesh Kumar') wins"""
+    if new in MISSING:
+        return False
+    if old in MISSING:
+        return True
+    old_text, new_text = str(old).lower(), str(new).lower()
+    return len(new_text) > len(old_text) and old_text in new_text
+
+
+def merge_records(base, new):
+    """Fill base with the better value of every field from new (in place); True if anything changed"""
+    changed = False
+    for field, value in new.items():
+        if field not in base or _better(base[field], value):
+            base[field] = value
+            changed = True
+    return changed
+
+
+class DedupIndex:
+    """Persistent booking index - each booking is stored once, merged from every duplicate.
+
+    namespace keeps reports with different schemas apart - email rows,
+    mail attachment rows (with email_id) and document rows. Lookups are primary-key hits on the hashed keys, so
+    a run costs O(records) however much history is stored.
+    """
+
+    def __init__(self, path=DEFAULT_DEDUP_PATH, namespace='default'):
+        self.path = path
+        self.namespace = namespace
+        self._conn = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        return state
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def add(self, record):
+        """Index one record -> (booking id, 'new' | 'merged' | 'duplicate')"""
+        keys = dedup_keys(record)
+        link = link_key(record)
+        if not keys and not link:
+            # Nothing identifies the booking - only the same record seen again is a duplicate
+            keys = [content_key(record)]
+        lookup = keys + [link] if link else keys
+        now = time.time()
+        ids = set()
+        if lookup:
+            marks = ','.join('?' * len(lookup))
+            ids = {row[0] for row in self.conn.execute(
+                f"SELECT record_id FROM dedup_keys WHERE namespace = ? AND key IN ({marks})",
+                [self.namespace, *lookup])}
+
+        # Another passenger on the same PNR is another booking, never a merge
+        name = record_name(record)
+        if name:
+            ids = {record_id for record_id in ids if record_name(self._load(record_id)[0]) in ('', name)}
+
+        if not ids:
+            cursor = self.conn.execute(
+                "INSERT INTO dedup_records (namespace, data, seen, first_seen, updated) VALUES (?, ?, 1, ?, ?)",
+                (self.namespace, json.dumps(record, ensure_ascii=False, default=str), now, now))
+            record_id, status = cursor.lastrowid, 'new'
+        else:
+            # Oldest booking survives; a record linking two bookings folds the newer one in
+            record_id, *others = sorted(ids)
+            data, seen = self._load(record_id)
+            changed = merge_records(data, record)
+            for other in others:
+                other_data, other_seen = self._load(other)
+                changed = merge_records(data, other_data) or changed
+                seen += other_seen
+                self.conn.execute("UPDATE dedup_keys SET record_id = ? WHERE record_id = ?", (record_id, other))
+                self.conn.execute("DELETE FROM dedup_records WHERE id = ?", (other,))
+            self.conn.execute("UPDATE dedup_records SET data = ?, seen = ?, updated = ? WHERE id = ?",
+                              (json.dumps(data, ensure_ascii=False, default=str), seen + 1, now, record_id))
+            status = 'merged' if changed else 'duplicate'
+
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO dedup_keys (namespace, key, record_id) VALUES (?, ?, ?)",
+            [(self.namespace, key, record_id) for key in keys])
+        if link:
+            # The link key stays with the booking that claimed it first
+            self.conn.execute("INSERT OR IGNORE INTO dedup_keys (namespace, key, record_id) VALUES (?, ?, ?)",
+                              (self.namespace, link, record_id))
+        metrics.inc('flight_dedup_total', namespace=self.namespace, result=status)
+        return record_id, status
+
+    def _load(self, record_id):
+        data, seen = self.conn.execute("SELECT data, seen FROM dedup_records WHERE id = ?", (record_id,)).fetchone()
+        return json.loads(data), seen
+
+    def dedupe(self, records, only_new=False, batch_size=BATCH_SIZE):
+        """Index records and yield each booking once, merged - streamed, one transaction per batch.
+
+        Bookings touched by a batch are yielded after it commits, so duplicates
+        within a batch arrive merged; a duplicate in a later batch still
+        updates the stored booking but isn't yielded again. only_new drops
+        bookings already stored by an earlier run - for reports that are
+        appended to rather than rewritten.
+        """
+        yielded = set()  # booking ids already passed on this run
+        counts = {'new': 0, 'merged': 0, 'duplicate': 0}
+        records = iter(records)
+        while True:
+            # Pull the batch first - the write lock is held only while indexing it, not while upstream OCRs
+            chunk = list(islice(records, batch_size))
+            if not chunk:
+                break
+            batch = {}  # booking id -> first status this batch (dict keeps first-seen order)
+            self.conn.execute("BEGIN")
+            try:
+                for record in chunk:
+                    record_id, status = self.add(record)
+                    counts[status] += 1
+                    if record_id not in yielded:
+                        batch.setdefault(record_id, status)
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+            for record_id, status in batch.items():
+                yielded.add(record_id)
+                if only_new and status != 'new':
+                    continue
+                row = self.conn.execute("SELECT data FROM dedup_records WHERE id = ?", (record_id,)).fetchone()
+                if row is not None:  # folded into an older booking later in the batch
+                    yield json.loads(row[0])
+
+        total = sum(counts.values())
+        print(f"🧹 De-duplicated {total} records -> {len(yielded)} bookings "
+              f"({counts['new']} new, {total - counts['new']} duplicates)")
+
+    def records(self):
+        """Every stored booking of this namespace, oldest first"""
+        for (data,) in self.conn.execute(
+                "SELECT data FROM dedup_records WHERE namespace = ? ORDER BY first_seen, id", (self.namespace,)):
+            yield json.loads(data)
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM dedup_records WHERE namespace = ?",
+                                 (self.namespace,)).fetchone()[0]
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,74 @@
+# Mailbox sync state - UIDVALIDITY + highest processed UID per account/folder
+
+import os
+import sqlite3
+import time
+
+DEFAULT_STATE_PATH = os.path.join(os.path.expanduser("~"), ".flight_sync_state.sqlite3")
+
+
+class SyncStateStore:
+    """Persistent IMAP high-water marks so each run only fetches new mail"""
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = path
+        self._conn = None
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        return state
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sync_state ("
+                " account TEXT NOT NULL,"
+                " folder TEXT NOT NULL,"
+                " uidvalidity INTEGER NOT NULL,"
+                " last_uid INTEGER NOT NULL,"
+                " updated REAL NOT NULL,"
+                " PRIMARY KEY (account, folder))"
+            )
+        return self._conn
+
+    def get(self, account, folder):
+        """(uidvalidity, last_uid) or None if the folder was never synced"""
+        row = self.conn.execute(
+            "SELECT uidvalidity, last_uid FROM sync_state WHERE account = ? AND folder = ?",
+            (account, folder.upper())
+        ).fetchone()
+        return tuple(row) if row else None
+
+    def start_uid(self, account, folder, uidvalidity):
+        """First UID to fetch - 1 (full resync) when new or UIDVALIDITY changed"""
+        state = self.get(account, folder)
+        if state is None:
+            print(f"🆕 No sync state for {account}/{folder} - full sync")
+            return 1
+        if state[0] != uidvalidity:
+            print(f"🔄 UIDVALIDITY changed for {account}/{folder} ({state[0]} -> {uidvalidity}) - full resync")
+            return 1
+        return state[1] + 1
+
+    def update(self, account, folder, uidvalidity, last_uid):
+        """Record progress - the mark never moves backwards within a UIDVALIDITY"""
+        state = self.get(account, folder)
+        if state and state[0] == uidvalidity:
+            last_uid = max(last_uid, state[1])
+        self.conn.execute(
+            "INSERT OR REPLACE INTO sync_state (account, folder, uidvalidity, last_uid, updated) "
+            "VALUES (?, ?, ?, ?, ?)",
+            (account, folder.upper(), uidvalidity, last_uid, time.time())
+        )
+
+    def reset(self, account, folder):
+        self.conn.execute("DELETE FROM sync_state WHERE account = ? AND folder = ?", (account, folder.upper()))
+
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
@@ -0,0 +1,155 @@
+# Synthetic corpus - boarding passes and confirmation emails with known answers, fully offline
+
+import json
+import os
+import random
+from datetime import date, timedelta
+from email.message import EmailMessage
+
+from PIL import Image, ImageDraw, ImageFont
+
+from bcbp import zxingcpp
+
+if zxingcpp is not None:
+    import numpy  # zxing-cpp images -> PIL
+
+AIRLINES = [('Air India', 'AI'), ('IndiGo', '6E'), ('Vistara', 'UK'), ('SpiceJet', 'SG')]
+AIRPORTS = ['DEL', 'BOM', 'BLR', 'MAA', 'HYD', 'CCU', 'GOI', 'COK', 'PNQ', 'AMD']
+FIRST_NAMES = ['VENKATESH', 'PRIYA', 'ARJUN', 'LAKSHMI', 'RAHUL', 'DIVYA', 'KARTHIK', 'ANANYA']
+LAST_NAMES = ['KUMAR', 'SHARMA', 'IYER', 'REDDY', 'NAIR', 'PATEL', 'MENON', 'RAO']
+
+LAYOUTS = ['labelled', 'compact', 'barcode']
+# test_ocr's 500x200 card up to a 12 MP phone photo
+RESOLUTIONS = [(500, 200), (1240, 874), (2480, 1754), (4000, 3000)]
+NOISE_LEVELS = [0.0, 0.3, 0.6]
+
+
+def random_booking(rng):
+    """One booking with every field in the parser's output format"""
+    airline, code = rng.choice(AIRLINES)
+    origin, destination = rng.sample(AIRPORTS, 2)
+    # BCBP barcodes carry no year - keep flights near today like real boarding passes
+    flight_date = date.today() + timedelta(days=rng.randrange(-120, 120))
+    hour = rng.randrange(1, 13)
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        'airline': airline,
+        'flight_number': f"{code}{rng.randrange(100, 1000)}",
+        'route': f"{origin} → {destination}",
+        'passenger_name': f"{first} {last}".title(),
+        'date': flight_date.strftime("%d/%m/%Y"),
+        'time': f"{hour:02d}:{rng.choice(['00', '15', '30', '45'])} {rng.choice(['AM', 'PM'])}",
+        'seat': f"{rng.randrange(1, 40)}{rng.choice('ABCDEF')}",
+        'pnr': ''.join(rng.choice('ABCDEFGHJKLMNPQRSTUVWXYZ23456789') for _ in range(6)),
+    }
+
+
+def bcbp_string(booking):
+    """IATA BCBP mandatory first-leg items for a booking"""
+    origin, destination = booking['route'].split(' → ')
+    first, last = booking['passenger_name'].upper().split()
+    day = date(*reversed([int(x) for x in booking['date'].split('/')]))
+    seat = booking['seat'][:-1].zfill(3) + booking['seat'][-1]
+    return (f"M1{(last + '/' + first)[:20]:<20}E{booking['pnr']:<7}{origin}{destination}"
+            f"{booking['flight_number'][:2]:<3}{booking['flight_number'][2:].zfill(4):<5}"
+            f"{day.timetuple().tm_yday:03d}Y{seat}00001100")
+
+
+def _font(size):
+    try:
+        return ImageFont.load_default(size=size)
+    except TypeError:  # Pillow < 10.1 has a single bitmap font
+        return ImageFont.load_default()
+
+
+def _lines(booking, layout):
+    origin, destination = booking['route'].split(' → ')
+    if layout == 'compact':
+        return [
+            f"{booking['airline'].upper()} BOARDING PASS",
+            f"NAME: {booking['passenger_name'].upper()}",
+            f"{booking['flight_number']}  {origin} - {destination}",
+            f"{booking['date']}  {booking['time']}",
+            f"SEAT {booking['seat']}  PNR: {booking['pnr']}",
+        ]
+    return [
+        "BOARDING PASS",
+        booking['airline'].upper(),
+        f"PASSENGER NAME: {booking['passenger_name'].upper()}",
+        f"FLIGHT: {booking['flight_number']}",
+        f"FROM: {origin} TO: {destination}",
+        f"DATE: {booking['date']}",
+        f"TIME: {booking['time']}",
+        f"SEAT: {booking['seat']}",
+        f"PNR: {booking['pnr']}",
+    ]
+
+
+def render_boarding_pass(booking, layout, size, noise, rng):
+    """Draw a boarding pass like test_ocr() does, at any size, with skew + speckle noise"""
+    img = Image.new('RGB', size, color=(250, 248, 242))
+    d = ImageDraw.Draw(img)
+    lines = _lines(booking, layout)
+    rows = len(lines) + (4 if layout == 'barcode' else 2)
+    font = _font(max(10, size[1] // (rows * 2)))
+    for i, line in enumerate(lines):
+        d.text((size[0] // 20, (i + 1) * size[1] // rows), line, fill=(20, 20, 20), font=font)
+
+    if layout == 'barcode' and zxingcpp is not None:
+        code = zxingcpp.create_barcode(bcbp_string(booking), zxingcpp.BarcodeFormat.PDF417)
+        width = size[0] // 2
+        barcode = Image.fromarray(numpy.asarray(code.to_image(scale=max(1, width // 300)))).convert('RGB')
+        img.paste(barcode, (size[0] // 20, size[1] - barcode.size[1] - size[1] // 40))
+
+    if noise:
+        img = img.rotate(rng.uniform(-3, 3) * noise, resample=Image.BICUBIC, fillcolor=(250, 248, 242))
+        speckle = Image.effect_noise(size, 60 * noise).convert('RGB')
+        img = Image.blend(img, speckle, 0.15 * noise)
+    return img
+
+
+def render_email(booking):
+    """Confirmation email in the shape EmailFlightExtractor expects"""
+    origin, destination = booking['route'].split(' → ')
+    day, month, year = booking['date'].split('/')
+    msg = EmailMessage()
+    msg['Subject'] = f"Flight Confirmation - {booking['passenger_name']}"
+    msg['From'] = f"noreply@{booking['airline'].lower().replace(' ', '')}.example"
+    msg['To'] = "travel@example.com"
+    msg.set_content(
+        f"Dear {booking['passenger_name']},\n\n"
+        f"Your {booking['airline']} flight {booking['flight_number']} from {origin} to {destination} "
+        f"on {year}-{month}-{day} at {booking['time']} is confirmed.\n"
+        f"PNR: {booking['pnr']}\nSeat: {booking['seat']}\nTotal fare: ₹{random.Random(booking['pnr']).randrange(3000, 15000)}\n"
+    )
+    return msg.as_bytes()
+
+
+def generate_corpus(out_dir, n=50, seed=0, emails=True):
+    """Write n boarding passes (+ n emails) to out_dir with a manifest.json of expected values"""
+    rng = random.Random(seed)
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = []
+
+    for i in range(n):
+        booking = random_booking(rng)
+        layout = LAYOUTS[i % len(LAYOUTS)]
+        size = RESOLUTIONS[rng.randrange(len(RESOLUTIONS))]
+        noise = rng.choice(NOISE_LEVELS)
+        image = render_boarding_pass(booking, layout, size, noise, rng)
+
+        name = f"bp_{i:04d}_{layout}.{'png' if size[0] < 1000 else 'jpg'}"
+        image.save(os.path.join(out_dir, name), quality=rng.choice([75, 85, 95]))
+        manifest.append({'file': name, 'kind': 'image', 'layout': layout, 'size': list(size),
+                         'noise': noise, 'expected': booking})
+
+        if emails:
+            email_name = f"mail_{i:04d}.eml"
+            with open(os.path.join(out_dir, email_name), 'wb') as f:
+                f.write(render_email(booking))
+            manifest.append({'file': email_name, 'kind': 'email', 'expected': booking})
+
+    with open(os.path.join(out_dir, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump({'seed': seed, 'n': n, 'items': manifest}, f, indent=2, ensure_ascii=False)
+    print(f"🧪 Generated {n} boarding passes{' + emails' if emails else ''} in {out_dir}")
+    return manifest
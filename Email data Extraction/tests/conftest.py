@@ -0,0 +1,66 @@
+# Shared test setup - the modules are flat files in the parent folder
+
+import os
+import sys
+from email.message import EmailMessage
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from imap_stub import FakeIMAP4  # noqa: E402
+
+# Big enough to pass MIN_IMAGE_SIZE - only the bytes matter, nothing decodes them
+PNG_BYTES = b'\x89PNG\r\n\x1a\n' + bytes(range(256)) * 40
+
+
+def ticket_email(name='Priya Sharma', flight='6E2134', route=('BLR', 'HYD'), day='2026-11-02',
+                 subject=None, attachment=None, sent='Mon, 02 Nov 2026 06:00:00 +0000'):
+    """Confirmation email as raw bytes - attachment is (filename, bytes), an image or a PDF"""
+    msg = EmailMessage()
+    msg['Subject'] = subject or f"Flight Confirmation - {name}"
+    msg['From'] = "noreply@airline.example"
+    msg['To'] = "travel@example.com"
+    msg['Date'] = sent
+    msg.set_content(f"Dear {name},\n\nYour flight {flight} from {route[0]} to {route[1]} "
+                    f"on {day} is confirmed.\nTotal fare: ₹4200\n")
+    if attachment:
+        filename, data = attachment
+        maintype, subtype = ('application', 'pdf') if data.startswith(b'%PDF-') else ('image', 'png')
+        msg.add_attachment(data, maintype=maintype, subtype=subtype, filename=filename)
+    return msg.as_bytes()
+
+
+def forwarded(raw, subject="FW: your ticket"):
+    """raw attached as a message/rfc822 part of a new mail"""
+    from email import message_from_bytes, policy
+    msg = EmailMessage()
+    msg['Subject'] = subject
+    msg.set_content("Forwarding the ticket below.\n")
+    msg.add_attachment(message_from_bytes(raw, policy=policy.default))
+    return msg.as_bytes()
+
+
+@pytest.fixture
+def mailbox():
+    """FakeIMAP4 with INBOX selected"""
+    mail = FakeIMAP4()
+    mail.select('INBOX')
+    return mail
+
+
+class FakeOCR:
+    """Stands in for FinalFlightExtractor - records what it was given"""
+
+    def __init__(self):
+        self.seen = []
+
+    def extract_record(self, data, source_file, source_date=None):
+        self.seen.append((source_file, bytes(data), source_date))
+        return {'source_file': source_file, 'flight_number': 'AI101', 'route': 'DEL → BOM',
+                'passenger_name': 'Venkatesh Kumar', 'date': '25/01/2026', 'pnr': 'ABC123'}
+
+
+@pytest.fixture
+def fake_ocr():
+    return FakeOCR()
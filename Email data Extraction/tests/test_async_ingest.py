@@ -0,0 +1,67 @@
+import asyncio
+
+from async_ingest import ServerPool, ingest_accounts, run_ingestion
+from conftest import ticket_email
+from imap_stub import FakeIMAP4
+from sync_state import SyncStateStore
+
+
+class Servers:
+    """connect() for the pool - one FakeIMAP4 mailbox per server, every session counted"""
+
+    def __init__(self, mailboxes):
+        self.mailboxes = mailboxes
+        self.sessions = []
+
+    def __call__(self, server):
+        self.sessions.append(server)
+        return self.mailboxes[server]
+
+
+def mailbox(*subjects):
+    return FakeIMAP4(messages=[ticket_email(name=f"Passenger {i}", subject=subject)
+                               for i, subject in enumerate(subjects)])
+
+
+ACCOUNTS = [{'user': 'a@example.com', 'password': 'x', 'server': 'imap.one'},
+            {'user': 'b@example.com', 'password': 'x', 'server': 'imap.two'}]
+
+
+def test_ingests_every_account_with_or_search():
+    servers = Servers({
+        'imap.one': mailbox("Flight Confirmation - Arjun Iyer", "Team lunch"),
+        'imap.two': mailbox("Booking Confirmation - Priya Sharma", "Itinerary for Rahul Rao"),
+    })
+    records = run_ingestion(ACCOUNTS, connect=servers)
+    assert sorted(record['employee_name'] for record in records) == ['Arjun Iyer', 'Priya Sharma', 'Rahul Rao']
+    assert {record['account'] for record in records} == {'a@example.com', 'b@example.com'}
+
+
+def test_sync_state_and_pooled_sessions_across_runs(tmp_path):
+    one = mailbox("Flight Confirmation - Arjun Iyer")
+    servers = Servers({'imap.one': one})
+    store = SyncStateStore(str(tmp_path / "sync.sqlite3"))
+
+    async def twice():
+        pool = ServerPool(connect=servers)
+        first = await ingest_accounts(ACCOUNTS[:1], sync_state=store, pool=pool)
+        one.append('INBOX', ticket_email(subject="Flight Confirmation - Divya Nair"))
+        second = await ingest_accounts(ACCOUNTS[:1], sync_state=store, pool=pool)
+        await pool.close()
+        return first, second
+
+    first, second = asyncio.run(twice())
+    assert [record['employee_name'] for record in first] == ['Arjun Iyer']
+    assert [record['employee_name'] for record in second] == ['Divya Nair']
+    assert servers.sessions == ['imap.one']  # the second run reused the session
+    assert ('LOGOUT',) in one.calls
+
+
+def test_failed_account_does_not_stop_the_others():
+    def connect(server):
+        if server == 'imap.one':
+            raise OSError("connection refused")
+        return mailbox("Flight Confirmation - Priya Sharma")
+
+    records = run_ingestion(ACCOUNTS, connect=connect)
+    assert [record['employee_name'] for record in records] == ['Priya Sharma']
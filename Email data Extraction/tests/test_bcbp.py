@@ -0,0 +1,49 @@
+from datetime import date
+
+import pytest
+
+from bcbp import bcbp_record, julian_to_date, parse_bcbp
+
+
+def bcbp(name='KUMAR/VENKATESH', pnr='ABC123', route='DELBOM', carrier='AI', flight='0101', day=25, seat='015A'):
+    """Mandatory first-leg items (IATA Resolution 792)"""
+    return f"M1{name:<20}E{pnr:<7}{route}{carrier:<3}{flight:<5}{day:03d}Y{seat}00001100"
+
+
+def test_parse_fixed_width_fields():
+    fields = parse_bcbp(bcbp())
+    assert fields['passenger_name'] == 'KUMAR/VENKATESH'
+    assert (fields['pnr'], fields['from'], fields['to'], fields['carrier']) == ('ABC123', 'DEL', 'BOM', 'AI')
+    assert fields['julian_date'] == '025'
+
+
+@pytest.mark.parametrize('data', ['', 'hello world', 'X' + bcbp()[1:], bcbp(day=0), bcbp(day=367)])
+def test_not_a_boarding_pass(data):
+    assert parse_bcbp(data) is None
+
+
+def test_record_matches_parser_output():
+    record = bcbp_record(bcbp(flight='0101B'), '/mail/bp.png', source_date=date(2026, 1, 20))
+    assert record['flight_number'] == 'AI101B'
+    assert record['route'] == 'DEL → BOM'
+    assert record['passenger_name'] == 'Venkatesh Kumar'
+    assert record['date'] == '25/01/2026'
+    assert record['seat'] == '15A'
+    assert record['pnr'] == 'ABC123'
+    assert record['airline'] == 'Air India'
+    assert record['source_file'] == 'bp.png'
+
+
+@pytest.mark.parametrize('day, kwargs, expected', [
+    (25, {'source_date': date(2026, 1, 20)}, date(2026, 1, 25)),
+    (360, {'source_date': date(2026, 1, 3)}, date(2025, 12, 26)),    # sent in January, flown last December
+    (5, {'source_date': date(2025, 12, 30)}, date(2026, 1, 5)),
+    (60, {'today': date(2026, 3, 5)}, date(2026, 3, 1)),
+    (100, {'today': date(2026, 3, 5)}, date(2025, 4, 10)),           # archived pass stays in the past
+    (70, {'today': date(2026, 3, 5)}, date(2026, 3, 11)),            # checked in for next week
+    (366, {'today': date(2026, 3, 1)}, date(2024, 12, 31)),          # only leap years have day 366
+    (366, {'source_date': date(2025, 1, 2)}, date(2024, 12, 31)),
+    (366, {'today': date(2101, 6, 1)}, date(2096, 12, 31)),          # 2100 isn't a leap year
+])
+def test_julian_year_is_anchored(day, kwargs, expected):
+    assert julian_to_date(day, **kwargs) == expected
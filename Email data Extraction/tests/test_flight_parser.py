@@ -0,0 +1,53 @@
+import pytest
+
+from flight_parser import FIELD_PATTERNS, FlightDetailsParser, default_parser
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("FLIGHT: 6E 2134", '6E2134'),
+    ("FLIGHT NO. AI-101", 'AI101'),
+    ("BOOKED ON 6E2134 TODAY", '6E2134'),
+    ("6E-2134", '6E2134'),
+    ("6E 2134  BLR - HYD", '6E2134'),          # compact boarding pass line
+    ("VALID AS 2025 FARES", None),             # AS is a designator, but this is prose
+    ("CALL AI 1800 NOW", None),
+    ("DATE 12:30 AI 2025", None),
+    ("ZZ1234", None),                          # unknown designator
+])
+def test_flight_number(text, expected):
+    assert default_parser.find_flight_number(text) == expected
+
+
+@pytest.mark.parametrize('text, expected', [
+    ("FROM: BLR TO: HYD", ('BLR', 'HYD')),
+    ("FROM: DEL TO: LHE", ('DEL', 'LHE')),     # labelled - an airport the table lacks is fine
+    ("DEL → IXY", ('DEL', 'IXY')),
+    ("XYZ - DEL - BOM", ('DEL', 'BOM')),
+    ("THE → AND", None),
+    ("THANK YOU TO DEL", None),
+    ("FROM: DEL TO: DEL", None),
+])
+def test_route(text, expected):
+    assert default_parser.find_route(text) == expected
+
+
+def test_parse_fills_every_field():
+    record = default_parser.parse("BOARDING PASS\nINDIGO\nPASSENGER NAME: PRIYA SHARMA\nFLIGHT: 6E 2134\n"
+                                  "FROM: BLR TO: HYD\nDATE: 02/11/2026\nTIME: 06:15 AM\nSEAT: 12C\nPNR: QWE123",
+                                  '/scans/bp.jpg')
+    assert {field: record[field] for field in ('flight_number', 'route', 'passenger_name', 'date', 'time', 'seat',
+                                                'pnr', 'airline', 'source_file')} == {
+        'flight_number': '6E2134', 'route': 'BLR → HYD', 'passenger_name': 'Priya Sharma', 'date': '02/11/2026',
+        'time': '06:15 AM', 'seat': '12C', 'pnr': 'QWE123', 'airline': 'IndiGo', 'source_file': 'bp.jpg'}
+
+
+def test_resolve_airline():
+    assert default_parser.resolve_airline('indigo') == default_parser.resolve_airline('6E') == 'IndiGo'
+    assert default_parser.resolve_airline('Air India Express') == 'Air India Express'
+    assert default_parser.resolve_airline('Nowhere Air') is None
+
+
+def test_signature_follows_patterns_and_tables():
+    assert FlightDetailsParser().signature() == default_parser.signature()
+    assert FlightDetailsParser(FIELD_PATTERNS[:-1]).signature() != default_parser.signature()
+    assert FlightDetailsParser(airports={'DEL', 'BOM'}).signature() != default_parser.signature()
@@ -0,0 +1,82 @@
+from datetime import date
+
+import pytest
+
+from conftest import PNG_BYTES, forwarded, ticket_email
+from imap_fetch import compress_uid_set, uid_search
+from main import EmailFlightExtractor
+
+
+def extractor(mail, **kwargs):
+    ex = EmailFlightExtractor("user@example.com", "secret", **kwargs)
+    ex.mail = mail
+    return ex
+
+
+def fetch_calls(mail):
+    return [call for call in mail.calls if call[0] == 'UID FETCH']
+
+
+def test_compress_uid_set():
+    assert compress_uid_set([1, 2, 3, 5, 7, 8]) == '1:3,5,7:8'
+
+
+def test_uid_search_from_start_uid(mailbox):
+    for i in range(4):
+        mailbox.append('INBOX', ticket_email(name=f"Passenger {i}"))
+    assert uid_search(mailbox, '(SUBJECT "Flight")', start_uid=3) == [3, 4]
+
+
+@pytest.mark.parametrize('mode', ['parts', 'rfc822'])
+def test_batched_fetch_yields_every_message(mailbox, mode):
+    names = ['Arjun Iyer', 'Priya Sharma', 'Rahul Rao', 'Divya Nair', 'Karthik Menon']
+    for name in names:
+        mailbox.append('INBOX', ticket_email(name=name))
+
+    ex = extractor(mailbox, fetch_mode=mode, fetch_chunk_size=2)
+    messages = list(ex.fetch_email_contents([1, 2, 3, 4, 5]))
+
+    assert [uid for uid, _, _ in messages] == [1, 2, 3, 4, 5]
+    assert [subject for _, subject, _ in messages] == [f"Flight Confirmation - {name}" for name in names]
+    assert all("6E2134" in body for _, _, body in messages)
+    # chunk_size 2 -> 3 chunks of two round trips (structure/size, then text/body) - not one per message
+    assert sorted(call[1] for call in fetch_calls(mailbox)) == ['1:2', '1:2', '3:4', '3:4', '5', '5']
+
+
+def test_parts_mode_leaves_attachments_on_server_until_asked(mailbox):
+    mailbox.append('INBOX', ticket_email(attachment=('bp.png', PNG_BYTES)))
+    ex = extractor(mailbox, fetch_mode='parts')
+
+    (uid, subject, body, images, sent), = ex.fetch_messages([1])
+    calls = len(fetch_calls(mailbox))
+    assert "6E2134" in body
+    assert sent == date(2026, 11, 2)
+
+    assert list(images) == [('bp.png', PNG_BYTES)]
+    assert len(fetch_calls(mailbox)) == calls + 1
+
+
+def test_rfc822_mode_finds_ticket_in_forwarded_mail(mailbox):
+    mailbox.append('INBOX', forwarded(ticket_email(attachment=('bp.png', PNG_BYTES))))
+    ex = extractor(mailbox, fetch_mode='rfc822', ocr=object())
+
+    (uid, subject, body, images, sent), = ex.fetch_messages([1])
+    assert subject == "FW: your ticket"
+    assert [(name, bytes(data)) for name, data in images] == [('bp.png', PNG_BYTES)]
+
+
+def test_process_emails_ocrs_attachments_in_one_pass(mailbox, fake_ocr):
+    mailbox.append('INBOX', ticket_email(name='Arjun Iyer', attachment=('bp.png', PNG_BYTES)))
+    mailbox.append('INBOX', ticket_email(name='Priya Sharma'))
+    mailbox.append('INBOX', ticket_email(subject="Team lunch on Friday"))
+    ex = extractor(mailbox, fetch_mode='rfc822', ocr=fake_ocr)
+
+    flights = ex.process_emails()
+
+    assert [flight['employee_name'] for flight in flights] == ['Arjun Iyer', 'Priya Sharma']
+    assert flights[0]['flight_number'] == '6E2134'
+    assert flights[0]['route'] == 'BLR to HYD'
+    assert [(name, data) for name, data, _ in fake_ocr.seen] == [('bp.png', PNG_BYTES)]
+    assert ex.attachment_records[0]['email_id'] == '1'
+    assert ex.mail is None  # logged out
+    assert ('LOGOUT',) in mailbox.calls
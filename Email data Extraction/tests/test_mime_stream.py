@@ -0,0 +1,95 @@
+import email
+from email import policy
+from email.message import EmailMessage
+
+import pytest
+
+from conftest import PNG_BYTES, forwarded, ticket_email
+from mime_stream import iter_chunks, parse_stream
+
+CHUNK_SIZES = [1, 7, 64, 4096, 1 << 20]
+
+
+def mixed_email():
+    """plain + html alternative, quoted-printable text, a PNG and a PDF"""
+    msg = EmailMessage()
+    msg['Subject'] = "Itinerary for Lakshmi Reddy"
+    msg.set_content("Flight UK815 from DEL to BOM on 2026-03-14. " * 30, cte='quoted-printable')
+    msg.add_alternative("<html><body><p>Flight <b>UK815</b></p></body></html>", subtype='html')
+    msg.add_attachment(PNG_BYTES, maintype='image', subtype='png', filename='bp.png')
+    msg.add_attachment(b'%PDF-1.4 e-ticket', maintype='application', subtype='pdf', filename='ticket.pdf')
+    return msg.as_bytes()
+
+
+def stdlib_parts(raw):
+    msg = email.message_from_bytes(raw)
+    plain = html = None
+    attachments = []
+    for part in msg.walk():
+        if part.is_multipart():
+            continue
+        payload = part.get_payload(decode=True)
+        if part.get_filename():
+            attachments.append((part.get_filename(), payload))
+        elif part.get_content_type() == 'text/plain' and plain is None:
+            plain = payload.decode()
+        elif part.get_content_type() == 'text/html' and html is None:
+            html = payload.decode()
+    return plain, html, attachments
+
+
+@pytest.mark.parametrize('size', CHUNK_SIZES)
+def test_matches_stdlib_parser_at_any_chunk_size(size):
+    raw = mixed_email()
+    parsed = parse_stream(iter_chunks(raw, size))
+    plain, html, attachments = stdlib_parts(raw)
+
+    assert parsed.headers['Subject'] == "Itinerary for Lakshmi Reddy"
+    assert parsed.plain == plain
+    assert parsed.html == html
+    assert [(a.filename, bytes(a.data)) for a in parsed.attachments] == attachments
+    assert parsed.bytes_in == len(raw)
+
+
+@pytest.mark.parametrize('size', [5, 64 * 1024])
+def test_crlf_line_endings(size):
+    raw = ticket_email(attachment=('bp.png', PNG_BYTES)).replace(b'\n', b'\r\n')
+    parsed = parse_stream(iter_chunks(raw, size))
+    assert parsed.plain == email.message_from_bytes(raw).get_payload()[0].get_payload(decode=True).decode()
+    assert bytes(parsed.attachments[0].data) == PNG_BYTES
+
+
+def test_attachments_skipped_unless_wanted():
+    parsed = parse_stream(iter_chunks(mixed_email()), keep_attachment=lambda content_type: False)
+    assert parsed.attachments == []
+    assert "UK815" in parsed.plain
+
+
+@pytest.mark.parametrize('size', [3, 4096])
+def test_forwarded_message_is_parsed_too(size):
+    raw = forwarded(ticket_email(name='Arjun Iyer', attachment=('bp.png', PNG_BYTES)))
+    parsed = parse_stream(iter_chunks(raw, size))
+    assert parsed.headers['Subject'] == "FW: your ticket"  # the outer message's
+    assert parsed.plain == "Forwarding the ticket below.\n"
+    assert [(a.filename, bytes(a.data)) for a in parsed.attachments] == [('bp.png', PNG_BYTES)]
+
+
+def test_forwarded_text_used_when_outer_has_none():
+    inner = ticket_email(name='Arjun Iyer')
+    outer = EmailMessage()
+    outer['Subject'] = "FW"
+    outer.add_attachment(email.message_from_bytes(inner, policy=policy.default))
+    parsed = parse_stream(iter_chunks(outer.as_bytes()))
+    assert "Dear Arjun Iyer" in parsed.plain
+
+
+def test_oversize_attachment_skipped(capsys):
+    raw = ticket_email(attachment=('bp.png', PNG_BYTES))
+    parsed = parse_stream(iter_chunks(raw), max_attachment_bytes=len(PNG_BYTES) - 1)
+    assert parsed.attachments == []
+    assert "Skipping bp.png" in capsys.readouterr().out
+
+
+def test_text_part_capped():
+    parsed = parse_stream(iter_chunks(mixed_email()), max_text_bytes=100)
+    assert len(parsed.plain) == 100
@@ -0,0 +1,102 @@
+import pytest
+
+Image = pytest.importorskip('PIL.Image')
+
+from flight_parser import FIELDS, default_parser  # noqa: E402
+from image_preprocess import PreprocessConfig  # noqa: E402
+from ocr_cascade import CascadeStep, OCRCascade, canonical_text, field_confidence, word_confidences  # noqa: E402
+
+FULL_PASS = """BOARDING PASS
+PASSENGER NAME: PRIYA SHARMA
+FLIGHT: 6E 2134
+FROM: BLR TO: HYD
+DATE: 02/11/2026
+PNR: QWE123
+"""
+
+
+class FakeBackend:
+    """Scripted OCR - (text, confidence of every word) per Tesseract config"""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.runs = []
+
+    def image_to_data(self, image, config=''):
+        self.runs.append(config)
+        text, confidence = self.pages[config]
+        return text, [(word, confidence) for word in text.split()]
+
+
+def cascade(backend):
+    raw = PreprocessConfig(enabled=False)
+    steps = [CascadeStep('fast', raw), CascadeStep('sparse', raw, '--psm 11'), CascadeStep('gray', raw, '--psm 6')]
+    return OCRCascade(backend, default_parser, steps)
+
+
+def parse(text):
+    return default_parser.parse(text, 'bp.png')
+
+
+@pytest.fixture
+def image():
+    return Image.new('L', (40, 20), color=255)
+
+
+def test_confident_first_pass_stops_there(image):
+    backend = FakeBackend({'': (FULL_PASS, 95.0)})
+    text = cascade(backend).run(image)
+    assert backend.runs == ['']
+    assert parse(text)['flight_number'] == '6E2134'
+    assert parse(text)['route'] == 'BLR → HYD'
+
+
+def test_escalates_only_for_missing_or_unsure_fields(image):
+    backend = FakeBackend({
+        '': ("FLIGHT: 6E 2134\nFROM: BLR TO: HYD\nPNR: QWE123\n", 90.0),   # no name, no date
+        '--psm 11': ("PASSENGER NAME: PRIYA SHARMA\nPNR: QWE128\n", 40.0),   # name but unsure, worse PNR
+        '--psm 6': ("PASSENGER NAME: PRIYA SHARMA\nDATE: 02/11/2026\n", 85.0),
+    })
+    record = parse(cascade(backend).run(image))
+    assert backend.runs == ['', '--psm 11', '--psm 6']
+    assert record['pnr'] == 'QWE123'  # the more confident read wins
+    assert record['passenger_name'] == 'Priya Sharma'
+    assert record['date'] == '02/11/2026'
+
+
+def test_gives_up_after_last_step(image):
+    backend = FakeBackend({config: ("NOTHING USEFUL HERE", 99.0) for config in ('', '--psm 11', '--psm 6')})
+    assert parse(cascade(backend).run(image))['flight_number'] == 'Not found'
+    assert len(backend.runs) == 3
+
+
+def test_seed_fields_skip_ocr(image):
+    seed = {'flight_number': ('AI101', 99.0), 'route': (('DEL', 'BOM'), 99.0), 'passenger_name': ('VENKATESH KUMAR', 99.0),
+            'date': ('25/01/2026', 99.0), 'pnr': ('ABC123', 99.0)}
+    backend = FakeBackend({})
+    record = parse(cascade(backend).run(image, seed, 'Air India'))
+    assert backend.runs == []
+    assert record['airline'] == 'Air India'
+    assert record['route'] == 'DEL → BOM'
+
+
+def test_canonical_text_round_trips_through_parser():
+    fields = parse(FULL_PASS)
+    values = {field: fields[field] for field in FIELDS if fields[field] != 'Not found'}
+    values['route'] = tuple(values['route'].split(' → '))
+    values['passenger_name'] = values['passenger_name'].upper()
+    again = parse(canonical_text(values, 'IndiGo'))
+    assert {field: again[field] for field in FIELDS} == {field: fields[field] for field in FIELDS}
+
+
+def test_field_confidence_finds_glued_and_split_words():
+    confidences = word_confidences([('PNR:QWE123', 80.0), ('6E', 70.0), ('2134', 90.0), ('BLR', 60.0)])
+    assert field_confidence('QWE123', confidences) == 80.0
+    assert field_confidence('6E2134', confidences) >= 70.0
+    assert field_confidence(('BLR', 'HYD'), confidences) == 0.0
+
+
+def test_signature_changes_with_steps():
+    backend = FakeBackend({})
+    other = OCRCascade(backend, default_parser, cascade(backend).steps[:2])
+    assert cascade(backend).signature() != other.signature()
@@ -0,0 +1,100 @@
+import sqlite3
+
+import pytest
+
+from record_dedup import DedupIndex, dedup_keys, merge_records, normalize_flight, normalize_name
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = DedupIndex(str(tmp_path / "dedup.sqlite3"), namespace='document')
+    yield index
+    index.close()
+
+
+def booking(**fields):
+    record = {'passenger_name': 'Venkatesh Kumar', 'flight_number': 'AI101', 'date': '25/01/2026',
+              'pnr': 'ABC123', 'seat': 'Not found', 'route': 'DEL → BOM'}
+    record.update(fields)
+    return record
+
+
+def test_normalizers():
+    assert normalize_flight('ai-0101') == normalize_flight('AI 101') == 'AI101'
+    assert normalize_name('KUMAR/VENKATESH') == normalize_name('Venkatesh Kumar')
+    assert dedup_keys(booking(date='2026-01-25')) == dedup_keys(booking())
+
+
+def test_merge_keeps_found_and_longer_values():
+    base = {'passenger_name': 'Venkatesh', 'seat': 'Not found', 'pnr': 'ABC123'}
+    assert merge_records(base, {'passenger_name': 'Venkatesh Kumar', 'seat': '15A', 'pnr': 'Not found'})
+    assert base == {'passenger_name': 'Venkatesh Kumar', 'seat': '15A', 'pnr': 'ABC123'}
+    assert not merge_records(base, {'seat': 'Not found'})
+
+
+def test_duplicates_merge_into_one_booking(index):
+    rows = list(index.dedupe([booking(), booking(flight_number='AI 0101', seat='15A'), booking(date='2026-01-25')]))
+    assert len(rows) == 1
+    assert rows[0]['seat'] == '15A'
+    assert index.count() == 1
+
+
+def test_group_booking_passengers_stay_apart(index):
+    rows = list(index.dedupe([booking(), booking(passenger_name='Priya Kumar', seat='15B')]))
+    assert [row['passenger_name'] for row in rows] == ['Venkatesh Kumar', 'Priya Kumar']
+
+
+def test_nameless_record_links_to_first_passenger_of_its_pnr(index):
+    nameless = booking(passenger_name='Not found', time='08:30 AM')
+    rows = list(index.dedupe([booking(), booking(passenger_name='Priya Kumar'), nameless]))
+    assert len(rows) == 2
+    assert rows[0]['time'] == '08:30 AM'
+    assert 'time' not in rows[1]
+
+
+def test_only_new_drops_bookings_from_earlier_runs(index):
+    list(index.dedupe([booking()]))
+    rows = list(index.dedupe([booking(seat='15A'), booking(passenger_name='Priya Kumar')], only_new=True))
+    assert [row['passenger_name'] for row in rows] == ['Priya Kumar']
+    assert next(index.records())['seat'] == '15A'  # the old booking was still merged
+
+
+def test_keyless_records_are_not_stored_again(index):
+    keyless = {'source_file': 'blurry.jpg', 'flight_number': 'Not found', 'extraction_time': '2026-01-01 10:00:00'}
+    assert len(list(index.dedupe([keyless]))) == 1
+    rerun = dict(keyless, extraction_time='2026-01-02 10:00:00')
+    assert list(index.dedupe([rerun], only_new=True)) == []
+    assert len(list(index.dedupe([dict(keyless, source_file='other.jpg')], only_new=True))) == 1
+    assert index.count() == 2
+
+
+def test_dedupe_streams_batches_without_holding_the_lock(index):
+    names = ['Arjun Iyer', 'Priya Sharma', 'Rahul Rao', 'Divya Nair', 'Karthik Menon']
+    produced = []
+
+    def records():
+        for name in names:
+            produced.append(name)
+            # Another writer gets the database while we wait for the next record
+            other = sqlite3.connect(index.path, timeout=0.1)
+            other.execute("BEGIN IMMEDIATE")
+            other.rollback()
+            other.close()
+            yield booking(passenger_name=name)
+
+    rows = index.dedupe(records(), batch_size=2)
+    assert next(rows)['passenger_name'] == 'Arjun Iyer'
+    assert len(produced) == 2  # yielded after the first batch, before the rest was read
+    assert [row['passenger_name'] for row in rows] == names[1:]
+
+
+def test_duplicate_across_batches_updates_but_is_not_repeated(index):
+    rows = list(index.dedupe([booking(), booking(passenger_name='Priya Kumar'), booking(seat='15A')], batch_size=2))
+    assert [row['passenger_name'] for row in rows] == ['Venkatesh Kumar', 'Priya Kumar']
+    assert next(index.records())['seat'] == '15A'
+
+
+def test_namespaces_are_separate(tmp_path):
+    path = str(tmp_path / "dedup.sqlite3")
+    list(DedupIndex(path, namespace='email').dedupe([booking()]))
+    assert len(list(DedupIndex(path, namespace='document').dedupe([booking()], only_new=True))) == 1
@@ -0,0 +1,72 @@
+import os
+
+import pytest
+
+from report_sink import ParquetSink, StreamingExcelSink, have_pyarrow
+
+openpyxl = pytest.importorskip('openpyxl')
+
+RECORDS = [
+    {'passenger_name': 'Venkatesh Kumar', 'flight_number': 'AI101', 'route': 'DEL → BOM', 'date': '25/01/2026',
+     'time': '08:30 AM', 'pnr': 'ABC123', 'airline': 'Air India', 'extraction_time': '2026-01-20 10:00:00'},
+    {'passenger_name': 'Not found', 'flight_number': '6E2134', 'route': 'Not found', 'date': 'Not found',
+     'time': 'Not found', 'pnr': 'Not found', 'airline': 'IndiGo', 'extraction_time': '2026-01-21 10:00:00'},
+]
+
+
+def rows(path, sheet='Flight Records'):
+    workbook = openpyxl.load_workbook(path, read_only=True)
+    try:
+        return [list(row) for row in workbook[sheet].iter_rows(values_only=True)]
+    finally:
+        workbook.close()
+
+
+def test_excel_rows_and_stats(tmp_path):
+    path = str(tmp_path / "report.xlsx")
+    with StreamingExcelSink(path) as sink:
+        sink.write_many(RECORDS)
+        sink.write({'flight_number': 'SG8152', 'extra': 'dropped'})  # no route/name keys at all
+
+    assert sink.stats() == {'Total Extractions': 3, 'Successful Flight Numbers': 3, 'Successful Routes': 1,
+                            'Successful Passenger Names': 1, 'Airlines Detected': 2}
+    written = rows(path)
+    assert written[0] == list(RECORDS[0])
+    assert written[3][1] == 'SG8152' and 'extra' not in written[0]
+    assert ['Total Extractions', 3] in rows(path, 'Extraction Stats')
+
+
+def test_excel_append_keeps_earlier_rows(tmp_path):
+    path = str(tmp_path / "report.xlsx")
+    with StreamingExcelSink(path, summary=False) as sink:
+        sink.write(RECORDS[0])
+    with StreamingExcelSink(path, summary=False, append=True) as sink:
+        sink.write(RECORDS[1])
+    assert [row[1] for row in rows(path)[1:]] == ['AI101', '6E2134']
+
+
+@pytest.mark.skipif(os.name == 'nt', reason="POSIX permissions")
+def test_excel_report_is_not_private(tmp_path):
+    path = str(tmp_path / "report.xlsx")
+    with StreamingExcelSink(path) as sink:
+        sink.write(RECORDS[0])
+    assert os.stat(path).st_mode & 0o777 == 0o644
+    assert os.listdir(tmp_path) == ["report.xlsx"]  # no temp file left over
+
+
+@pytest.mark.skipif(not have_pyarrow(), reason="pyarrow not installed")
+def test_parquet_partitions_and_types(tmp_path):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    root = str(tmp_path / "records")
+    with ParquetSink(root) as sink:
+        sink.write_many(RECORDS)
+
+    assert sorted(os.listdir(root)) == ['extraction_date=2026-01-20', 'extraction_date=2026-01-21']
+    table = pq.read_table(root)
+    assert table.num_rows == 2
+    assert table.schema.field('date').type == pa.date32()
+    assert pa.types.is_dictionary(table.schema.field('flight_number').type)
+    dates = dict(zip(table.column('flight_number').to_pylist(), table.column('date').to_pylist()))
+    assert str(dates['AI101']) == '2026-01-25' and dates['6E2134'] is None
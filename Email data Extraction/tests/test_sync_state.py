@@ -0,0 +1,57 @@
+import pytest
+
+from conftest import ticket_email
+from main import EmailFlightExtractor
+from sync_state import SyncStateStore
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = SyncStateStore(str(tmp_path / "sync.sqlite3"))
+    yield store
+    store.close()
+
+
+def run(mail, store):
+    """One process_emails run over an already connected mailbox"""
+    ex = EmailFlightExtractor("user@example.com", "secret", sync_state=store)
+    ex.mail = mail
+    mail.select('INBOX')
+    return [flight['employee_name'] for flight in ex.process_emails()]
+
+
+def test_start_uid(store):
+    assert store.start_uid('a', 'INBOX', 7) == 1
+    store.update('a', 'INBOX', 7, 40)
+    assert store.start_uid('a', 'inbox', 7) == 41
+    assert store.start_uid('a', 'INBOX', 8) == 1  # UIDVALIDITY changed - full resync
+
+
+def test_mark_never_moves_backwards(store):
+    store.update('a', 'INBOX', 7, 40)
+    store.update('a', 'INBOX', 7, 12)
+    assert store.get('a', 'INBOX') == (7, 40)
+    store.update('a', 'INBOX', 8, 3)
+    assert store.get('a', 'INBOX') == (8, 3)
+
+
+def test_second_run_fetches_only_new_mail(mailbox, store):
+    mailbox.append('INBOX', ticket_email(name='Arjun Iyer'))
+    mailbox.append('INBOX', ticket_email(name='Priya Sharma'))
+    assert run(mailbox, store) == ['Arjun Iyer', 'Priya Sharma']
+
+    mailbox.append('INBOX', ticket_email(name='Rahul Rao'))
+    mailbox.calls.clear()
+    assert run(mailbox, store) == ['Rahul Rao']
+    assert {call[1] for call in mailbox.calls if call[0] == 'UID FETCH'} == {'3'}
+
+    assert run(mailbox, store) == []
+
+
+def test_uidvalidity_change_refetches_everything(mailbox, store):
+    mailbox.append('INBOX', ticket_email(name='Arjun Iyer'))
+    mailbox.append('INBOX', ticket_email(name='Priya Sharma'))
+    run(mailbox, store)
+
+    mailbox.renumber('INBOX')
+    assert run(mailbox, store) == ['Arjun Iyer', 'Priya Sharma']